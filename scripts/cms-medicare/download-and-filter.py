@@ -6,16 +6,22 @@ Usage:
   python scripts/cms-medicare/download-and-filter.py
 
 Output: scripts/cms-medicare/nppes-filtered.csv
+
+The npidata CSV is read straight out of the zip and filtered rows are
+written as they are found, so neither the extracted CSV nor the filtered
+records ever have to fit on disk or in memory at once. A CSV extracted by
+an earlier version of this script is still used if present.
 """
 
 import os
 import re
 import json
 import zipfile
-import glob
 import requests
 import pandas as pd
+from collections import Counter
 from pathlib import Path
+from typing import IO
 
 SCRIPT_DIR = Path(__file__).parent
 DATA_DIR = SCRIPT_DIR / "data"
@@ -127,25 +133,13 @@ def download_nppes(url: str) -> Path:
     return zip_path
 
 
-def extract_csv(zip_path: Path) -> Path:
-    """Extract the main npidata CSV from the zip."""
-    # Check if already extracted
-    existing = list(DATA_DIR.glob("npidata_pfile_*.csv"))
-    if existing:
-        print(f"CSV already extracted: {existing[0]}")
-        return existing[0]
-
-    print(f"Extracting CSV from {zip_path.name}...")
-    with zipfile.ZipFile(zip_path, "r") as zf:
-        # Find the main data file (not the header or other files)
-        csv_names = [n for n in zf.namelist() if n.startswith("npidata_pfile_") and n.endswith(".csv")]
-        if not csv_names:
-            raise RuntimeError(f"No npidata_pfile_*.csv found in zip. Contents: {zf.namelist()[:10]}")
-
-        csv_name = csv_names[0]
-        print(f"  Extracting {csv_name}...")
-        zf.extract(csv_name, DATA_DIR)
-        return DATA_DIR / csv_name
+def find_csv_member(zf: zipfile.ZipFile) -> str:
+    """Name of the main npidata CSV inside the NPPES zip."""
+    # The main data file, not the header or other files
+    csv_names = [n for n in zf.namelist() if n.startswith("npidata_pfile_") and n.endswith(".csv")]
+    if not csv_names:
+        raise RuntimeError(f"No npidata_pfile_*.csv found in zip. Contents: {zf.namelist()[:10]}")
+    return csv_names[0]
 
 
 def load_clinic_zip_codes() -> set[str]:
@@ -164,27 +158,33 @@ def load_clinic_zip_codes() -> set[str]:
     return zips
 
 
-def filter_nppes(csv_path: Path, clinic_zips: set[str]) -> pd.DataFrame:
+def filter_nppes(source: Path | IO[bytes], clinic_zips: set[str], out_path: Path) -> dict:
     """
     Filter the NPPES CSV to relevant records using chunked reading.
 
+    ``source`` is a CSV path or an open binary stream (the zip member).
+    Matching rows are appended to ``out_path`` chunk by chunk; the file is
+    only put in place once the whole CSV has been read. Returns the row
+    counts and the entity type / taxonomy tallies of the kept rows.
+
     Strategy:
     1. Keep all records with pain-related taxonomy codes
     2. Keep all organization records (Entity Type 2) in our clinic zip codes
     """
-    print(f"Filtering NPPES data from {csv_path.name}...")
     print(f"  Using {len(PAIN_TAXONOMY_CODES)} pain taxonomy codes")
     print(f"  Using {len(clinic_zips)} clinic zip codes")
 
     all_taxonomy_codes = PAIN_TAXONOMY_CODES | MEDICAL_ORG_CODES
 
-    chunks = []
     total_rows = 0
     kept_rows = 0
+    entity_counts: Counter = Counter()
+    taxonomy_counts: Counter = Counter()
+    tmp_path = out_path.with_suffix(".csv.tmp")
 
     # Read in chunks to manage memory
     chunk_iter = pd.read_csv(
-        csv_path,
+        source,
         chunksize=100_000,
         dtype=str,
         usecols=lambda col: col in COLUMNS_NEEDED,
@@ -192,52 +192,68 @@ def filter_nppes(csv_path: Path, clinic_zips: set[str]) -> pd.DataFrame:
         on_bad_lines="skip",
     )
 
-    for i, chunk in enumerate(chunk_iter):
-        total_rows += len(chunk)
-
-        # Normalize zip codes to 5 digits
-        zip_col = "Provider Business Practice Location Address Postal Code"
-        if zip_col in chunk.columns:
-            chunk[zip_col] = chunk[zip_col].fillna("").str[:5]
-
-        # Check taxonomy codes (columns 1-3)
-        tax_cols = [
-            "Healthcare Provider Taxonomy Code_1",
-            "Healthcare Provider Taxonomy Code_2",
-            "Healthcare Provider Taxonomy Code_3",
-        ]
-        tax_match = pd.Series(False, index=chunk.index)
-        for tc in tax_cols:
-            if tc in chunk.columns:
-                tax_match |= chunk[tc].isin(all_taxonomy_codes)
-
-        # Check zip code match for organizations (Entity Type 2)
-        zip_match = pd.Series(False, index=chunk.index)
-        if clinic_zips and zip_col in chunk.columns:
-            is_org = chunk["Entity Type Code"] == "2"
-            in_zip = chunk[zip_col].isin(clinic_zips)
-            zip_match = is_org & in_zip
-
-        # Keep rows matching either criterion
-        mask = tax_match | zip_match
-        filtered = chunk[mask]
-
-        if len(filtered) > 0:
-            chunks.append(filtered)
-            kept_rows += len(filtered)
-
-        if (i + 1) % 10 == 0:
-            print(f"  Processed {total_rows:,} rows, kept {kept_rows:,}...")
+    # A partial file must not be left behind on an error or Ctrl-C
+    try:
+        with open(tmp_path, "w", newline="") as out:
+            for i, chunk in enumerate(chunk_iter):
+                total_rows += len(chunk)
+
+                # Normalize zip codes to 5 digits
+                zip_col = "Provider Business Practice Location Address Postal Code"
+                if zip_col in chunk.columns:
+                    chunk[zip_col] = chunk[zip_col].fillna("").str[:5]
+
+                # Check taxonomy codes (columns 1-3)
+                tax_cols = [
+                    "Healthcare Provider Taxonomy Code_1",
+                    "Healthcare Provider Taxonomy Code_2",
+                    "Healthcare Provider Taxonomy Code_3",
+                ]
+                tax_match = pd.Series(False, index=chunk.index)
+                for tc in tax_cols:
+                    if tc in chunk.columns:
+                        tax_match |= chunk[tc].isin(all_taxonomy_codes)
+
+                # Check zip code match for organizations (Entity Type 2)
+                zip_match = pd.Series(False, index=chunk.index)
+                if clinic_zips and zip_col in chunk.columns:
+                    is_org = chunk["Entity Type Code"] == "2"
+                    in_zip = chunk[zip_col].isin(clinic_zips)
+                    zip_match = is_org & in_zip
+
+                # Keep rows matching either criterion
+                mask = tax_match | zip_match
+                filtered = chunk[mask]
+
+                if len(filtered) > 0:
+                    # Header only before the first rows
+                    filtered.to_csv(out, header=not kept_rows, index=False)
+                    kept_rows += len(filtered)
+                    entity_counts.update(filtered["Entity Type Code"].value_counts().to_dict())
+                    if tax_cols[0] in filtered.columns:
+                        taxonomy_counts.update(filtered[tax_cols[0]].value_counts().to_dict())
+
+                if (i + 1) % 10 == 0:
+                    print(f"  Processed {total_rows:,} rows, kept {kept_rows:,}...")
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
     print(f"  Total processed: {total_rows:,} rows")
     print(f"  Total kept: {kept_rows:,} rows")
 
-    if not chunks:
+    if kept_rows:
+        os.replace(tmp_path, out_path)
+    else:
+        tmp_path.unlink()
         print("WARNING: No matching records found!")
-        return pd.DataFrame()
 
-    result = pd.concat(chunks, ignore_index=True)
-    return result
+    return {
+        "total_rows": total_rows,
+        "kept_rows": kept_rows,
+        "entity_counts": entity_counts,
+        "taxonomy_counts": taxonomy_counts,
+    }
 
 
 def main():
@@ -253,33 +269,35 @@ def main():
         nppes_url = find_nppes_download_url()
         zip_path = download_nppes(nppes_url)
 
-    # Step 3: Extract CSV
-    csv_path = extract_csv(zip_path)
-
-    # Step 4: Filter
-    filtered = filter_nppes(csv_path, clinic_zips)
+    # Step 3: Filter, streaming the CSV out of the zip (or from a CSV
+    # extracted by an earlier run) into the output file
+    out_path = SCRIPT_DIR / "nppes-filtered.csv"
+    existing_csvs = list(DATA_DIR.glob("npidata_pfile_*.csv"))
+    if existing_csvs:
+        print(f"Filtering NPPES data from extracted {existing_csvs[0].name}...")
+        stats = filter_nppes(existing_csvs[0], clinic_zips, out_path)
+    else:
+        with zipfile.ZipFile(zip_path, "r") as zf:
+            csv_name = find_csv_member(zf)
+            print(f"Filtering NPPES data from {csv_name} in {zip_path.name}...")
+            with zf.open(csv_name) as csv_file:
+                stats = filter_nppes(csv_file, clinic_zips, out_path)
 
-    if filtered.empty:
+    if not stats["kept_rows"]:
         print("No records to save. Exiting.")
         return
 
-    # Step 5: Save filtered data
-    out_path = SCRIPT_DIR / "nppes-filtered.csv"
-    filtered.to_csv(out_path, index=False)
-    print(f"\nSaved {len(filtered):,} filtered records to {out_path}")
+    print(f"\nSaved {stats['kept_rows']:,} filtered records to {out_path}")
 
     # Stats
-    entity_counts = filtered["Entity Type Code"].value_counts()
     print(f"\nEntity types:")
-    for etype, count in entity_counts.items():
+    for etype, count in stats["entity_counts"].most_common():
         label = "Organization" if etype == "2" else "Individual"
         print(f"  {label} (Type {etype}): {count:,}")
 
-    tax_col = "Healthcare Provider Taxonomy Code_1"
-    if tax_col in filtered.columns:
-        top_tax = filtered[tax_col].value_counts().head(15)
+    if stats["taxonomy_counts"]:
         print(f"\nTop taxonomy codes:")
-        for code, count in top_tax.items():
+        for code, count in stats["taxonomy_counts"].most_common(15):
             print(f"  {code}: {count:,}")
 
 
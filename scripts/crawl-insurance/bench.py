@@ -0,0 +1,582 @@
+"""
+Offline throughput benchmark for crawl.py.
+
+Runs crawl.py end to end (its main(), in a subprocess) against two local
+stand-ins, so a performance change can be measured without crawling real
+clinic sites or paying for an LLM:
+
+  synthetic sites  an aiohttp server generating clinic-like sites, one per
+                   loopback address (127.1.x.y), so every site is its own
+                   host to the per-host limits, the pre-pass and the
+                   scheduler. Each site draws its latency, page size,
+                   missing insurance page (404) and JS-only rendering from
+                   the options below, seeded so runs are comparable.
+  fake LLM         an OpenAI- and Anthropic-compatible endpoint
+                   (/v1/chat/completions, /v1/messages) with configurable
+                   latency, random 429s and an optional requests-per-minute
+                   cap. It answers with the carriers named in the prompt,
+                   in plain, structured (json_schema / tool use) and packed
+                   form. The batch APIs are there too (/v1/files and
+                   /v1/batches, /v1/messages/batches), so --llm-batch runs
+                   its submit, poll and collect steps offline; a batch
+                   finishes one LLM latency after it is submitted.
+
+Reports clinics per minute, per-clinic latency percentiles (from
+crawl.py's metrics file) and the peak RSS of crawl.py with its children
+(workers, Chromium). JS-rendered sites need Chromium, as in a real run.
+
+Usage:
+  python scripts/crawl-insurance/bench.py
+  python scripts/crawl-insurance/bench.py --clinics 1000 --sites 200 --site-latency-ms 300
+  python scripts/crawl-insurance/bench.py --llm-429-rate 0.1 -- --pack-clinics 5 --workers 2
+  python scripts/crawl-insurance/bench.py --provider anthropic --llm-batch
+
+Arguments after "--" are passed to crawl.py. Every run works in a fresh
+temporary directory; nothing is written next to crawl.py.
+
+aiohttp comes with crawl4ai.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import psutil
+from aiohttp import web
+
+import crawl_metrics
+
+CRAWL_SCRIPT = Path(__file__).parent / "crawl.py"
+
+CARRIERS = [
+    "Medicare", "Medicaid", "Aetna", "Cigna", "Blue Cross Blue Shield", "UnitedHealthcare",
+    "Humana", "Tricare", "Anthem", "Kaiser Permanente", "Molina Healthcare", "Oscar Health",
+]
+PAYMENT_METHODS = ["Cash", "Credit Cards", "Debit Cards", "HSA/FSA", "CareCredit", "Checks"]
+INSURANCE_PATHS = ["/insurance", "/billing", "/patient-information", "/payment"]
+
+FILLER = (
+    "Our board-certified physicians treat chronic back pain, neck pain, sciatica and "
+    "arthritis with interventional procedures, physical therapy and medication management. "
+)
+JS_SHELL = """<!doctype html>
+<html><head><title>{title}</title></head>
+<body><div id="root"></div>
+<noscript>This site requires JavaScript.</noscript>
+<script>document.getElementById("root").innerHTML = {body};</script>
+</body></html>"""
+
+
+class SyntheticSites:
+    """Clinic-like sites served per Host header from one aiohttp app."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.requests = 0
+        # host -> generated site
+        self.sites: dict[str, dict[str, Any]] = {}
+        rng = random.Random(args.seed)
+        for n in range(args.sites):
+            host = f"127.1.{n // 250}.{n % 250 + 1}"
+            carriers = rng.sample(CARRIERS, rng.randint(0, 8))
+            self.sites[host] = {
+                "latency": max(0.0, rng.gauss(args.site_latency_ms, args.site_latency_ms / 2)) / 1000,
+                "js": rng.random() < args.js_rate,
+                "missing": rng.random() < args.not_found_rate,
+                "insurance_path": rng.choice(INSURANCE_PATHS),
+                "carriers": carriers,
+                "payments": rng.sample(PAYMENT_METHODS, rng.randint(0, 4)),
+                "padding": max(0, int(rng.gauss(args.page_kb, args.page_kb / 3) * 1024)),
+            }
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/{path:.*}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        host = (request.host or "").partition(":")[0]
+        site = self.sites.get(host)
+        if site is None:
+            return web.Response(status=404)
+        await asyncio.sleep(site["latency"])
+
+        path = request.path.rstrip("/") or "/"
+        if path == "/" or path.startswith("/locations/"):
+            title, body = self._home(host, site)
+        elif path == site["insurance_path"] and not site["missing"]:
+            title, body = self._insurance(site)
+        else:
+            return web.Response(status=404, text="<html><body><h1>404 Not Found</h1></body></html>")
+
+        # Page weight: scripts and markup that carry no text
+        body += f"<!-- {'x' * site['padding']} -->"
+        if site["js"]:
+            html = JS_SHELL.format(title=title, body=json.dumps(body))
+        else:
+            html = f"<!doctype html><html><head><title>{title}</title></head><body>{body}</body></html>"
+        return web.Response(text=html, content_type="text/html")
+
+    def _home(self, host: str, site: dict[str, Any]) -> tuple[str, str]:
+        link = "" if site["missing"] else f'<a href="{site["insurance_path"]}">Insurance &amp; Billing</a>'
+        return "Pain Clinic", (
+            f"<nav><a href=\"/\">Home</a> <a href=\"/about\">About</a> {link}</nav>"
+            f"<h1>Pain Management Clinic at {host}</h1><p>{FILLER * 4}</p>"
+        )
+
+    def _insurance(self, site: dict[str, Any]) -> tuple[str, str]:
+        carriers = "".join(f"<li>{name}</li>" for name in site["carriers"])
+        payments = ", ".join(site["payments"]) or "cash"
+        accepted = (
+            f"<p>We accept the following insurance plans:</p><ul>{carriers}</ul>"
+            if carriers else "<p>We do not accept insurance; please call our billing office.</p>"
+        )
+        return "Insurance & Billing", (
+            f"<h1>Insurance &amp; Billing</h1>{accepted}"
+            f"<p>Payment methods: {payments}.</p><p>{FILLER}</p>"
+        )
+
+
+class FakeLLM:
+    """OpenAI- and Anthropic-compatible extraction endpoint."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.requests = 0
+        self.throttled = 0
+        self.batches = 0
+        self._recent: list[float] = []
+        # Uploaded and output files by id, batches by id
+        self._files: dict[str, bytes] = {}
+        self._batches: dict[str, dict[str, Any]] = {}
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=256 * 1024 * 1024)
+        app.router.add_post("/v1/chat/completions", self.openai)
+        app.router.add_post("/v1/messages", self.anthropic)
+        app.router.add_post("/v1/files", self.upload_file)
+        app.router.add_get("/v1/files/{file_id}/content", self.file_content)
+        app.router.add_post("/v1/batches", self.create_openai_batch)
+        app.router.add_get("/v1/batches/{batch_id}", self.openai_batch)
+        app.router.add_post("/v1/messages/batches", self.create_anthropic_batch)
+        app.router.add_get("/v1/messages/batches/{batch_id}", self.anthropic_batch)
+        app.router.add_get("/v1/messages/batches/{batch_id}/results", self.anthropic_batch_results)
+        return app
+
+    def _throttle(self) -> float | None:
+        """Seconds the client should wait, if this request is rejected."""
+        now = time.monotonic()
+        self._recent = [t for t in self._recent if now - t < 60]
+        if self.args.llm_rpm and len(self._recent) >= self.args.llm_rpm:
+            return 60 - (now - self._recent[0])
+        if self.rng.random() < self.args.llm_429_rate:
+            return 1.0
+        self._recent.append(now)
+        return None
+
+    async def _reply(self, prompt: str) -> tuple[dict[str, Any] | None, float | None]:
+        self.requests += 1
+        retry_after = self._throttle()
+        if retry_after is not None:
+            self.throttled += 1
+            return None, retry_after
+        await asyncio.sleep(self._latency())
+        return _answer(prompt), None
+
+    def _latency(self) -> float:
+        latency = self.args.llm_latency_ms / 1000
+        return max(0.0, self.rng.gauss(latency, latency / 4))
+
+    async def openai(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        reply, retry_after = await self._reply(body["messages"][-1]["content"])
+        if reply is None:
+            return _rate_limited(retry_after, {"error": {"type": "rate_limit_exceeded", "message": "Rate limit"}})
+        return web.json_response(self._completion(body, reply))
+
+    def _completion(self, body: dict[str, Any], reply: Any) -> dict[str, Any]:
+        prompt = body["messages"][-1]["content"]
+        return {
+            "id": f"chatcmpl-bench-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(reply)},
+                "finish_reason": "stop",
+            }],
+            "usage": _usage(prompt, reply, "prompt_tokens", "completion_tokens"),
+        }
+
+    async def anthropic(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        reply, retry_after = await self._reply(body["messages"][-1]["content"])
+        if reply is None:
+            return _rate_limited(
+                retry_after, {"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limit"}}
+            )
+        return web.json_response(self._message(body, reply))
+
+    def _message(self, body: dict[str, Any], reply: Any) -> dict[str, Any]:
+        prompt = body["messages"][-1]["content"]
+        if body.get("tools"):
+            content = [{"type": "tool_use", "id": "toolu_bench", "name": body["tools"][0]["name"], "input": reply}]
+            stop_reason = "tool_use"
+        else:
+            content = [{"type": "text", "text": json.dumps(reply)}]
+            stop_reason = "end_turn"
+        return {
+            "id": f"msg_bench_{self.requests}",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": _usage(prompt, reply, "input_tokens", "output_tokens"),
+        }
+
+    # Batch APIs: a batch is answered in full one LLM latency after it is
+    # created, without rate limits, like the providers' separate batch quota
+
+    async def upload_file(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        upload = form["file"]
+        file_id = f"file-bench-{len(self._files)}"
+        self._files[file_id] = upload.file.read()
+        return web.json_response({
+            "id": file_id,
+            "object": "file",
+            "bytes": len(self._files[file_id]),
+            "created_at": int(time.time()),
+            "filename": upload.filename,
+            "purpose": form.get("purpose", "batch"),
+            "status": "processed",
+        })
+
+    async def file_content(self, request: web.Request) -> web.Response:
+        data = self._files.get(request.match_info["file_id"])
+        if data is None:
+            return web.json_response({"error": {"message": "No such file"}}, status=404)
+        return web.Response(body=data, content_type="application/jsonl")
+
+    async def create_openai_batch(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        batch_id = f"batch_bench_{len(self._batches)}"
+        lines = [json.loads(line) for line in self._files[body["input_file_id"]].decode().splitlines() if line]
+        batch = self._batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"],
+            "completion_window": body["completion_window"],
+            "created_at": int(time.time()),
+            "status": "in_progress",
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+        }
+        asyncio.get_running_loop().call_later(self._latency(), self._finish_openai_batch, batch, lines)
+        self.batches += 1
+        return web.json_response(batch)
+
+    def _finish_openai_batch(self, batch: dict[str, Any], lines: list[dict[str, Any]]) -> None:
+        output = []
+        for line in lines:
+            self.requests += 1
+            reply = _answer(line["body"]["messages"][-1]["content"])
+            output.append(json.dumps({
+                "id": f"batch_req_{self.requests}",
+                "custom_id": line["custom_id"],
+                "response": {"status_code": 200, "body": self._completion(line["body"], reply)},
+                "error": None,
+            }))
+        file_id = f"file-bench-{len(self._files)}"
+        self._files[file_id] = ("\n".join(output) + "\n").encode()
+        batch.update({
+            "status": "completed",
+            "output_file_id": file_id,
+            "request_counts": {"total": len(lines), "completed": len(lines), "failed": 0},
+        })
+
+    async def openai_batch(self, request: web.Request) -> web.Response:
+        batch = self._batches.get(request.match_info["batch_id"])
+        if batch is None:
+            return web.json_response({"error": {"message": "No such batch"}}, status=404)
+        return web.json_response(batch)
+
+    async def create_anthropic_batch(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        batch_id = f"msgbatch_bench_{len(self._batches)}"
+        requests = body["requests"]
+        batch = self._batches[batch_id] = {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "in_progress",
+            "request_counts": {
+                "processing": len(requests), "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0,
+            },
+            "created_at": _timestamp(time.time()),
+            "expires_at": _timestamp(time.time() + 86400),
+            "ended_at": None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": None,
+        }
+        results_url = f"{request.scheme}://{request.host}/v1/messages/batches/{batch_id}/results"
+        asyncio.get_running_loop().call_later(
+            self._latency(), self._finish_anthropic_batch, batch, requests, results_url,
+        )
+        self.batches += 1
+        return web.json_response(batch)
+
+    def _finish_anthropic_batch(self, batch: dict[str, Any], requests: list[dict[str, Any]], results_url: str) -> None:
+        output = []
+        for line in requests:
+            self.requests += 1
+            reply = _answer(line["params"]["messages"][-1]["content"])
+            output.append(json.dumps({
+                "custom_id": line["custom_id"],
+                "result": {"type": "succeeded", "message": self._message(line["params"], reply)},
+            }))
+        self._files[batch["id"]] = ("\n".join(output) + "\n").encode()
+        batch.update({
+            "processing_status": "ended",
+            "ended_at": _timestamp(time.time()),
+            "results_url": results_url,
+            "request_counts": {
+                "processing": 0, "succeeded": len(requests), "errored": 0, "canceled": 0, "expired": 0,
+            },
+        })
+
+    async def anthropic_batch(self, request: web.Request) -> web.Response:
+        batch = self._batches.get(request.match_info["batch_id"])
+        if batch is None:
+            return web.json_response({"type": "error", "error": {"type": "not_found_error"}}, status=404)
+        return web.json_response(batch)
+
+    async def anthropic_batch_results(self, request: web.Request) -> web.Response:
+        data = self._files.get(request.match_info["batch_id"])
+        if data is None:
+            return web.json_response({"type": "error", "error": {"type": "not_found_error"}}, status=404)
+        return web.Response(body=data, content_type="application/x-jsonl")
+
+
+def _answer(prompt: str) -> dict[str, Any]:
+    """The extraction (or, for a packed prompt, one per clinic key) for ``prompt``."""
+    keys = re.findall(r"^##### CLINIC (\S+) #####$", prompt, re.MULTILINE)
+    if keys:
+        sections = re.split(r"^##### CLINIC \S+ #####$", prompt, flags=re.MULTILINE)[1:]
+        return {key: _extraction(text) for key, text in zip(keys, sections)}
+    return _extraction(prompt)
+
+
+def _timestamp(seconds: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+
+def _extraction(text: str) -> dict[str, Any]:
+    return {
+        "insuranceProviders": [name for name in CARRIERS if name in text],
+        "otherInsurance": [],
+        "paymentMethods": [name for name in PAYMENT_METHODS if name in text],
+        "acceptsNewPatients": None,
+        "confidence": "high",
+    }
+
+
+def _usage(prompt: str, reply: Any, input_key: str, output_key: str) -> dict[str, int]:
+    # About four characters per token
+    return {input_key: len(prompt) // 4, output_key: len(json.dumps(reply)) // 4}
+
+
+def _rate_limited(retry_after: float, error: dict[str, Any]) -> web.Response:
+    return web.json_response(error, status=429, headers={"retry-after": f"{max(retry_after, 0.1):.1f}"})
+
+
+async def serve(app: web.Application, hosts: list[str], port: int = 0) -> tuple[web.AppRunner, int]:
+    """Serve ``app`` on ``hosts``, all on one port (picked if ``port`` is 0)."""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    for host in hosts:
+        await web.TCPSite(runner, host, port).start()
+        if port == 0:
+            port = runner.addresses[0][1]
+    return runner, port
+
+
+def make_clinics(args: argparse.Namespace, hosts: list[str], port: int) -> list[dict[str, Any]]:
+    """Clinic records in export-urls.ts's format, several per host for chains."""
+    clinics = []
+    for n in range(args.clinics):
+        host = hosts[n % len(hosts)]
+        location = "" if n < len(hosts) else f"locations/{n}"
+        clinics.append({
+            "id": f"bench-{n}",
+            "title": f"Bench Clinic {n}",
+            "website": f"http://{host}:{port}/{location}",
+            "state": "TX",
+        })
+    return clinics
+
+
+async def watch_rss(pid: int, peak: list[int], interval: float = 0.2) -> None:
+    """Track the peak summed RSS of ``pid`` and its descendants in ``peak[0]``."""
+    try:
+        root = psutil.Process(pid)
+    except psutil.NoSuchProcess:
+        return
+    while True:
+        total = 0
+        try:
+            for process in [root, *root.children(recursive=True)]:
+                try:
+                    total += process.memory_info().rss
+                except psutil.NoSuchProcess:
+                    pass
+        except psutil.NoSuchProcess:
+            return
+        peak[0] = max(peak[0], total)
+        await asyncio.sleep(interval)
+
+
+async def run_bench(args: argparse.Namespace, crawl_args: list[str]) -> dict[str, Any]:
+    sites = SyntheticSites(args)
+    llm = FakeLLM(args)
+    hosts = list(sites.sites)
+    site_runner, site_port = await serve(sites.app(), hosts)
+    llm_runner, llm_port = await serve(llm.app(), ["127.0.0.1"])
+
+    workdir = Path(args.keep_dir or tempfile.mkdtemp(prefix="crawl-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    input_path = workdir / "clinic-urls.json"
+    with open(input_path, "w") as f:
+        json.dump(make_clinics(args, hosts, site_port), f)
+
+    if args.provider == "anthropic":
+        base_url = f"http://127.0.0.1:{llm_port}"
+    else:
+        base_url = f"http://127.0.0.1:{llm_port}/v1"
+    # crawl.py joins its file options to its own directory; absolute paths win
+    command = [
+        sys.executable, str(CRAWL_SCRIPT),
+        "--provider", args.provider,
+        "--llm-base-url", base_url,
+        "--input", str(input_path),
+        "--output", str(workdir / "extraction-results.json"),
+        "--archive-dir", str(workdir / "crawl-archive"),
+        "--llm-cache", str(workdir / "llm-cache.sqlite"),
+        "--metrics-file", str(workdir / "crawl-metrics.jsonl"),
+        "--dead-hosts-file", str(workdir / "dead-hosts.json"),
+        "--host-stats-file", str(workdir / "host-stats.json"),
+        "--llm-batch-dir", str(workdir / "llm-batch"),
+        *(["--llm-batch", "--batch-poll-seconds", "0.5"] if args.llm_batch else []),
+        *crawl_args,
+    ]
+    env = {**os.environ, "OPENAI_API_KEY": "bench", "ANTHROPIC_API_KEY": "bench"}
+    log_path = workdir / "crawl.log"
+    print(f"Serving {len(hosts)} sites on port {site_port}, fake {args.provider} API on port {llm_port}")
+    print(f"Crawling {args.clinics} clinics; output in {workdir}")
+
+    peak = [0]
+    started = time.monotonic()
+    with open(log_path, "w") as log:
+        process = await asyncio.create_subprocess_exec(*command, stdout=log, stderr=asyncio.subprocess.STDOUT, env=env)
+        watcher = asyncio.create_task(watch_rss(process.pid, peak))
+        returncode = await process.wait()
+        watcher.cancel()
+    elapsed = time.monotonic() - started
+    await site_runner.cleanup()
+    await llm_runner.cleanup()
+
+    # The work directory is fresh, so its metrics file holds this one run
+    summary = {"distributions": {}, "outcomes": {}}
+    metrics_path = workdir / "crawl-metrics.jsonl"
+    if metrics_path.exists() and metrics_path.stat().st_size:
+        with open(metrics_path) as f:
+            run_id = json.loads(f.readline())["run"]
+        summary = crawl_metrics.summarize(metrics_path, run_id)
+    latency = summary["distributions"].get("clinic_seconds", {"quantiles": [], "sum": 0, "count": 0})
+    processed = sum(summary["outcomes"].values())
+    return {
+        "clinics": args.clinics,
+        "sites": len(hosts),
+        "returncode": returncode,
+        "elapsedSeconds": round(elapsed, 2),
+        "clinicsPerMinute": round(processed / elapsed * 60, 1),
+        "latencySeconds": {
+            f"p{round(q * 100)}": round(value, 3)
+            for q, value in zip(crawl_metrics.QUANTILES, latency["quantiles"])
+        },
+        "meanLatencySeconds": round(latency["sum"] / latency["count"], 3) if latency["count"] else None,
+        "peakRssMb": round(peak[0] / 1024 / 1024, 1),
+        "outcomes": summary["outcomes"],
+        "siteRequests": sites.requests,
+        "llmRequests": llm.requests,
+        "llmThrottled": llm.throttled,
+        "llmBatches": llm.batches,
+        "crawlArgs": crawl_args,
+        "log": str(log_path),
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print()
+    if report["returncode"] != 0:
+        print(f"crawl.py exited with {report['returncode']}; see {report['log']}")
+    print(f"Clinics per minute: {report['clinicsPerMinute']} ({report['elapsedSeconds']}s wall)")
+    latency = "  ".join(f"{name} {value}s" for name, value in report["latencySeconds"].items())
+    print(f"Clinic latency:     {latency or 'n/a'}")
+    print(f"Peak RSS:           {report['peakRssMb']} MB (crawl.py and its children)")
+    print(f"Outcomes:           {json.dumps(report['outcomes'], sort_keys=True)}")
+    print(f"Site requests: {report['siteRequests']}, LLM requests: {report['llmRequests']} "
+          f"({report['llmThrottled']} answered 429, {report['llmBatches']} batches)")
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    crawl_args: list[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, crawl_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark crawl.py against local synthetic sites and a fake LLM API",
+        epilog='Arguments after "--" are passed to crawl.py.',
+    )
+    parser.add_argument("--clinics", type=int, default=200, help="Clinics to crawl")
+    parser.add_argument("--sites", type=int, default=50, help="Distinct hosts the clinics are spread over")
+    parser.add_argument("--site-latency-ms", type=float, default=150, help="Mean response latency of a site")
+    parser.add_argument("--not-found-rate", type=float, default=0.2, help="Share of sites without an insurance page (it 404s)")
+    parser.add_argument("--js-rate", type=float, default=0.1, help="Share of sites that only render with JavaScript")
+    parser.add_argument("--page-kb", type=float, default=40, help="Mean page size in KB")
+    parser.add_argument("--provider", choices=["openai", "anthropic"], default="openai", help="API the fake LLM is called through")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="Mean fake LLM response time")
+    parser.add_argument("--llm-429-rate", type=float, default=0.0, help="Share of LLM requests answered with 429")
+    parser.add_argument("--llm-rpm", type=int, default=0, help="Answer 429 past this many requests per minute (0 = no cap)")
+    parser.add_argument("--llm-batch", action="store_true", help="Run crawl.py with --llm-batch against the fake batch API")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the generated sites and fake LLM behavior")
+    parser.add_argument("--keep-dir", type=str, default=None, help="Work in this directory instead of a temporary one")
+    parser.add_argument("--json", type=str, default=None, help="Append the report as a JSON line to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_bench(args, crawl_args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "a") as f:
+            f.write(json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), **report}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Shrinks crawled page markdown before it is sent to the LLM.
+
+Blind truncation spends the budget on navigation menus, cookie banners and
+footers, and drops insurance lists that sit below the cut. Instead:
+
+1. Boilerplate is removed: lines that appear on more than one page of the
+   same site (menus, footers, banners) and mention no insurance or payment
+   term, and cookie-consent lines.
+2. Each page is cut into markdown blocks (runs of lines between blank
+   lines, so a bulleted list stays whole) and blocks are kept in order of
+   relevance until the page's token budget is spent. A block's relevance
+   is the number of insurance/payment terms and known carrier names in it;
+   the blocks right before and after a relevant one (its heading, the list
+   after "We accept:") are kept with it.
+
+Token counts are estimated, without a tokenizer, as the number of words and
+punctuation marks, which tracks BPE token counts closely for English text.
+"""
+
+import re
+
+from rule_extractor import CARRIERS, PAYMENT_METHODS, AhoCorasick
+
+RELEVANCE_TERMS = [
+    "insurance", "insurances", "insurance plans", "health plans", "accepted plans",
+    "we accept", "accept", "accepted", "accepts", "in-network", "in network",
+    "participating", "payment", "payments", "pay", "billing", "bill", "financial",
+    "coverage", "copay", "co-pay", "deductible", "out-of-pocket", "self-pay",
+    "new patients", "carrier", "carriers", "provider network",
+]
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+BLOCK_SPLIT_RE = re.compile(r"\n\s*\n")
+BLANK_RUN_RE = re.compile(r"\n\s*\n(?:\s*\n)+")
+COOKIE_RE = re.compile(r"\bcookies?\b", re.IGNORECASE)
+GAP = "[...]"
+
+
+def count_tokens(text: str) -> int:
+    """Approximate LLM token count of ``text``."""
+    return len(TOKEN_RE.findall(text))
+
+
+def _truncate_to_tokens(block: str, budget: int) -> str:
+    """Leading lines of ``block`` that fit in ``budget`` tokens."""
+    kept = []
+    used = 0
+    for line in block.splitlines():
+        tokens = count_tokens(line)
+        if used + tokens > budget:
+            break
+        kept.append(line)
+        used += tokens
+    return "\n".join(kept)
+
+
+class ContentReducer:
+    """Boilerplate stripping and relevance windowing, with token accounting."""
+
+    def __init__(self):
+        terms = {term: term for term in RELEVANCE_TERMS}
+        for gazetteer in (CARRIERS, PAYMENT_METHODS):
+            terms.update({alias: alias for aliases in gazetteer.values() for alias in aliases})
+        self.matcher = AhoCorasick(terms)
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.boilerplate_lines = 0
+
+    def reduce(self, sections: list[tuple[str, str, int]], site_pages: list[str]) -> str:
+        """Combine (header, markdown, token budget) sections into LLM input.
+
+        ``site_pages`` holds the markdown of every page fetched from the
+        site, including ones not in ``sections``, for boilerplate detection.
+        """
+        boilerplate = self._boilerplate(site_pages)
+        parts = []
+        for header, markdown, budget in sections:
+            self.tokens_before += count_tokens(header) + count_tokens(markdown)
+            text = self._strip(markdown, boilerplate)
+            parts.append(f"{header}\n{self.window(text, budget)}")
+        combined = "\n\n".join(parts)
+        self.tokens_after += count_tokens(combined)
+        return combined
+
+    def relevance(self, text: str) -> int:
+        return len(self.matcher.find(text.lower()))
+
+    def window(self, text: str, budget: int) -> str:
+        """The most relevant blocks of ``text`` that fit in ``budget`` tokens."""
+        if count_tokens(text) <= budget:
+            return text
+        blocks = [b.strip("\n") for b in BLOCK_SPLIT_RE.split(text) if b.strip()]
+        scores = [self.relevance(b) for b in blocks]
+        if not any(scores):
+            return _truncate_to_tokens(text, budget)
+
+        # A relevant block lends its score to its neighbours, just below its own
+        priority = [0.0] * len(blocks)
+        for i, score in enumerate(scores):
+            if score:
+                priority[i] = max(priority[i], score)
+                for j in (i - 1, i + 1):
+                    if 0 <= j < len(blocks):
+                        priority[j] = max(priority[j], score - 0.5)
+
+        chosen: dict[int, str] = {}
+        remaining = budget
+        for i in sorted(range(len(blocks)), key=lambda i: (-priority[i], i)):
+            if priority[i] <= 0 or remaining <= 0:
+                break
+            tokens = count_tokens(blocks[i])
+            if tokens <= remaining:
+                chosen[i] = blocks[i]
+                remaining -= tokens
+            elif scores[i]:
+                # A long relevant list: keep as much of it as fits
+                chosen[i] = _truncate_to_tokens(blocks[i], remaining)
+                remaining = 0
+
+        out = []
+        previous = None
+        for i in sorted(chosen):
+            if previous is not None and i != previous + 1:
+                out.append(GAP)
+            out.append(chosen[i])
+            previous = i
+        return "\n\n".join(out)
+
+    def _boilerplate(self, site_pages: list[str]) -> set[str]:
+        """Lines shared by two or more distinct pages of the site."""
+        seen: dict[str, int] = {}
+        for markdown in set(site_pages):
+            for line in {line.strip() for line in markdown.splitlines()}:
+                if line:
+                    seen[line] = seen.get(line, 0) + 1
+        return {line for line, count in seen.items() if count > 1 and not self.relevance(line)}
+
+    def _strip(self, markdown: str, boilerplate: set[str]) -> str:
+        kept = []
+        for line in markdown.splitlines():
+            stripped = line.strip()
+            if stripped in boilerplate or COOKIE_RE.search(stripped):
+                self.boilerplate_lines += 1
+                continue
+            kept.append(line)
+        return BLANK_RUN_RE.sub("\n\n", "\n".join(kept)).strip("\n")
@@ -4,31 +4,68 @@ Crawl clinic websites and extract insurance/payment data using crawl4ai + LLM AP
 Supports both Anthropic (Claude) and OpenAI (GPT) models.
 
 Setup:
-  pip install crawl4ai anthropic openai
+  pip install -r scripts/crawl-insurance/requirements.txt
 
 Usage:
   python scripts/crawl-insurance/crawl.py [--input FILE] [--provider openai] [--model gpt-4o-mini]
+  python scripts/crawl-insurance/crawl.py --workers 4   # one browser + event loop per process
+  python scripts/crawl-insurance/crawl.py --replay      # re-extract from archived pages, offline
+  python scripts/crawl-insurance/crawl.py --llm-batch --provider openai   # extract via the batch API
+  python scripts/crawl-insurance/crawl.py --refresh     # re-crawl everything, re-extract what changed
 
 Reads:  scripts/crawl-insurance/clinic-urls.json
-Writes: scripts/crawl-insurance/extraction-results.json (with resume support)
+Writes: scripts/crawl-insurance/extraction-results.jsonl (append-only journal, used for resume)
+        scripts/crawl-insurance/extraction-results.json (compacted at the end of a run, or with --compact)
+        scripts/crawl-insurance/crawl-archive/ (every fetched page; --replay reads it and writes
+        extraction-results-replay.json instead)
+        scripts/crawl-insurance/dead-hosts.json (hosts the reachability pre-pass found dead)
+        scripts/crawl-insurance/crawl-metrics.jsonl (per-clinic timings, tokens and cost)
+        scripts/crawl-insurance/host-stats.json (per-host crawl history the clinic order is based on)
 """
 
 import asyncio
+import hashlib
 import json
 import os
 import sys
 import time
 import argparse
+import multiprocessing
+import re
+import statistics
+import zlib
+from collections import Counter, deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
 from pathlib import Path
+from urllib.parse import unquote, urljoin, urlparse
 from dotenv import load_dotenv
 
 # Load .env.local from project root
 load_dotenv(Path(__file__).parent.parent.parent / ".env.local")
-from typing import Any
+from typing import Any, AsyncIterator, Awaitable, Callable
 
+import html2text
+import httpx
+import psutil
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
 
-# Insurance page URL patterns to try after homepage (keep short — each adds latency)
+from content_windows import ContentReducer, count_tokens
+import llm_batch
+from crawl_archive import CrawlArchive
+import crawl_metrics
+from crawl_metrics import MetricsRecorder
+from extraction_schema import EXTRACTION_SCHEMA, RepairedJSON, packed_schema, repair_json, validate_extraction
+from host_probe import DEAD, OUTCOMES, DeadHostCache, probe_hosts, url_host
+from host_stats import HostStats, merge_worker_stats, worker_stats_path
+from llm_cache import LLMCache
+from pdf_documents import DOCUMENT_MAX_BYTES, DOCUMENT_WORKERS, DocumentExtractor, is_pdf_url
+from rate_limit import ProviderRateLimiter, call_with_retries
+from rule_extractor import RuleExtractor
+
+# Fallback insurance page paths, probed only when link discovery finds nothing
 INSURANCE_PAGE_PATHS = [
     "/insurance",
     "/billing",
@@ -36,6 +73,75 @@ INSURANCE_PAGE_PATHS = [
     "/payment",
 ]
 
+# Terms that mark a probed page as the clinic's insurance/payment page
+INSURANCE_KEYWORDS = [
+    "insurance", "medicare", "medicaid", "blue cross", "aetna", "cigna",
+    "united", "humana", "payment", "billing", "accepted", "we accept",
+]
+
+# Browser profile: resource types and third-party hosts that never carry
+# insurance text (trackers, chat widgets, video embeds, ad networks)
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "facebook.net", "facebook.com", "hotjar.com",
+    "clarity.ms", "intercom.io", "intercomcdn.com", "drift.com", "tawk.to",
+    "livechatinc.com", "zendesk.com", "zopim.com", "hs-scripts.com",
+    "hubspot.com", "youtube.com", "ytimg.com", "vimeo.com", "vimeocdn.com",
+    "fonts.googleapis.com", "fonts.gstatic.com", "typekit.net",
+    "userway.org", "accessibe.com", "birdeye.com", "podium.com",
+]
+# Check browser memory after this many page loads
+BROWSER_MEMORY_CHECK_EVERY = 25
+# System memory use (%) at which the crawl concurrency is cut back
+MEMORY_PRESSURE_PERCENT = 90
+
+# Link discovery: terms scored in a candidate's URL path and anchor text
+INSURANCE_LINK_TERMS = {
+    "insurance": 10,
+    "billing": 6,
+    "payment": 6,
+    "we accept": 6,
+    "financial": 5,
+    "medicare": 5,
+    "accepted": 4,
+    "coverage": 4,
+    "self pay": 4,
+    "fees": 3,
+    "pricing": 3,
+    "patient information": 2,
+    "patient resources": 2,
+    "new patient": 2,
+}
+# Paths that are usually articles *about* insurance rather than the clinic's list
+ARTICLE_PATH_TERMS = ["blog", "news", "article", "post", "faq"]
+# How many top-ranked discovered URLs to fetch per clinic
+DISCOVERY_MAX_CANDIDATES = 3
+# How many top-ranked linked PDFs to download per clinic
+DOCUMENT_MAX_CANDIDATES = 2
+
+SITEMAP_LOC_RE = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.IGNORECASE)
+SITEMAP_MAX_CHARS = 2_000_000
+
+# HTTP tier: cap on downloaded HTML, and markup that signals a client-rendered
+# shell whose content only appears after JavaScript runs
+HTTP_MAX_BYTES = 3_000_000
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,*/*;q=0.8",
+}
+JS_SHELL_MARKERS = [
+    '<div id="root"></div>',
+    '<div id="app"></div>',
+    'id="__next"',
+    "ng-app",
+    "enable javascript",
+    "requires javascript",
+]
+
 EXTRACTION_PROMPT = """You are extracting insurance and payment information from a pain management clinic's website.
 
 Analyze the following webpage content and extract:
@@ -72,6 +178,53 @@ If NO insurance or payment information is found at all, return:
 WEBPAGE CONTENT:
 """
 
+OPENAI_SYSTEM_PROMPT = "You extract structured data from webpage content. Return ONLY valid JSON, no markdown or explanation."
+
+PACKED_EXTRACTION_PROMPT = EXTRACTION_PROMPT.removesuffix("WEBPAGE CONTENT:\n") + """The content below holds the websites of several clinics. Each clinic's content starts with a line "##### CLINIC <key> #####". Extract each clinic separately, using only its own content.
+
+Return ONLY one JSON object whose keys are the clinic keys and whose values are the objects described above, for example {"c1": {...}, "c2": {...}}. Include every clinic key.
+
+CLINICS:
+"""
+
+# --structured-output: the reply can only be the schema's JSON, so it needs
+# far fewer tokens than free text that may wrap it in fences and prose
+MAX_TOKENS = 1024
+STRUCTURED_MAX_TOKENS = 512
+EXTRACTION_TOOL = "record_extraction"
+
+# --pack-clinics: contents up to PACK_MAX_ITEM_TOKENS share a request, up to
+# PACK_MAX_TOKENS of content per request; the reply budget grows by
+# PACKED_TOKENS_PER_CLINIC for each clinic in it
+PACK_MAX_ITEM_TOKENS = 1000
+PACK_MAX_TOKENS = 5000
+PACKED_TOKENS_PER_CLINIC = 350
+
+# Cool-down before clinics deferred on provider overload get their last try
+DEFERRED_RETRY_DELAY = 30
+
+# Wall-time budget of one clinic's crawl; clinics running past it are
+# cancelled and crawled again after everything else, with the tail budget
+CRAWL_BUDGET = 90
+TAIL_BUDGET = 45
+
+# Reachability pre-pass: failed hosts are remembered this long
+DEAD_HOST_TTL_HOURS = 7 * 24
+
+
+# Token budgets for each page section of the LLM input (see content_windows)
+MAIN_PAGE_TOKENS = 700
+PAGE_TOKENS = 1200
+
+# Changes whenever the prompts change; cached extractions from an older
+# prompt version are discarded by the LLM cache
+PROMPT_VERSION = hashlib.sha256(
+    (
+        EXTRACTION_PROMPT + PACKED_EXTRACTION_PROMPT + OPENAI_SYSTEM_PROMPT
+        + json.dumps(EXTRACTION_SCHEMA, sort_keys=True)
+    ).encode()
+).hexdigest()[:16]
+
 ANTHROPIC_MODEL_MAP = {
     "haiku": "claude-haiku-4-5-20251001",
     "sonnet": "claude-sonnet-4-5-20250929",
@@ -79,7 +232,7 @@ ANTHROPIC_MODEL_MAP = {
 
 
 def load_existing_results(results_path: Path) -> dict[str, Any]:
-    """Load existing results for resume support."""
+    """Load a compacted results snapshot (extraction-results.json)."""
     if results_path.exists():
         with open(results_path) as f:
             data = json.load(f)
@@ -87,19 +240,197 @@ def load_existing_results(results_path: Path) -> dict[str, Any]:
     return {}
 
 
-def save_results(results_path: Path, results: dict[str, Any]) -> None:
-    """Save results to JSON file."""
-    with open(results_path, "w") as f:
-        json.dump(list(results.values()), f, indent=2)
+def save_results(results_path: Path, results: list[dict[str, Any]]) -> None:
+    """Atomically write the results snapshot consumed by import-results.ts."""
+    tmp_path = results_path.with_name(results_path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp_path, results_path)
+
+
+def _has_data(record: dict[str, Any], field: str) -> bool:
+    extraction = record.get("extraction")
+    return bool(extraction and extraction.get(field))
+
+
+class ResultJournal:
+    """Append-only NDJSON store of result records, one line per clinic.
+
+    Every append is flushed and fsync'd, so a crash loses at most the clinic
+    being written. A side index (``<journal>.idx``) maps clinicId to the byte
+    offset of its latest record plus insurance/payment flags, which is all
+    resume and progress stats need — the journal itself is only read back
+    for lookups and compaction. A later record for the same clinic
+    supersedes the earlier one until the journal is compacted.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.index_path = path.with_name(path.name + ".idx")
+        # clinicId -> (byte offset, has insurance, has payment)
+        self._index: dict[str, tuple[int, bool, bool]] = {}
+        self._journal: Any = None
+        self._index_file: Any = None
+
+    def open(self) -> "ResultJournal":
+        self._load_index()
+        self._journal = open(self.path, "ab")
+        self._index_file = open(self.index_path, "a")
+        return self
+
+    def close(self) -> None:
+        for f in (self._journal, self._index_file):
+            if f:
+                f.close()
+        self._journal = self._index_file = None
+
+    def __contains__(self, clinic_id: str) -> bool:
+        return clinic_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def stats(self) -> tuple[int, int]:
+        """Return (clinics with insurance data, clinics with payment data)."""
+        with_insurance = sum(1 for _, ins, _ in self._index.values() if ins)
+        with_payment = sum(1 for _, _, pay in self._index.values() if pay)
+        return with_insurance, with_payment
+
+    def get(self, clinic_id: str) -> dict[str, Any] | None:
+        """Read the latest record for one clinic."""
+        entry = self._index.get(clinic_id)
+        if entry is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(entry[0])
+            return json.loads(f.readline())
+
+    def records(self) -> list[dict[str, Any]]:
+        """Read the latest record for every clinic, in journal order."""
+        offsets = sorted(offset for offset, _, _ in self._index.values())
+        records = []
+        with open(self.path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                records.append(json.loads(f.readline()))
+        return records
+
+    def append(self, record: dict[str, Any], sync: bool = True) -> None:
+        """Append one record; with ``sync`` it is on disk when this returns."""
+        line = (json.dumps(record) + "\n").encode()
+        offset = self._journal.tell()
+        self._journal.write(line)
+        self._journal.flush()
+        if sync:
+            os.fsync(self._journal.fileno())
+        self._add_to_index(record, offset)
+
+    def import_snapshot(self, results_path: Path) -> int:
+        """Seed an empty journal from a legacy extraction-results.json."""
+        existing = load_existing_results(results_path)
+        for record in existing.values():
+            self.append(record, sync=False)
+        os.fsync(self._journal.fileno())
+        return len(existing)
+
+    def compact(self, results_path: Path) -> int:
+        """Drop superseded records and export the snapshot JSON.
+
+        Rewrites the journal and index with one line per clinic, then writes
+        ``results_path`` for import-results.ts. Returns the record count.
+        """
+        records = self.records()
+        self.close()
+
+        tmp_journal = self.path.with_name(self.path.name + ".tmp")
+        tmp_index = self.index_path.with_name(self.index_path.name + ".tmp")
+        self._index = {}
+        with open(tmp_journal, "wb") as jf, open(tmp_index, "w") as xf:
+            self._index_file = xf
+            for record in records:
+                offset = jf.tell()
+                jf.write((json.dumps(record) + "\n").encode())
+                self._add_to_index(record, offset)
+            jf.flush()
+            os.fsync(jf.fileno())
+        self._index_file = None
+        os.replace(tmp_journal, self.path)
+        os.replace(tmp_index, self.index_path)
+
+        save_results(results_path, records)
+        self.open()
+        return len(records)
+
+    def _add_to_index(self, record: dict[str, Any], offset: int) -> None:
+        has_ins = _has_data(record, "insuranceProviders")
+        has_pay = _has_data(record, "paymentMethods")
+        self._index[record["clinicId"]] = (offset, has_ins, has_pay)
+        self._index_file.write(f"{record['clinicId']}\t{offset}\t{int(has_ins)}\t{int(has_pay)}\n")
+        self._index_file.flush()
+
+    def _load_index(self) -> None:
+        self._index = {}
+        if not self.path.exists():
+            # Stale index without a journal is meaningless
+            self.index_path.unlink(missing_ok=True)
+            return
+
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 4:
+                        continue  # torn write at the tail
+                    clinic_id, offset, has_ins, has_pay = parts
+                    self._index[clinic_id] = (int(offset), has_ins == "1", has_pay == "1")
+
+        # Recover journal lines written after the last indexed one (crash
+        # between the journal and index writes), and drop a torn final line.
+        with open(self.path, "rb") as f:
+            if self._index:
+                f.seek(max(offset for offset, _, _ in self._index.values()))
+                f.readline()
+            recovered: list[tuple[dict[str, Any], int]] = []
+            truncate_at = None
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    truncate_at = offset
+                    break
+                try:
+                    recovered.append((json.loads(line), offset))
+                except json.JSONDecodeError:
+                    continue
+
+        if truncate_at is not None:
+            print(f"Dropping torn record at end of {self.path.name}")
+            with open(self.path, "r+b") as f:
+                f.truncate(truncate_at)
+        if recovered:
+            with open(self.index_path, "a") as xf:
+                self._index_file = xf
+                for record, offset in recovered:
+                    self._add_to_index(record, offset)
+            self._index_file = None
 
 
 def get_site_root(url: str) -> str:
     """Extract the site root (scheme + domain) from a URL."""
-    from urllib.parse import urlparse
     parsed = urlparse(url)
     return f"{parsed.scheme}://{parsed.netloc}"
 
 
+def get_host(url: str) -> str:
+    """Lower-cased host of a URL, with a leading "www." dropped."""
+    if not url.startswith("http"):
+        url = f"https://{url}"
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
 def is_useful_content(content: str) -> bool:
     """Check if crawled content is useful (not a 404, not too short)."""
     if not content or len(content) < 50:
@@ -111,13 +442,906 @@ def is_useful_content(content: str) -> bool:
     return True
 
 
+class _LinkParser(HTMLParser):
+    """Collect (href, anchor text) pairs from an HTML document."""
+
+    def __init__(self):
+        super().__init__()
+        self.links: list[tuple[str, str]] = []
+        self._href: str | None = None
+        self._text: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "a":
+            self._href = dict(attrs).get("href")
+            self._text = []
+
+    def handle_data(self, data: str) -> None:
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "a" and self._href is not None:
+            self.links.append((self._href, " ".join("".join(self._text).split())))
+            self._href = None
+
+
+def extract_links(html: str, base_url: str) -> list[tuple[str, str]]:
+    """Return absolute http(s) links and their anchor text."""
+    parser = _LinkParser()
+    try:
+        parser.feed(html)
+    except Exception:
+        pass  # keep whatever was parsed before malformed markup
+    links = []
+    for href, text in parser.links:
+        absolute = urljoin(base_url, href.strip())
+        if absolute.startswith("http"):
+            links.append((absolute, text))
+    return links
+
+
+def html_to_markdown(html: str) -> str:
+    """Convert raw HTML to markdown text for extraction."""
+    converter = html2text.HTML2Text()
+    converter.ignore_images = True
+    converter.ignore_links = True
+    converter.body_width = 0
+    try:
+        return converter.handle(html)
+    except Exception:
+        return ""
+
+
+def looks_js_rendered(html: str, markdown: str) -> bool:
+    """Guess whether a page only shows its content after running scripts."""
+    text_size = len(markdown.strip())
+    if text_size < 200 and len(html) > 5000:
+        return True
+    lower = html.lower()
+    return text_size < 1500 and any(marker in lower for marker in JS_SHELL_MARKERS)
+
+
+async def _block_heavy_resources(route: Any) -> None:
+    """Playwright route handler: abort requests markdown extraction never needs."""
+    request = route.request
+    host = urlparse(request.url).netloc.lower()
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(
+        host == domain or host.endswith("." + domain) for domain in BLOCKED_DOMAINS
+    ):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _install_resource_blocking(page: Any, context: Any = None, **kwargs: Any) -> Any:
+    """crawl4ai on_page_context_created hook."""
+    await page.route("**/*", _block_heavy_resources)
+    return page
+
+
+def browser_memory_mb() -> float:
+    """Resident memory of this process's children (Playwright driver + Chromium)."""
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """A crawl4ai browser with reusable pages and memory-based recycling.
+
+    Each concurrent fetch borrows one of ``size`` crawl4ai sessions, so
+    pages are reused across clinics instead of opening a fresh page per
+    URL; a session is closed and reopened after ``session_reuse`` loads.
+    Heavy resource types and third-party trackers/widgets are blocked on
+    every page. When the browser's resident memory passes
+    ``memory_limit_mb`` the pool drains in-flight loads and restarts the
+    browser. The browser itself is only launched on first use, since most
+    pages are served by the HTTP tier.
+    """
+
+    def __init__(
+        self,
+        browser_config: BrowserConfig,
+        crawl_config: CrawlerRunConfig,
+        size: int,
+        memory_limit_mb: int,
+        session_reuse: int = 50,
+    ):
+        self.browser_config = browser_config
+        self.crawl_config = crawl_config
+        self.size = size
+        self.memory_limit_mb = memory_limit_mb
+        self.session_reuse = session_reuse
+        self.crawler: AsyncWebCrawler | None = None
+        self.recycles = 0
+        self._start_lock = asyncio.Lock()
+        self._sessions: asyncio.Queue = asyncio.Queue()
+        for i in range(size):
+            self._sessions.put_nowait(f"pool-{i}")
+        self._uses: Counter = Counter()
+        self._loads_since_check = 0
+        self._recycling = False
+
+    async def __aenter__(self) -> "BrowserPool":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self.crawler is not None:
+            await self.crawler.close()
+            self.crawler = None
+
+    async def arun(self, url: str) -> Any:
+        """Load one URL in a pooled page and return the crawl4ai result."""
+        session_id = await self._sessions.get()
+        try:
+            crawler = await self._ensure_started()
+            config = self.crawl_config.clone(session_id=session_id)
+            return await crawler.arun(url=url, config=config)
+        finally:
+            self._uses[session_id] += 1
+            if self._uses[session_id] >= self.session_reuse and self.crawler is not None:
+                self._uses[session_id] = 0
+                try:
+                    await self.crawler.crawler_strategy.kill_session(session_id)
+                except Exception:
+                    pass
+            self._sessions.put_nowait(session_id)
+            self._maybe_recycle()
+
+    async def _ensure_started(self) -> AsyncWebCrawler:
+        async with self._start_lock:
+            if self.crawler is None:
+                crawler = AsyncWebCrawler(config=self.browser_config)
+                await crawler.start()
+                crawler.crawler_strategy.set_hook(
+                    "on_page_context_created", _install_resource_blocking
+                )
+                self.crawler = crawler
+            return self.crawler
+
+    def _maybe_recycle(self) -> None:
+        self._loads_since_check += 1
+        if self._recycling or self._loads_since_check < BROWSER_MEMORY_CHECK_EVERY:
+            return
+        self._loads_since_check = 0
+        memory = browser_memory_mb()
+        if memory > self.memory_limit_mb:
+            print(f"  Browser memory {memory:.0f}MB over {self.memory_limit_mb}MB, recycling")
+            self._recycling = True
+            asyncio.ensure_future(self._recycle())
+
+    async def _recycle(self) -> None:
+        # Holding every session token means no load is in flight
+        held = [await self._sessions.get() for _ in range(self.size)]
+        try:
+            async with self._start_lock:
+                await self.close()
+            self._uses.clear()
+            self.recycles += 1
+        finally:
+            for session_id in held:
+                self._sessions.put_nowait(session_id)
+            self._recycling = False
+
+
+@dataclass
+class Page:
+    """A fetched page: markdown for extraction plus same-site links."""
+
+    url: str
+    markdown: str
+    # [{"href": ..., "text": ...}] for links on the same host
+    links: list[dict[str, str]] = field(default_factory=list)
+    html: str = ""
+    status: int | None = None
+    # Validators for conditional requests (--refresh)
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class CrawlTimeouts:
+    """Fetch timeouts of one clinic's crawl, found through ``crawl_timeouts``.
+
+    Set per crawl by limited_crawl, so a timeout on one host never counts
+    against another clinic crawled at the same time. A page shared between
+    clinics counts for the clinic whose fetch started it.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+
+crawl_timeouts: ContextVar[CrawlTimeouts | None] = ContextVar("crawl_timeouts", default=None)
+
+
+class PageFetcher:
+    """Fetch clinic pages, sharing them across clinics on the same host.
+
+    With ``http_first`` each page is first fetched as raw HTML over the
+    pooled ``http`` client and converted to markdown locally; crawl4ai's
+    headless browser is used only when that response looks script-rendered,
+    is blocked, or fails is_useful_content.
+
+    Many clinics in clinic-urls.json sit on the same site (hospital systems,
+    multi-location groups), and each of them probes the same site root and
+    insurance paths. For hosts that appear more than once in the run, each
+    URL is fetched once and every clinic on that host awaits the same task.
+    Cached pages for a host are dropped once its last clinic has finished.
+
+    At most ``max_per_host`` fetches run against any one host at a time.
+
+    Every fetch is recorded in ``archive`` when one is given. With
+    ``replay`` pages come only from the archive: no network, no browser.
+    With ``refresh`` a page archived with an ETag or Last-Modified is
+    fetched conditionally, and a 304 reuses the archived page.
+
+    Linked PDFs are fetched over HTTP only and read by ``documents`` into
+    a page holding their text.
+    """
+
+    def __init__(
+        self,
+        browser: BrowserPool,
+        clinics: list[dict],
+        max_per_host: int = 3,
+        http: httpx.AsyncClient | None = None,
+        http_first: bool = True,
+        archive: CrawlArchive | None = None,
+        replay: bool = False,
+        refresh: bool = False,
+        documents: DocumentExtractor | None = None,
+    ):
+        self.browser = browser
+        self.max_per_host = max_per_host
+        self.http = http
+        self.http_first = http_first
+        self.archive = archive
+        self.replay = replay
+        self.refresh = refresh
+        self.documents = documents
+        self.not_modified = 0
+        self.http_pages = 0
+        self.browser_pages = 0
+        self.document_pages = 0
+        self.replayed_pages = 0
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self._clinics_left = Counter(get_host(c["website"]) for c in clinics)
+        self._shared_hosts = {host for host, n in self._clinics_left.items() if n > 1}
+        self._pages: dict[str, asyncio.Task] = {}
+        self.hits = 0
+
+    async def fetch(self, url: str) -> Page | None:
+        """Return the rendered page, or None if the crawl failed."""
+        return await self._shared(url, self._fetch)
+
+    async def fetch_document(self, url: str) -> Page | None:
+        """Return a linked PDF as a page of its text, or None."""
+        if not self.replay and (self.http is None or self.documents is None):
+            return None
+        return await self._shared(url, self._fetch_document)
+
+    async def fetch_sitemap(self, site_root: str) -> list[str]:
+        """Return the page URLs listed in the site's sitemap.xml."""
+        if self.http is None and not self.replay:
+            return []
+        return await self._shared(f"{site_root}/sitemap.xml", self._fetch_sitemap)
+
+    def retain(self, website: str) -> None:
+        """Undo a release for a clinic that will be crawled again."""
+        self._clinics_left[get_host(website)] += 1
+
+    def release(self, website: str) -> None:
+        """Mark one clinic on this host as done; free its pages after the last."""
+        host = get_host(website)
+        self._clinics_left[host] -= 1
+        if self._clinics_left[host] <= 0:
+            for key in [k for k in self._pages if get_host(k) == host]:
+                del self._pages[key]
+
+    async def _shared(self, url: str, fetch: Callable[[str], Awaitable[Any]]) -> Any:
+        if get_host(url) not in self._shared_hosts:
+            return await fetch(url)
+
+        key = url.rstrip("/").lower()
+        task = self._pages.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch(url))
+            self._pages[key] = task
+        else:
+            self.hits += 1
+        # Shielded so one clinic cancelling its probe doesn't cancel the
+        # shared fetch that other clinics are waiting on
+        return await asyncio.shield(task)
+
+    def _timed_out(self) -> None:
+        timeouts = crawl_timeouts.get()
+        if timeouts is not None:
+            timeouts.count += 1
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        # Per-host politeness cap: a clinic probes several paths at once
+        host = get_host(url)
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return slots
+
+    async def _fetch(self, url: str) -> Page | None:
+        if self.replay:
+            return self._replay(url)
+        status = None
+        if self.http is not None and self.http_first:
+            started = time.monotonic()
+            page, needs_browser, status, size = await self._fetch_http(url)
+            crawl_metrics.record_fetch(
+                url, "http", time.monotonic() - started, size, len(page.markdown) if page else 0, status,
+            )
+            if status == 304 and page is not None:
+                self.not_modified += 1
+                entry = self.archive.entry(url)
+                self._record(url, page, entry["status"], entry["tier"])
+                return page
+            if not needs_browser:
+                self.http_pages += 1
+                self._record(url, page, status, "http")
+                return page
+        self.browser_pages += 1
+        started = time.monotonic()
+        page = None
+        try:
+            page = await self._fetch_browser(url)
+        finally:
+            crawl_metrics.record_fetch(
+                url, "browser", time.monotonic() - started,
+                len(page.html.encode()) if page else 0, len(page.markdown) if page else 0,
+                page.status if page else None,
+            )
+        self._record(url, page, page.status if page else status, "browser")
+        return page
+
+    def _record(self, url: str, page: Page | None, status: int | None, tier: str) -> None:
+        if self.archive is None:
+            return
+        if page is None:
+            self.archive.record(url, status, tier)
+        else:
+            self.archive.record(
+                url, status, tier, page.html, page.markdown, page.links, page.etag, page.last_modified,
+            )
+
+    def _replay(self, url: str) -> Page | None:
+        page = self._archived_page(url)
+        if page is not None:
+            self.replayed_pages += 1
+        return page
+
+    def _archived_page(self, url: str) -> Page | None:
+        data = self.archive.load(url)
+        if data is None:
+            return None
+        entry = self.archive.entry(url)
+        return Page(
+            url=url,
+            markdown=data["markdown"],
+            links=data["links"],
+            html=data["html"],
+            status=entry["status"],
+            etag=entry.get("etag"),
+            last_modified=entry.get("lastModified"),
+        )
+
+    def _conditional_headers(self, url: str) -> dict[str, str]:
+        """If-None-Match / If-Modified-Since for an archived page, in --refresh."""
+        entry = self.archive.entry(url) if self.refresh and self.archive is not None else None
+        if entry is None or entry["blob"] is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("lastModified"):
+            headers["If-Modified-Since"] = entry["lastModified"]
+        return headers
+
+    async def _fetch_http(self, url: str) -> tuple[Page | None, bool, int | None, int]:
+        """Fetch raw HTML without a browser.
+
+        Returns (page, needs_browser, status, bytes read). A definite "not
+        there" (404/410) is final; blocked, non-HTML, script-rendered or
+        unhelpful responses ask for the crawl4ai fallback. A 304 to a
+        conditional request returns the archived page.
+        """
+        status = None
+        body = bytearray()
+        conditional = self._conditional_headers(url)
+        async with self._host_slot(url):
+            try:
+                async with self.http.stream("GET", url, headers=conditional) as response:
+                    status = response.status_code
+                    if status == 304 and conditional:
+                        page = self._archived_page(url)
+                        return page, page is None, status, 0
+                    if status in (404, 410):
+                        return None, False, status, 0
+                    content_type = response.headers.get("content-type", "")
+                    if status != 200 or "html" not in content_type:
+                        return None, True, status, 0
+                    async for chunk in response.aiter_bytes():
+                        body.extend(chunk)
+                        if len(body) > HTTP_MAX_BYTES:
+                            break
+                    encoding = response.encoding or "utf-8"
+                    final_url = str(response.url)
+                    etag = response.headers.get("etag")
+                    last_modified = response.headers.get("last-modified")
+            except httpx.TimeoutException:
+                self._timed_out()
+                return None, True, status, len(body)
+            except httpx.HTTPError:
+                return None, True, status, len(body)
+
+        html = bytes(body).decode(encoding, errors="replace")
+        markdown = html_to_markdown(html)
+        if looks_js_rendered(html, markdown) or not is_useful_content(markdown):
+            return None, True, status, len(body)
+        host = get_host(url)
+        links = [
+            {"href": href, "text": text}
+            for href, text in extract_links(html, final_url)
+            if get_host(href) == host
+        ]
+        page = Page(
+            url=url,
+            markdown=markdown,
+            links=links,
+            html=html,
+            status=status,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        return page, False, status, len(body)
+
+    async def _fetch_document(self, url: str) -> Page | None:
+        """Download a PDF within DOCUMENT_MAX_BYTES and extract its text.
+
+        Non-PDF responses and documents over the cap (by Content-Length, or
+        once the download passes it) are skipped.
+        """
+        if self.replay:
+            return self._replay(url)
+        status = None
+        body = bytearray()
+        conditional = self._conditional_headers(url)
+        started = time.monotonic()
+        async with self._host_slot(url):
+            try:
+                async with self.http.stream("GET", url, headers=conditional) as response:
+                    status = response.status_code
+                    if status == 304 and conditional:
+                        self.not_modified += 1
+                        page = self._archived_page(url)
+                        self._record(url, page, page.status if page else status, "pdf")
+                        return page
+                    length = response.headers.get("content-length", "")
+                    if (
+                        status != 200
+                        or "html" in response.headers.get("content-type", "")
+                        or (length.isdigit() and int(length) > DOCUMENT_MAX_BYTES)
+                    ):
+                        self._record(url, None, status, "pdf")
+                        return None
+                    async for chunk in response.aiter_bytes():
+                        body.extend(chunk)
+                        if len(body) > DOCUMENT_MAX_BYTES:
+                            self._record(url, None, status, "pdf")
+                            return None
+                    etag = response.headers.get("etag")
+                    last_modified = response.headers.get("last-modified")
+            except httpx.TimeoutException:
+                self._timed_out()
+                return None
+            except httpx.HTTPError:
+                return None
+
+        text = await self.documents.text(bytes(body)) if body.startswith(b"%PDF") else ""
+        crawl_metrics.record_fetch(url, "pdf", time.monotonic() - started, len(body), len(text), status)
+        page = None
+        if text:
+            self.document_pages += 1
+            page = Page(url=url, markdown=text, status=status, etag=etag, last_modified=last_modified)
+        self._record(url, page, status, "pdf")
+        return page
+
+    async def _fetch_browser(self, url: str) -> Page | None:
+        async with self._host_slot(url):
+            try:
+                result = await self.browser.arun(url)
+            except Exception as e:
+                if "timeout" in str(e).lower():
+                    self._timed_out()
+                raise
+        if not result.success and "timeout" in (result.error_message or "").lower():
+            self._timed_out()
+        if not (result.success and result.markdown):
+            return None
+        host = get_host(url)
+        links = [
+            {"href": link["href"], "text": link.get("text") or ""}
+            for link in (result.links or {}).get("internal", [])
+            if link.get("href") and get_host(link["href"]) == host
+        ]
+        headers = {k.lower(): v for k, v in (result.response_headers or {}).items()}
+        return Page(
+            url=url,
+            markdown=result.markdown.raw_markdown,
+            links=links,
+            html=result.html or "",
+            status=result.status_code,
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+        )
+
+    async def _get_text(self, url: str) -> str | None:
+        if self.replay:
+            data = self.archive.load(url)
+            return data["html"] if data else None
+        async with self._host_slot(url):
+            try:
+                response = await self.http.get(url)
+            except httpx.HTTPError:
+                return None
+        if response.status_code != 200:
+            if self.archive is not None:
+                self.archive.record(url, response.status_code, "http")
+            return None
+        text = response.text[:SITEMAP_MAX_CHARS]
+        if self.archive is not None:
+            self.archive.record(url, response.status_code, "http", html=text)
+        return text
+
+    async def _fetch_sitemap(self, url: str) -> list[str]:
+        text = await self._get_text(url)
+        if not text:
+            return []
+        locs = SITEMAP_LOC_RE.findall(text)
+        if "<sitemapindex" not in text:
+            return locs
+        # Sitemap index: follow the child sitemaps most likely to list pages
+        children = sorted(locs, key=lambda u: ("page" not in u.lower(), "post" in u.lower()))
+        urls: list[str] = []
+        for child in children[:2]:
+            child_text = await self._get_text(child)
+            if child_text:
+                urls.extend(SITEMAP_LOC_RE.findall(child_text))
+        return urls
+
+
+def score_insurance_link(url: str, text: str) -> int:
+    """Score how likely a link leads to the clinic's insurance/payment page."""
+    path = unquote(urlparse(url).path).lower()
+    if is_pdf_url(path):
+        return 0
+    return _score_link_terms(path, text)
+
+
+def score_insurance_document(url: str, text: str) -> int:
+    """Score how likely a link is a PDF of the clinic's accepted plans; 0 for pages."""
+    path = unquote(urlparse(url).path).lower()
+    if not is_pdf_url(path):
+        return 0
+    return _score_link_terms(path.removesuffix(".pdf"), text)
+
+
+def _score_link_terms(path: str, text: str) -> int:
+    path = re.sub(r"[-_/.]+", " ", path)
+    text = text.lower()
+    score = 0
+    for term, weight in INSURANCE_LINK_TERMS.items():
+        if term in path:
+            score += weight
+        if term in text:
+            score += weight
+    if score and any(term in path for term in ARTICLE_PATH_TERMS):
+        score -= 8
+    return score
+
+
+def rank_insurance_candidates(
+    site_root: str,
+    links: list[dict[str, str]],
+    sitemap_urls: list[str],
+    exclude: set[str],
+    limit: int = DISCOVERY_MAX_CANDIDATES,
+    score_link: Callable[[str, str], int] = score_insurance_link,
+) -> list[str]:
+    """Pick the top-scoring same-site URLs from page links and the sitemap."""
+    host = get_host(site_root)
+    scores: dict[str, int] = {}
+    for href, text in [(l["href"], l["text"]) for l in links] + [(u, "") for u in sitemap_urls]:
+        url = href.split("#")[0].rstrip("/")
+        if not url.startswith("http") or get_host(url) != host:
+            continue
+        key = url.lower()
+        if key in exclude:
+            continue
+        score = score_link(url, text)
+        if score > 0 and score > scores.get(url, 0):
+            scores[url] = score
+    ranked = sorted(scores, key=lambda u: (-scores[u], len(u)))
+    return ranked[:limit]
+
+
+class ExtractionCache:
+    """Share one LLM extraction between clinics with identical content.
+
+    Keyed by a hash of the combined markdown, so clinics on the same site
+    whose crawls produced the same text cost a single LLM call. Failed or
+    raising extractions are not kept, letting the next clinic retry.
+
+    With a persistent ``store`` (llm_cache.LLMCache), extractions from
+    earlier runs are reused too and new ones are saved for later runs.
+    """
+
+    def __init__(self, store: LLMCache | None = None, model: str = ""):
+        self.store = store
+        self.model = model
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.hits = 0
+
+    def cached(self, content: str) -> dict[str, Any] | None:
+        """Return a stored extraction for this content without calling the LLM."""
+        if self.store is None:
+            return None
+        return self.store.get(self.model, content)
+
+    async def get_or_extract(
+        self,
+        content: str,
+        extract: Callable[[], Awaitable[dict[str, Any] | None]],
+        check_store: bool = True,
+    ) -> dict[str, Any] | None:
+        """Share one ``extract()`` between concurrent callers with this content.
+
+        Pass ``check_store=False`` when the caller has just looked the
+        content up with ``cached``, so the miss isn't counted twice.
+        """
+        key = hashlib.sha256(content.encode()).hexdigest()
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._extract_and_store(content, extract, check_store))
+            self._tasks[key] = task
+        else:
+            self.hits += 1
+        extraction = None
+        try:
+            extraction = await asyncio.shield(task)
+        finally:
+            # A cancelled waiter leaves a running extraction to the others
+            if extraction is None and task.done() and self._tasks.get(key) is task:
+                del self._tasks[key]
+        return extraction
+
+    async def _extract_and_store(
+        self,
+        content: str,
+        extract: Callable[[], Awaitable[dict[str, Any] | None]],
+        check_store: bool,
+    ) -> dict[str, Any] | None:
+        if check_store:
+            extraction = self.cached(content)
+            if extraction is not None:
+                return extraction
+        extraction = await extract()
+        if extraction is not None and self.store is not None:
+            self.store.put(self.model, content, extraction)
+        return extraction
+
+
+class LimiterSlot:
+    """Handle for one call holding an AdaptiveLimiter slot."""
+
+    def __init__(self):
+        self.overload = False
+        self.failure = False
+
+    def overloaded(self) -> None:
+        """Report a timeout, rate limit or provider 5xx for this call."""
+        self.overload = True
+
+    def failed(self) -> None:
+        """Report an ordinary failure (counts against the error rate)."""
+        self.failure = True
+
+
+class AdaptiveLimiter:
+    """Concurrency limit tuned by AIMD (additive increase, multiplicative decrease).
+
+    After every ``window`` completed calls, if the error rate stayed low and
+    the median latency stayed within ``latency_tolerance`` times the best
+    window seen so far, the limit grows by one. An overload signal — a
+    timeout, a 429/5xx from the LLM provider, or system memory pressure when
+    ``watch_memory`` is set — halves the limit straight away, at most once
+    per round of in-flight calls so a single burst doesn't collapse it to
+    the floor.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        maximum: int,
+        minimum: int = 1,
+        window: int = 20,
+        latency_tolerance: float = 2.0,
+        watch_memory: bool = False,
+    ):
+        self.name = name
+        self.maximum = max(maximum, 1)
+        self.minimum = min(max(minimum, 1), self.maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.peak = self.limit
+        self.window = window
+        self.latency_tolerance = latency_tolerance
+        self.watch_memory = watch_memory
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._latencies: list[float] = []
+        self._failures = 0
+        self._since_cut = 0
+        self._best_latency: float | None = None
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[LimiterSlot]:
+        await self._acquire()
+        slot = LimiterSlot()
+        start = time.monotonic()
+        try:
+            yield slot
+        except Exception:
+            slot.failed()
+            raise
+        finally:
+            self._in_flight -= 1
+            self._record(time.monotonic() - start, slot)
+            self._wake()
+
+    async def _acquire(self) -> None:
+        while self._in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self._in_flight += 1
+
+    def _wake(self) -> None:
+        free = self.limit - self._in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def _record(self, latency: float, slot: LimiterSlot) -> None:
+        self._since_cut += 1
+        if slot.overload:
+            self._decrease("overload")
+            return
+
+        self._latencies.append(latency)
+        self._failures += slot.failure
+        if len(self._latencies) < self.window:
+            return
+
+        median = statistics.median(self._latencies)
+        error_rate = self._failures / len(self._latencies)
+        self._latencies = []
+        self._failures = 0
+        if self._best_latency is None or median < self._best_latency:
+            self._best_latency = median
+
+        if self.watch_memory and psutil.virtual_memory().percent >= MEMORY_PRESSURE_PERCENT:
+            self._decrease("memory pressure")
+        elif error_rate <= 0.1 and median <= self._best_latency * self.latency_tolerance:
+            if self.limit < self.maximum:
+                self.limit += 1
+                self.peak = max(self.peak, self.limit)
+
+    def _decrease(self, reason: str) -> None:
+        # Only one cut per round of in-flight calls
+        if self._since_cut < self.limit:
+            return
+        new_limit = max(self.minimum, self.limit // 2)
+        if new_limit < self.limit:
+            print(f"  {self.name} concurrency {self.limit} -> {new_limit} ({reason})")
+        self.limit = new_limit
+        self._since_cut = 0
+        self._latencies = []
+        self._failures = 0
+
+
+def has_insurance_keywords(content: str) -> bool:
+    """Check whether a page mentions insurance or payment terms."""
+    lower = content.lower()
+    return any(k in lower for k in INSURANCE_KEYWORDS)
+
+
+async def fetch_useful(pages: PageFetcher, url: str, log_errors: bool = False) -> Page | None:
+    """Fetch a page and return it only if its markdown passes is_useful_content."""
+    try:
+        page = await pages.fetch(url)
+    except Exception as e:
+        if log_errors:
+            print(f"    Error crawling {url}: {e}")
+        return None
+    if page and is_useful_content(page.markdown):
+        return page
+    return None
+
+
+async def find_insurance_page(pages: PageFetcher, urls: list[str]) -> Page | None:
+    """Fetch candidate URLs concurrently and return the best insurance page.
+
+    ``urls`` are in rank order, and the highest-ranked page that mentions
+    insurance keywords wins, not the fastest: probes are awaited in order,
+    so the lower-ranked fetches are only cancelled once every URL ranked
+    above the hit has come back without one.
+    """
+    async def probe(url: str) -> Page | None:
+        page = await fetch_useful(pages, url)
+        if page and has_insurance_keywords(page.markdown):
+            return page
+        return None
+
+    probes = [asyncio.ensure_future(probe(url)) for url in urls]
+    try:
+        for ranked in probes:
+            hit = await ranked
+            if hit:
+                return hit
+        return None
+    finally:
+        for task in probes:
+            task.cancel()
+        await asyncio.gather(*probes, return_exceptions=True)
+
+
+async def find_insurance_documents(pages: PageFetcher, urls: list[str]) -> list[Page]:
+    """Fetch candidate PDFs concurrently and keep those mentioning insurance."""
+    fetched = await asyncio.gather(*(pages.fetch_document(url) for url in urls), return_exceptions=True)
+    return [
+        page for page in fetched
+        if isinstance(page, Page) and is_useful_content(page.markdown) and has_insurance_keywords(page.markdown)
+    ]
+
+
 async def crawl_clinic_website(
-    crawler: AsyncWebCrawler,
+    pages: PageFetcher,
     url: str,
-    crawl_config: CrawlerRunConfig,
+    reducer: ContentReducer | None = None,
 ) -> str | None:
-    """Crawl a clinic website and return combined markdown content."""
-    collected_content: list[str] = []
+    """Crawl a clinic website and return combined markdown content.
+
+    The given URL, the site root and sitemap.xml are fetched concurrently.
+    Their links are scored for insurance/billing terms and only the top
+    candidates are fetched; the fixed INSURANCE_PAGE_PATHS are probed only
+    when discovery finds nothing. PDFs linked under insurance terms, from
+    those pages or the insurance page, are downloaded and their text added.
+    The pages are then cut down to their insurance and payment passages by
+    ``reducer``.
+    """
+    if reducer is None:
+        reducer = ContentReducer()
+    sections: list[tuple[str, str, int]] = []
 
     # Normalize URL
     if not url.startswith("http"):
@@ -125,207 +1349,1544 @@ async def crawl_clinic_website(
     base_url = url.rstrip("/")
     site_root = get_site_root(base_url)
 
-    # Crawl the given URL (could be homepage or a deep doctor page)
+    # The given URL could be a homepage or a deep doctor page
+    main_task = asyncio.ensure_future(fetch_useful(pages, base_url, log_errors=True))
+    root_task = None
+    if site_root.rstrip("/") != base_url.rstrip("/"):
+        root_task = asyncio.ensure_future(fetch_useful(pages, site_root))
+    sitemap_task = asyncio.ensure_future(pages.fetch_sitemap(site_root))
+
     try:
-        result = await crawler.arun(url=base_url, config=crawl_config)
-        if result.success and result.markdown:
-            content = result.markdown.raw_markdown
-            if is_useful_content(content):
-                collected_content.append(f"=== MAIN PAGE ===\n{content[:3000]}")
-    except Exception as e:
-        print(f"    Error crawling {base_url}: {e}")
+        main_page = await main_task
+        root_page = await root_task if root_task else None
+        sitemap_urls = await asyncio.gather(sitemap_task, return_exceptions=True)
+    finally:
+        # Only left running when this crawl is cancelled (crawl budget)
+        started = [task for task in (main_task, root_task, sitemap_task) if task is not None]
+        for task in started:
+            task.cancel()
+        await asyncio.gather(*started, return_exceptions=True)
+    sitemap_urls = sitemap_urls[0] if isinstance(sitemap_urls[0], list) else []
+
+    links = (main_page.links if main_page else []) + (root_page.links if root_page else [])
+    tried = {base_url.lower(), site_root.lower()}
+    candidates = rank_insurance_candidates(site_root, links, sitemap_urls, tried)
+    document_urls = rank_insurance_candidates(
+        site_root, links, sitemap_urls, set(), DOCUMENT_MAX_CANDIDATES, score_insurance_document,
+    )
+    documents_task = asyncio.ensure_future(find_insurance_documents(pages, document_urls))
+    try:
+        insurance_page = await find_insurance_page(pages, candidates) if candidates else None
+        documents = await documents_task
+    finally:
+        documents_task.cancel()
+        await asyncio.gather(documents_task, return_exceptions=True)
+    found_by = "discovered"
+
+    if insurance_page is not None and not documents:
+        # The insurance page often links the plan list as a PDF
+        more_urls = rank_insurance_candidates(
+            site_root, insurance_page.links, [], {u.lower() for u in document_urls},
+            DOCUMENT_MAX_CANDIDATES, score_insurance_document,
+        )
+        if more_urls:
+            documents = await find_insurance_documents(pages, more_urls)
+
+    # Fall back to guessing paths on the SITE ROOT (not the deep URL),
+    # unless a plan list PDF turned up
+    if insurance_page is None and not documents:
+        tried.update(c.lower() for c in candidates)
+        fallback = [f"{site_root}{path}" for path in INSURANCE_PAGE_PATHS]
+        fallback = [u for u in fallback if u.lower() not in tried]
+        insurance_page = await find_insurance_page(pages, fallback)
+        found_by = "fallback path"
+
+    if main_page:
+        sections.append(("=== MAIN PAGE ===", main_page.markdown, MAIN_PAGE_TOKENS))
+
+    if insurance_page:
+        path = urlparse(insurance_page.url).path or "/"
+        print(f"    Found insurance page: {path} ({found_by})")
+        sections.append((f"=== PAGE: {path} ===", insurance_page.markdown, PAGE_TOKENS))
+    elif root_page:
+        # No dedicated insurance page found, so include the site homepage
+        sections.append(("=== SITE HOMEPAGE ===", root_page.markdown, PAGE_TOKENS))
+
+    for document in documents:
+        path = unquote(urlparse(document.url).path)
+        print(f"    Found insurance document: {path}")
+        sections.append((f"=== DOCUMENT: {path} ===", document.markdown, PAGE_TOKENS))
+
+    if not sections:
+        return None
 
-    # Try insurance-related pages on the SITE ROOT (not the deep URL)
-    found_insurance_page = False
-    for path in INSURANCE_PAGE_PATHS:
-        page_url = f"{site_root}{path}"
-        try:
-            result = await crawler.arun(url=page_url, config=crawl_config)
-            if result.success and result.markdown:
-                content = result.markdown.raw_markdown
-                if is_useful_content(content):
-                    lower = content.lower()
-                    has_keywords = any(
-                        k in lower
-                        for k in ["insurance", "medicare", "medicaid", "blue cross",
-                                   "aetna", "cigna", "united", "humana", "payment",
-                                   "billing", "accepted", "we accept"]
-                    )
-                    if has_keywords:
-                        print(f"    Found insurance page: {path}")
-                        collected_content.append(
-                            f"=== PAGE: {path} ===\n{content[:5000]}"
-                        )
-                        found_insurance_page = True
-                        break
-        except Exception:
-            continue
+    site_pages = [p.markdown for p in (main_page, root_page, insurance_page) if p]
+    return reducer.reduce(sections, site_pages)
 
-    # If no dedicated insurance page found, also try the site root homepage
-    if not found_insurance_page and site_root.rstrip("/") != base_url.rstrip("/"):
-        try:
-            result = await crawler.arun(url=site_root, config=crawl_config)
-            if result.success and result.markdown:
-                content = result.markdown.raw_markdown
-                if is_useful_content(content):
-                    collected_content.append(f"=== SITE HOMEPAGE ===\n{content[:5000]}")
-        except Exception:
-            pass
 
-    if not collected_content:
-        return None
+class ProviderOverloaded(Exception):
+    """The LLM provider rate-limited the request, timed out or returned a 5xx."""
+
 
-    combined = "\n\n".join(collected_content)
-    return combined[:8000]
+def is_overload_status(error: Exception) -> bool:
+    """True for provider errors that mean "slow down" (429, 5xx, 529)."""
+    status = getattr(error, "status_code", None) or 0
+    return status == 429 or status >= 500
 
 
 async def extract_with_anthropic(
     client: Any,
     content: str,
     model: str,
+    rate: ProviderRateLimiter | None = None,
+    structured: bool = False,
 ) -> dict[str, Any] | None:
-    """Send content to Anthropic Claude API for structured extraction."""
-    import anthropic
-    try:
-        response = client.messages.create(
-            model=model,
-            max_tokens=1024,
-            messages=[
-                {
-                    "role": "user",
-                    "content": EXTRACTION_PROMPT + content,
-                }
-            ],
+    """Send content to Anthropic Claude API for structured extraction.
+
+    ``client`` must be an ``anthropic.AsyncAnthropic`` so the request does not
+    block the event loop while other clinics are being crawled. Raises
+    ProviderOverloaded on rate limits, 5xx and timeouts that outlast the
+    retries of ``rate``. With ``structured`` the model answers through a
+    tool whose input schema is EXTRACTION_SCHEMA.
+    """
+    if structured:
+        reply = await ask_anthropic(
+            client, EXTRACTION_PROMPT + content, model, STRUCTURED_MAX_TOKENS, rate, EXTRACTION_SCHEMA
+        )
+    else:
+        reply = await ask_anthropic(client, EXTRACTION_PROMPT + content, model, rate=rate)
+    return checked_extraction(reply)
+
+
+async def extract_with_openai(
+    client: Any,
+    content: str,
+    model: str,
+    rate: ProviderRateLimiter | None = None,
+    structured: bool = False,
+) -> dict[str, Any] | None:
+    """Send content to OpenAI API for structured extraction.
+
+    ``client`` must be an ``openai.AsyncOpenAI`` (also used for OpenRouter).
+    Raises ProviderOverloaded on rate limits, 5xx and timeouts that outlast
+    the retries of ``rate``. With ``structured`` the reply is constrained
+    to EXTRACTION_SCHEMA by the json_schema response format.
+    """
+    if structured:
+        reply = await ask_openai(
+            client, EXTRACTION_PROMPT + content, model, STRUCTURED_MAX_TOKENS, rate, EXTRACTION_SCHEMA
         )
-        text = response.content[0].text.strip()
+    else:
+        reply = await ask_openai(client, EXTRACTION_PROMPT + content, model, rate=rate)
+    return checked_extraction(reply)
+
+
+def checked_extraction(reply: Any) -> dict[str, Any] | None:
+    """Validate a parsed reply against EXTRACTION_SCHEMA, logging rejects."""
+    if reply is None:
+        return None
+    extraction = validate_extraction(reply)
+    if extraction is None:
+        print(f"    Reply doesn't match the extraction schema: {str(reply)[:200]}")
+    return extraction
 
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-            text = text.strip()
 
-        return json.loads(text)
+def parse_json_reply(text: str) -> Any:
+    """Parse a model reply as JSON, unwrapping a ```json fence if present.
+
+    A reply cut off mid-JSON is repaired rather than thrown away.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+        text = text.strip()
+    return repair_json(text)
+
+
+def anthropic_params(
+    prompt: str,
+    model: str,
+    max_tokens: int = MAX_TOKENS,
+    schema: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Request body of one Anthropic messages call (also used for batches).
+
+    With a ``schema`` the model is made to answer by calling a tool whose
+    input must match it.
+    """
+    params: dict[str, Any] = {
+        "model": model,
+        "max_tokens": max_tokens,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt,
+            }
+        ],
+    }
+    if schema is not None:
+        params["tools"] = [{
+            "name": EXTRACTION_TOOL,
+            "description": "Record the insurance and payment data extracted from the content.",
+            "input_schema": schema,
+        }]
+        params["tool_choice"] = {"type": "tool", "name": EXTRACTION_TOOL}
+    return params
+
+
+def openai_params(
+    prompt: str,
+    model: str,
+    max_tokens: int = MAX_TOKENS,
+    schema: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Request body of one OpenAI chat completion (also used for batches).
+
+    With a ``schema`` the reply is constrained to it by the strict
+    json_schema response format.
+    """
+    params: dict[str, Any] = {
+        "model": model,
+        "max_tokens": max_tokens,
+        "messages": [
+            {
+                "role": "system",
+                "content": OPENAI_SYSTEM_PROMPT,
+            },
+            {
+                "role": "user",
+                "content": prompt,
+            }
+        ],
+    }
+    if schema is not None:
+        params["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "extraction", "strict": True, "schema": schema},
+        }
+    return params
+
+
+def anthropic_reply(message: Any) -> Any:
+    """The parsed JSON of a Messages API reply: tool input, or the text."""
+    for block in message.content:
+        if block.type == "tool_use":
+            return block.input
+    return parse_json_reply("".join(block.text for block in message.content if block.type == "text"))
+
+
+async def ask_anthropic(
+    client: Any,
+    prompt: str,
+    model: str,
+    max_tokens: int = MAX_TOKENS,
+    rate: ProviderRateLimiter | None = None,
+    schema: dict[str, Any] | None = None,
+) -> Any:
+    """Send one prompt to Anthropic and return the parsed JSON reply, or None.
+
+    With ``rate`` the request waits for room under the RPM/TPM limits and
+    rate limits, 5xx and connection errors are retried with backoff. With
+    ``schema`` the reply comes back as tool input matching it.
+    """
+    import anthropic
+
+    def retryable(e: Exception) -> bool:
+        return isinstance(e, anthropic.APIConnectionError) or is_overload_status(e)
+
+    attempts = 0
+
+    async def send() -> tuple[Any, Any]:
+        nonlocal attempts
+        attempts += 1
+        raw = await client.messages.with_raw_response.create(
+            **anthropic_params(prompt, model, max_tokens, schema)
+        )
+        return raw.headers, await raw.parse()
+
+    estimate = count_tokens(prompt) + max_tokens
+    started = time.monotonic()
+    try:
+        response = await call_with_retries(send, estimate, rate, retryable)
+        usage = response.usage
+        crawl_metrics.record_llm(
+            time.monotonic() - started, attempts, usage.input_tokens, usage.output_tokens, model
+        )
+        if rate is not None:
+            rate.settle(estimate, usage.input_tokens + usage.output_tokens)
+        return anthropic_reply(response)
     except json.JSONDecodeError as e:
         print(f"    JSON parse error: {e}")
         return None
     except anthropic.APIError as e:
         print(f"    Anthropic API error: {e}")
+        if retryable(e):
+            raise ProviderOverloaded(str(e)) from e
         return None
 
 
-async def extract_with_openai(
+async def ask_openai(
     client: Any,
-    content: str,
+    prompt: str,
     model: str,
-) -> dict[str, Any] | None:
-    """Send content to OpenAI API for structured extraction."""
-    from openai import OpenAIError
-    try:
-        response = client.chat.completions.create(
-            model=model,
-            max_tokens=1024,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You extract structured data from webpage content. Return ONLY valid JSON, no markdown or explanation.",
-                },
-                {
-                    "role": "user",
-                    "content": EXTRACTION_PROMPT + content,
-                }
-            ],
+    max_tokens: int = MAX_TOKENS,
+    rate: ProviderRateLimiter | None = None,
+    schema: dict[str, Any] | None = None,
+) -> Any:
+    """Send one prompt to OpenAI and return the parsed JSON reply, or None.
+
+    With ``rate`` the request waits for room under the RPM/TPM limits and
+    rate limits, 5xx and connection errors are retried with backoff. With
+    ``schema`` the reply is constrained to it.
+    """
+    from openai import APIConnectionError, OpenAIError
+
+    def retryable(e: Exception) -> bool:
+        return isinstance(e, APIConnectionError) or is_overload_status(e)
+
+    attempts = 0
+
+    async def send() -> tuple[Any, Any]:
+        nonlocal attempts
+        attempts += 1
+        raw = await client.chat.completions.with_raw_response.create(
+            **openai_params(prompt, model, max_tokens, schema)
         )
-        text = response.choices[0].message.content.strip()
+        return raw.headers, raw.parse()
 
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-            text = text.strip()
-
-        return json.loads(text)
+    estimate = count_tokens(prompt) + max_tokens
+    started = time.monotonic()
+    try:
+        response = await call_with_retries(send, estimate, rate, retryable)
+        usage = response.usage
+        crawl_metrics.record_llm(
+            time.monotonic() - started, attempts,
+            usage.prompt_tokens if usage else 0, usage.completion_tokens if usage else 0, model,
+        )
+        if rate is not None and usage is not None:
+            rate.settle(estimate, usage.total_tokens)
+        return parse_json_reply(response.choices[0].message.content)
     except json.JSONDecodeError as e:
         print(f"    JSON parse error: {e}")
         return None
     except OpenAIError as e:
         print(f"    OpenAI API error: {e}")
+        if retryable(e):
+            raise ProviderOverloaded(str(e)) from e
+        return None
+
+
+async def extract_packed(
+    client: Any,
+    contents: dict[str, str],
+    model: str,
+    provider: str,
+    rate: ProviderRateLimiter | None = None,
+    structured: bool = False,
+) -> dict[str, dict[str, Any] | None]:
+    """Extract several clinics with one request.
+
+    ``contents`` maps a short clinic key to its content. Returns an
+    extraction per key, None where the reply left the clinic out or gave
+    it an invalid extraction. Raises ProviderOverloaded like the
+    single-clinic calls. With ``structured`` the reply is constrained to
+    one EXTRACTION_SCHEMA object per key.
+    """
+    prompt = PACKED_EXTRACTION_PROMPT + "\n\n".join(
+        f"##### CLINIC {key} #####\n{content}" for key, content in contents.items()
+    )
+    max_tokens = min(4096, PACKED_TOKENS_PER_CLINIC * len(contents) + 256)
+    schema = packed_schema(list(contents)) if structured else None
+    if provider == "openai":
+        reply = await ask_openai(client, prompt, model, max_tokens, rate, schema)
+    else:
+        reply = await ask_anthropic(client, prompt, model, max_tokens, rate, schema)
+    if not isinstance(reply, dict):
+        reply = {}
+    # Clinics of a cut-off reply may be cut off themselves
+    repaired = isinstance(reply, RepairedJSON)
+    return {key: validate_extraction(reply.get(key), repaired) for key in contents}
+
+
+class PromptPacker:
+    """Group small clinic contents into multi-clinic LLM requests.
+
+    ``extract`` queues a content and waits for its share of a packed reply.
+    A pack is sent once it holds ``max_clinics`` contents or ``max_tokens``
+    tokens, or ``linger`` seconds after its first content arrived. Each
+    pack takes one LLM limiter slot, so a pack of five costs the rate
+    limit one request instead of five and pays for the instructions once.
+
+    Clinics the reply leaves out or gets wrong resolve to None; the caller
+    retries them with a single-clinic request.
+    """
+
+    def __init__(
+        self,
+        llm_client: Any,
+        model: str,
+        provider: str,
+        limiter: AdaptiveLimiter,
+        max_clinics: int,
+        max_tokens: int = PACK_MAX_TOKENS,
+        max_item_tokens: int = PACK_MAX_ITEM_TOKENS,
+        linger: float = 0.25,
+        rate: ProviderRateLimiter | None = None,
+        structured: bool = False,
+    ):
+        self.llm_client = llm_client
+        self.model = model
+        self.provider = provider
+        self.limiter = limiter
+        self.max_clinics = max_clinics
+        self.max_tokens = max_tokens
+        self.max_item_tokens = max_item_tokens
+        self.linger = linger
+        self.rate = rate
+        self.structured = structured
+        # (content, future, metrics of the clinic waiting on it)
+        self._pending: list[tuple[str, asyncio.Future, Any]] = []
+        self._pending_tokens = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._sending: set[asyncio.Task] = set()
+        self.requests = 0
+        self.packed = 0
+        self.fallbacks = 0
+
+    def fits(self, content: str) -> bool:
+        """Whether ``content`` is small enough to share a request."""
+        return count_tokens(content) <= self.max_item_tokens
+
+    async def extract(self, content: str) -> dict[str, Any] | None:
+        tokens = count_tokens(content)
+        if self._pending and self._pending_tokens + tokens > self.max_tokens:
+            self._flush()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((content, future, crawl_metrics.current.get()))
+        self._pending_tokens += tokens
+        if len(self._pending) >= self.max_clinics:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.linger, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: list[tuple[str, asyncio.Future, Any]]) -> None:
+        contents = {f"c{i + 1}": content for i, (content, _, _) in enumerate(batch)}
+        # This task inherited one clinic's metrics; the request is all of theirs
+        shares = [metrics for _, _, metrics in batch if metrics is not None]
+        crawl_metrics.current.set(crawl_metrics.SharedMetrics(shares) if shares else None)
+        extractions: dict[str, dict[str, Any] | None] = {}
+        try:
+            async with self.limiter.slot() as slot:
+                try:
+                    extractions = await extract_packed(
+                        self.llm_client, contents, self.model, self.provider, self.rate, self.structured
+                    )
+                except ProviderOverloaded:
+                    slot.overloaded()
+                except Exception as e:
+                    print(f"  Packed extraction exception: {e}")
+                    slot.failed()
+            self.requests += 1
+        finally:
+            for key, (_, future, _) in zip(contents, batch):
+                extraction = extractions.get(key)
+                if extraction is None:
+                    self.fallbacks += 1
+                else:
+                    self.packed += 1
+                if not future.done():
+                    future.set_result(extraction)
+
+
+def content_hash(content: str) -> str:
+    """Key of a clinic's LLM input; equal contents get equal extractions."""
+    return hashlib.sha256(content.encode()).hexdigest()[:32]
+
+
+class RefreshState:
+    """--refresh: the previous result of every clinic being re-crawled.
+
+    A clinic whose content hashes the same as the content its previous
+    extraction was made from (the record's contentHash) keeps that result
+    without an LLM call. A clinic whose site yields nothing this time keeps
+    its previous extraction rather than losing it to a transient failure.
+    """
+
+    def __init__(self, previous: dict[str, dict[str, Any]]):
+        self.previous = previous
+        self.unchanged = 0
+        self.kept = 0
+
+    def reuse(self, clinic: dict, content: str | None) -> dict[str, Any] | None:
+        """The previous result to keep for ``clinic``, or None to extract anew."""
+        record = self.previous.get(clinic["id"])
+        if record is None or record["extraction"] is None:
+            return None
+        if not content:
+            self.kept += 1
+            return record
+        if record.get("contentHash") == content_hash(content):
+            self.unchanged += 1
+            return record
         return None
 
 
-async def process_clinic(
-    crawler: AsyncWebCrawler,
+def build_result(
+    clinic: dict,
+    extraction: dict[str, Any] | None,
+    error: str | None,
+) -> dict[str, Any]:
+    """Build the result record stored in extraction-results.json."""
+    return {
+        "clinicId": clinic["id"],
+        "title": clinic["title"],
+        "website": clinic["website"],
+        "state": clinic["state"],
+        "extraction": extraction,
+        "error": error,
+    }
+
+
+async def crawl_clinic(
+    pages: PageFetcher,
+    clinic: dict,
+    reducer: ContentReducer | None = None,
+) -> str | None:
+    """Crawl stage for one clinic: return combined content or None.
+
+    The caller releases the clinic's host pages (PageFetcher.release).
+    """
+    print(f"  Crawling: {clinic['title']} ({clinic['website']})")
+    started = time.monotonic()
+    try:
+        content = await crawl_clinic_website(pages, clinic["website"], reducer)
+    finally:
+        crawl_metrics.record_crawl(time.monotonic() - started)
+    if not content:
+        print(f"    No content extracted for {clinic['title']}")
+    else:
+        crawl_metrics.record_content(count_tokens(content))
+    return content
+
+
+async def extract_clinic(
     llm_client: Any,
     clinic: dict,
+    content: str,
     model: str,
     provider: str,
-    crawl_config: CrawlerRunConfig,
-    semaphore: asyncio.Semaphore,
-) -> dict[str, Any] | None:
-    """Process a single clinic: crawl + extract."""
-    async with semaphore:
-        clinic_id = clinic["id"]
-        website = clinic["website"]
-        title = clinic["title"]
+    extractions: ExtractionCache | None = None,
+    rate: ProviderRateLimiter | None = None,
+    structured: bool = False,
+    check_store: bool = True,
+) -> dict[str, Any]:
+    """Extraction stage for one clinic: run the LLM and build the result."""
+    async def extract() -> dict[str, Any] | None:
+        if provider == "openai":
+            return await extract_with_openai(llm_client, content, model, rate, structured)
+        return await extract_with_anthropic(llm_client, content, model, rate, structured)
 
-        print(f"  Crawling: {title} ({website})")
+    if extractions is not None:
+        extraction = await extractions.get_or_extract(content, extract, check_store)
+    else:
+        extraction = await extract()
+    return extraction_result(clinic, extraction)
 
-        content = await crawl_clinic_website(crawler, website, crawl_config)
-        if not content:
-            print(f"    No content extracted for {title}")
-            return {
-                "clinicId": clinic_id,
-                "title": title,
-                "website": website,
-                "state": clinic["state"],
-                "extraction": None,
-                "error": "no_content",
-            }
 
-        # Small delay before API call
-        await asyncio.sleep(0.1)
+def extraction_result(clinic: dict, extraction: dict[str, Any] | None) -> dict[str, Any]:
+    """Log an extraction and wrap it in a result record."""
+    if not extraction:
+        return build_result(clinic, None, "extraction_failed")
 
-        if provider == "openai":
-            extraction = await extract_with_openai(llm_client, content, model)
+    print(
+        f"    Extracted: {len(extraction.get('insuranceProviders', []))} insurance, "
+        f"{len(extraction.get('paymentMethods', []))} payment methods "
+        f"(confidence: {extraction.get('confidence', 'unknown')})"
+    )
+    return build_result(clinic, extraction, None)
+
+
+async def limited_crawl(
+    pages: PageFetcher,
+    clinic: dict,
+    limiter: AdaptiveLimiter,
+    reducer: ContentReducer | None = None,
+    stats: HostStats | None = None,
+    budget: float | None = None,
+) -> str | None:
+    """Crawl one clinic inside a crawl-limiter slot, reporting timeouts.
+
+    ``budget`` limits the crawl itself, not the wait for a slot; a crawl
+    running past it is cancelled and asyncio.TimeoutError raised. The
+    clinic's host pages are released however the crawl ends. The crawl
+    time, and whether it timed out or ran past its budget, goes into
+    ``stats`` for scheduling later runs.
+    """
+    async with limiter.slot() as slot:
+        timeouts = CrawlTimeouts()
+        reset = crawl_timeouts.set(timeouts)
+        started = time.monotonic()
+        try:
+            content = await asyncio.wait_for(crawl_clinic(pages, clinic, reducer), budget)
+        except asyncio.TimeoutError:
+            if budget is None or time.monotonic() - started < budget:
+                print(f"  Crawl exception for {clinic['title']}: timed out")
+                slot.failed()
+                content = None
+            else:
+                # Ran past its crawl budget
+                if stats is not None:
+                    stats.record_crawl(get_host(clinic["website"]), time.monotonic() - started, True)
+                raise
+        except Exception as e:
+            print(f"  Crawl exception for {clinic['title']}: {e}")
+            slot.failed()
+            content = None
+        finally:
+            crawl_timeouts.reset(reset)
+            pages.release(clinic["website"])
+        if stats is not None:
+            stats.record_crawl(get_host(clinic["website"]), time.monotonic() - started, timeouts.count > 0)
+        if timeouts.count:
+            slot.overloaded()
+    return content
+
+
+async def limited_extract(
+    llm_client: Any,
+    clinic: dict,
+    content: str,
+    model: str,
+    provider: str,
+    limiter: AdaptiveLimiter,
+    extractions: ExtractionCache | None = None,
+    rules: RuleExtractor | None = None,
+    packer: PromptPacker | None = None,
+    rate: ProviderRateLimiter | None = None,
+    structured: bool = False,
+) -> dict[str, Any] | None:
+    """Extract one clinic inside an LLM-limiter slot, reporting overloads.
+
+    Clear-cut carrier lists answered by the rule extractor and cache hits
+    are handled before taking a slot, so they neither wait on the limiter
+    nor skew its latency window. Small contents go to ``packer`` when
+    given, which takes one slot per packed request; clinics a packed reply
+    misses fall through to a single-clinic request.
+
+    Returns None, rather than a failed result, when the provider stayed
+    overloaded through every retry, so the caller can try the clinic again
+    later instead of losing it.
+    """
+    if rules is not None:
+        extraction = rules.extract(content)
+        if extraction is not None:
+            crawl_metrics.record_source("rules")
+            return extraction_result(clinic, extraction)
+
+    if extractions is not None:
+        cached = extractions.cached(content)
+        if cached is not None:
+            crawl_metrics.record_source("cache")
+            return extraction_result(clinic, cached)
+
+    if packer is not None and packer.fits(content):
+        if extractions is not None:
+            extraction = await extractions.get_or_extract(content, lambda: packer.extract(content), False)
         else:
-            extraction = await extract_with_anthropic(llm_client, content, model)
-
-        if not extraction:
-            return {
-                "clinicId": clinic_id,
-                "title": title,
-                "website": website,
-                "state": clinic["state"],
-                "extraction": None,
-                "error": "extraction_failed",
-            }
+            extraction = await packer.extract(content)
+        if extraction is not None:
+            crawl_metrics.record_source("packed")
+            return extraction_result(clinic, extraction)
 
-        print(
-            f"    Extracted: {len(extraction.get('insuranceProviders', []))} insurance, "
-            f"{len(extraction.get('paymentMethods', []))} payment methods "
-            f"(confidence: {extraction.get('confidence', 'unknown')})"
+    crawl_metrics.record_source("llm")
+    async with limiter.slot() as slot:
+        try:
+            result = await extract_clinic(
+                llm_client, clinic, content, model, provider, extractions, rate, structured, False
+            )
+        except ProviderOverloaded:
+            slot.overloaded()
+            result = None
+        except Exception as e:
+            print(f"  Extraction exception for {clinic['title']}: {e}")
+            slot.failed()
+            result = build_result(clinic, None, "extraction_failed")
+    return result
+
+
+# Queue sentinel telling a pipeline worker that its input is exhausted
+_DONE = object()
+
+
+async def crawl_worker(
+    pages: PageFetcher,
+    limiter: AdaptiveLimiter,
+    reducer: ContentReducer,
+    jobs: asyncio.Queue,
+    extract_queue: asyncio.Queue,
+    result_queue: asyncio.Queue,
+    metrics: MetricsRecorder | None = None,
+    refresh: RefreshState | None = None,
+    stats: HostStats | None = None,
+    budget: float | None = None,
+    tail: list[dict] | None = None,
+) -> None:
+    """Pull clinics from ``jobs`` and hand crawled content to the extractors.
+
+    A crawl running past ``budget`` seconds is cancelled; the clinic is
+    appended to ``tail`` to be crawled again later, or recorded as timed
+    out without one.
+    """
+    while True:
+        clinic = await jobs.get()
+        if clinic is _DONE:
+            return
+        if metrics is not None:
+            metrics.begin(clinic, get_host(clinic["website"]))
+        error = "no_content"
+        try:
+            content = await limited_crawl(pages, clinic, limiter, reducer, stats, budget)
+        except asyncio.TimeoutError:
+            print(f"    {clinic['title']} ran past its {budget:g}s crawl budget")
+            if tail is not None:
+                pages.retain(clinic["website"])
+                tail.append(clinic)
+                continue
+            content = None
+            error = "crawl_timeout"
+        if refresh is not None:
+            previous = refresh.reuse(clinic, content)
+            if previous is not None:
+                crawl_metrics.record_source("unchanged")
+                await result_queue.put(previous)
+                continue
+        if content:
+            await extract_queue.put((clinic, content))
+        else:
+            await result_queue.put(build_result(clinic, None, error))
+
+
+async def extract_worker(
+    llm_client: Any,
+    model: str,
+    provider: str,
+    limiter: AdaptiveLimiter,
+    extractions: ExtractionCache,
+    rules: RuleExtractor | None,
+    packer: PromptPacker | None,
+    rate: ProviderRateLimiter | None,
+    structured: bool,
+    extract_queue: asyncio.Queue,
+    result_queue: asyncio.Queue,
+    deferred: list[tuple[dict, str]] | None = None,
+    metrics: MetricsRecorder | None = None,
+) -> None:
+    """Pull crawled content and push finished result records to the writer.
+
+    Clinics the provider turned away through every retry are appended to
+    ``deferred`` for a later pass, or recorded as failed without one.
+    """
+    while True:
+        item = await extract_queue.get()
+        if item is _DONE:
+            return
+        clinic, content = item
+        if metrics is not None:
+            metrics.resume(clinic)
+        result = await limited_extract(
+            llm_client, clinic, content, model, provider, limiter, extractions, rules, packer, rate,
+            structured,
         )
+        if result is None:
+            if deferred is not None:
+                deferred.append(item)
+                continue
+            result = build_result(clinic, None, "extraction_failed")
+        result["contentHash"] = content_hash(content)
+        await result_queue.put(result)
+
+
+def print_refresh_stats(pages: PageFetcher, refresh: RefreshState) -> None:
+    print(
+        f"Refresh: {pages.not_modified} pages not modified (304), {refresh.unchanged} clinics unchanged, "
+        f"{refresh.kept} kept their previous extraction after an empty crawl"
+    )
+
 
-        return {
-            "clinicId": clinic_id,
-            "title": title,
-            "website": website,
-            "state": clinic["state"],
-            "extraction": extraction,
-            "error": None,
+def print_stats(journal: ResultJournal) -> None:
+    """Print how many stored results carry insurance and payment data."""
+    with_insurance, with_payment = journal.stats()
+    print(f"With insurance data: {with_insurance}")
+    print(f"With payment data: {with_payment}")
+
+
+async def result_writer(
+    result_queue: asyncio.Queue,
+    journal: ResultJournal,
+    total: int,
+    progress_every: int,
+    metrics: MetricsRecorder | None = None,
+    stats: HostStats | None = None,
+) -> None:
+    """Append each finished result to the journal as soon as it arrives."""
+    done = 0
+    start_time = time.time()
+    while True:
+        result = await result_queue.get()
+        if result is _DONE:
+            break
+        journal.append(result)
+        if metrics is not None:
+            metrics.finish(result["clinicId"], result["error"])
+        if stats is not None:
+            stats.record_result(
+                get_host(result["website"]),
+                _has_data(result, "insuranceProviders") or _has_data(result, "paymentMethods"),
+            )
+        done += 1
+
+        if done % progress_every == 0:
+            elapsed = time.time() - start_time
+            print(f"\n{'='*60}")
+            print(f"Progress: {done}/{total} clinics in {elapsed:.1f}s")
+            print(f"Total processed: {len(journal)}")
+            print_stats(journal)
+            print(f"{'='*60}\n")
+
+    elapsed = time.time() - start_time
+    print(f"\nProcessed {done} clinics in {elapsed:.1f}s")
+    print(f"Total processed: {len(journal)}")
+    print_stats(journal)
+
+
+async def run_pipeline(
+    pages: PageFetcher,
+    llm_client: Any,
+    clinics: list[dict],
+    model: str,
+    provider: str,
+    journal: ResultJournal,
+    crawl_limiter: AdaptiveLimiter,
+    llm_limiter: AdaptiveLimiter,
+    extractions: ExtractionCache,
+    rules: RuleExtractor | None,
+    reducer: ContentReducer,
+    packer: PromptPacker | None,
+    rate: ProviderRateLimiter | None,
+    structured: bool,
+    metrics: MetricsRecorder | None,
+    refresh: RefreshState | None,
+    stats: HostStats | None,
+    crawl_budget: float | None,
+    tail_budget: float | None,
+    progress_every: int,
+) -> None:
+    """Run crawl -> extract -> write as a streaming pipeline.
+
+    Each stage has a worker pool sized to its limiter's maximum, connected
+    by bounded queues; the limiters decide how many workers are active at
+    once. A slow site only holds up its own worker, and finished clinics
+    are recorded as soon as they complete rather than at the end of a batch.
+
+    Crawls running past ``crawl_budget`` are cancelled and crawled again
+    once every other clinic has been, with ``tail_budget`` each, so
+    stragglers don't hold crawl slots while the bulk of the run waits.
+
+    Clinics whose extraction failed on provider overload are deferred and
+    retried once more after the rest of the run, following a cool-down.
+    """
+    max_concurrent = crawl_limiter.maximum
+    max_concurrent_llm = llm_limiter.maximum
+
+    jobs: asyncio.Queue = asyncio.Queue()
+    for clinic in clinics:
+        jobs.put_nowait(clinic)
+    for _ in range(max_concurrent):
+        jobs.put_nowait(_DONE)
+
+    # Bounded so crawlers pause when the LLM stage falls behind
+    extract_queue: asyncio.Queue = asyncio.Queue(maxsize=max_concurrent_llm * 2)
+    result_queue: asyncio.Queue = asyncio.Queue(maxsize=max_concurrent + max_concurrent_llm)
+
+    deferred: list[tuple[dict, str]] = []
+    writer = asyncio.create_task(
+        result_writer(result_queue, journal, len(clinics), progress_every, metrics, stats)
+    )
+    extractors = [
+        asyncio.create_task(
+            extract_worker(
+                llm_client, model, provider, llm_limiter, extractions, rules, packer, rate, structured,
+                extract_queue, result_queue, deferred, metrics,
+            )
+        )
+        for _ in range(max_concurrent_llm)
+    ]
+    tail: list[dict] = []
+    crawlers = [
+        asyncio.create_task(
+            crawl_worker(
+                pages, crawl_limiter, reducer, jobs, extract_queue, result_queue, metrics, refresh,
+                stats, crawl_budget, tail,
+            )
+        )
+        for _ in range(max_concurrent)
+    ]
+    await asyncio.gather(*crawlers)
+
+    if tail:
+        print(f"\nCrawling {len(tail)} clinics that ran past the crawl budget again, {tail_budget}s each")
+        tail_jobs: asyncio.Queue = asyncio.Queue()
+        for clinic in tail:
+            tail_jobs.put_nowait(clinic)
+        tail_crawlers = [
+            asyncio.create_task(
+                crawl_worker(
+                    pages, crawl_limiter, reducer, tail_jobs, extract_queue, result_queue, metrics, refresh,
+                    stats, tail_budget,
+                )
+            )
+            for _ in range(min(max_concurrent, len(tail)))
+        ]
+        for _ in tail_crawlers:
+            tail_jobs.put_nowait(_DONE)
+        await asyncio.gather(*tail_crawlers)
+
+    for _ in extractors:
+        await extract_queue.put(_DONE)
+    await asyncio.gather(*extractors)
+
+    if deferred:
+        print(f"\nRetrying {len(deferred)} clinics the LLM provider turned away, in {DEFERRED_RETRY_DELAY}s")
+        await asyncio.sleep(DEFERRED_RETRY_DELAY)
+        retry_queue: asyncio.Queue = asyncio.Queue()
+        for item in deferred:
+            retry_queue.put_nowait(item)
+        retriers = [
+            asyncio.create_task(
+                extract_worker(
+                    llm_client, model, provider, llm_limiter, extractions, rules, None, rate, structured,
+                    retry_queue, result_queue, metrics=metrics,
+                )
+            )
+            for _ in range(max_concurrent_llm)
+        ]
+        for _ in retriers:
+            retry_queue.put_nowait(_DONE)
+        await asyncio.gather(*retriers)
+
+    await result_queue.put(_DONE)
+    await writer
+    if pages.replay:
+        print(f"Pages replayed from the archive: {pages.replayed_pages}")
+    else:
+        print(
+            f"Pages fetched over HTTP: {pages.http_pages}, with the browser: {pages.browser_pages}, "
+            f"PDF documents read: {pages.document_pages}"
+        )
+    if refresh is not None:
+        print_refresh_stats(pages, refresh)
+    print(f"Shared-domain page cache hits: {pages.hits}, duplicate-content LLM calls saved: {extractions.hits}")
+    if reducer.tokens_before:
+        saved = 1 - reducer.tokens_after / reducer.tokens_before
+        print(
+            f"LLM input: {reducer.tokens_before} tokens crawled, {reducer.tokens_after} sent "
+            f"({saved:.0%} cut, {reducer.boilerplate_lines} boilerplate lines dropped)"
+        )
+    if packer is not None:
+        print(
+            f"Packed prompts: {packer.packed} clinics in {packer.requests} requests, "
+            f"{packer.fallbacks} sent back to single-clinic requests"
+        )
+    if rules is not None:
+        print(f"Rule extractor: {rules.hits} clinics answered without the LLM, {rules.misses} sent on")
+    if rate is not None:
+        print(f"LLM rate limits: {rate.retries} retries, {rate.waited:.0f}s spent waiting for RPM/TPM room")
+    for limiter in (crawl_limiter, llm_limiter):
+        print(f"{limiter.name} concurrency: ended at {limiter.limit}, peaked at {limiter.peak}")
+
+
+async def crawl_for_batch(
+    pages: PageFetcher,
+    clinics: list[dict],
+    journal: ResultJournal,
+    crawl_limiter: AdaptiveLimiter,
+    extractions: ExtractionCache,
+    rules: RuleExtractor | None,
+    reducer: ContentReducer,
+    metrics: MetricsRecorder | None,
+    refresh: RefreshState | None,
+    stats: HostStats | None,
+    progress_every: int,
+) -> list[tuple[dict, str]]:
+    """Crawl stage of --llm-batch: return the (clinic, content) pairs needing the LLM.
+
+    Clinics without content, and those the rule extractor or the LLM cache
+    can answer, are written to the journal right away.
+    """
+    max_concurrent = crawl_limiter.maximum
+    jobs: asyncio.Queue = asyncio.Queue()
+    for clinic in clinics:
+        jobs.put_nowait(clinic)
+    for _ in range(max_concurrent):
+        jobs.put_nowait(_DONE)
+    content_queue: asyncio.Queue = asyncio.Queue(maxsize=max_concurrent * 2)
+    result_queue: asyncio.Queue = asyncio.Queue(maxsize=max_concurrent * 2)
+    pending: list[tuple[dict, str]] = []
+
+    async def sort_contents() -> None:
+        while True:
+            item = await content_queue.get()
+            if item is _DONE:
+                return
+            clinic, content = item
+            if metrics is not None:
+                metrics.resume(clinic)
+            extraction = rules.extract(content) if rules is not None else None
+            if extraction is not None:
+                crawl_metrics.record_source("rules")
+            else:
+                extraction = extractions.cached(content)
+                crawl_metrics.record_source("cache" if extraction is not None else "batch")
+            if extraction is None:
+                pending.append((clinic, content))
+            else:
+                result = extraction_result(clinic, extraction)
+                result["contentHash"] = content_hash(content)
+                await result_queue.put(result)
+
+    writer = asyncio.create_task(
+        result_writer(result_queue, journal, len(clinics), progress_every, metrics, stats)
+    )
+    sorter = asyncio.create_task(sort_contents())
+    crawlers = [
+        asyncio.create_task(
+            crawl_worker(
+                pages, crawl_limiter, reducer, jobs, content_queue, result_queue, metrics, refresh, stats
+            )
+        )
+        for _ in range(max_concurrent)
+    ]
+    await asyncio.gather(*crawlers)
+    await content_queue.put(_DONE)
+    await sorter
+    await result_queue.put(_DONE)
+    await writer
+    if metrics is not None:
+        # Their LLM stage runs in the batch; what they cost to crawl is known now
+        for clinic, _ in pending:
+            metrics.finish(clinic["id"], None)
+    if refresh is not None:
+        print_refresh_stats(pages, refresh)
+    print(f"{len(pending)} clinics need the LLM")
+    return pending
+
+
+def llm_batch_dir(args: argparse.Namespace) -> Path:
+    """Where --llm-batch keeps its request file and pending batch state."""
+    return Path(__file__).parent / args.llm_batch_dir
+
+
+async def submit_llm_batch(
+    llm_client: Any,
+    api: str,
+    model: str,
+    pending: list[tuple[dict, str]],
+    batch_dir: Path,
+    structured: bool = False,
+    refresh: bool = False,
+) -> None:
+    """Write one request per distinct content to a batch file and submit it.
+
+    The request file and the pending batch's state are kept in
+    ``batch_dir``. With ``refresh`` the results will supersede the
+    clinics' previous ones.
+    """
+    requests: dict[str, dict[str, Any]] = {}
+    for clinic, content in pending:
+        custom_id = content_hash(content)
+        request = requests.setdefault(custom_id, {"content": content, "clinics": []})
+        request["clinics"].append(clinic)
+
+    build_params = openai_params if api == "openai" else anthropic_params
+    if structured:
+        params = {
+            custom_id: build_params(
+                EXTRACTION_PROMPT + request["content"], model, STRUCTURED_MAX_TOKENS, EXTRACTION_SCHEMA
+            )
+            for custom_id, request in requests.items()
+        }
+    else:
+        params = {
+            custom_id: build_params(EXTRACTION_PROMPT + request["content"], model)
+            for custom_id, request in requests.items()
         }
+    batch_dir.mkdir(exist_ok=True)
+    requests_path = batch_dir / "requests.jsonl"
+    llm_batch.write_requests(requests_path, api, params)
+    batch_id = await llm_batch.submit(llm_client, api, requests_path)
+    llm_batch.save_state(batch_dir, {
+        "batchId": batch_id,
+        "api": api,
+        "model": model,
+        "promptVersion": PROMPT_VERSION,
+        "refresh": refresh,
+        "requests": requests,
+    })
+    print(f"Submitted batch {batch_id}: {len(params)} requests for {len(pending)} clinics")
+
+
+async def collect_llm_batch(args: argparse.Namespace, journal: ResultJournal) -> None:
+    """Wait for the pending batch to finish and write its results to the journal.
+
+    Clinics whose request failed or expired are left out of the journal, so
+    the next run picks them up again.
+    """
+    state = llm_batch.load_state(llm_batch_dir(args))
+    llm_client, api = create_llm_client(args.provider, args.llm_base_url)
+    if api != state["api"]:
+        print(f"Error: batch {state['batchId']} was submitted to the {state['api']} API; rerun with that provider")
+        sys.exit(1)
+
+    await llm_batch.wait(llm_client, api, state["batchId"], args.batch_poll_seconds)
+    replies = await llm_batch.results(llm_client, api, state["batchId"])
+
+    # Replies to an older prompt are still results, but not cache entries
+    llm_cache = open_llm_cache(args) if state["promptVersion"] == PROMPT_VERSION else None
+    written = missing = 0
+    for custom_id, request in state["requests"].items():
+        reply = replies.get(custom_id)
+        if reply is None:
+            missing += len(request["clinics"])
+            continue
+        try:
+            extraction = checked_extraction(parse_json_reply(reply))
+        except json.JSONDecodeError as e:
+            print(f"    JSON parse error: {e}")
+            extraction = None
+        if extraction is not None and llm_cache is not None:
+            llm_cache.put(state["model"], request["content"], extraction)
+        for clinic in request["clinics"]:
+            if clinic["id"] not in journal or state.get("refresh"):
+                result = extraction_result(clinic, extraction)
+                result["contentHash"] = custom_id
+                journal.append(result)
+                written += 1
+    if llm_cache is not None:
+        llm_cache.close()
+
+    llm_batch.clear_state(llm_batch_dir(args))
+    print(f"Batch {state['batchId']}: {written} results written, {missing} clinics left for the next run")
+    print_stats(journal)
+
+
+async def run_llm_batch(
+    args: argparse.Namespace,
+    model: str,
+    clinics: list[dict],
+    journal: ResultJournal,
+    previous: dict[str, dict[str, Any]] | None = None,
+) -> None:
+    """--llm-batch: crawl and submit a batch, or resume a pending one, then collect it."""
+    batch_dir = llm_batch_dir(args)
+    if llm_batch.load_state(batch_dir) is None:
+        await crawl_and_extract(args, model, clinics, journal, previous)
+        if llm_batch.load_state(batch_dir) is None:
+            return  # every clinic was answered without the LLM
+    else:
+        print(f"Resuming the batch pending in {batch_dir}")
+    await collect_llm_batch(args, journal)
+
+
+async def probe_clinic_hosts(
+    args: argparse.Namespace,
+    clinics: list[dict],
+    journal: ResultJournal,
+) -> list[dict]:
+    """Reachability pre-pass: record clinics on dead hosts, defer slow ones.
+
+    Returns the clinics to crawl, those on hosts that timed out moved to
+    the end so they don't hold crawl slots while live sites wait.
+    """
+    cache = DeadHostCache(Path(__file__).parent / args.dead_hosts_file, args.dead_host_ttl_hours * 3600)
+    started = time.monotonic()
+    timings: dict[str, tuple[float | None, float | None]] = {}
+    failures = await probe_hosts(
+        [clinic["website"] for clinic in clinics], cache, args.host_probe_concurrency, args.host_probe_timeout,
+        timings,
+    )
+    if args.metrics_run is not None:
+        metrics = MetricsRecorder(Path(__file__).parent / args.metrics_file, args.metrics_run)
+        for host, (dns_seconds, connect_seconds) in timings.items():
+            metrics.record_host(host, dns_seconds, connect_seconds, failures.get(host, "ok"))
+        metrics.close()
+    live, slow = [], []
+    skipped: Counter = Counter()
+    for clinic in clinics:
+        reason = failures.get(url_host(clinic["website"])[0])
+        if reason is None:
+            live.append(clinic)
+        elif OUTCOMES[reason] == DEAD:
+            # A --refresh keeps what an earlier run found for the clinic
+            if clinic["id"] not in journal:
+                journal.append(build_result(clinic, None, "host_unreachable"))
+            skipped[reason] += 1
+        else:
+            slow.append(clinic)
+    print(
+        f"Host pre-pass ({time.monotonic() - started:.1f}s): {sum(skipped.values())} clinics on dead hosts "
+        f"skipped ({skipped['dns']} DNS, {skipped['unreachable']} unreachable), "
+        f"{len(slow)} on hosts that timed out deferred to the end"
+    )
+    return live + slow
+
+
+def get_api_key(provider: str) -> str:
+    """Read the provider's API key from the environment, exiting if missing."""
+    if provider == "openrouter":
+        api_key = os.environ.get("OPENROUTER_API_KEY")
+        if not api_key:
+            print("Error: OPENROUTER_API_KEY environment variable required")
+            print("Add OPENROUTER_API_KEY=sk-or-... to your .env.local file")
+            sys.exit(1)
+    elif provider == "openai":
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            print("Error: OPENAI_API_KEY environment variable required")
+            print("Add OPENAI_API_KEY=sk-... to your .env.local file")
+            sys.exit(1)
+    else:
+        api_key = os.environ.get("ANTHROPIC_API_KEY")
+        if not api_key:
+            print("Error: ANTHROPIC_API_KEY environment variable required")
+            sys.exit(1)
+    return api_key
+
+
+def create_llm_client(
+    provider: str,
+    base_url: str | None = None,
+    max_retries: int = 2,
+) -> tuple[Any, str]:
+    """Create the async LLM client.
+
+    Returns (client, api) where api is "openai" or "anthropic" — OpenRouter
+    uses the same OpenAI-compatible API. ``base_url`` points the client at
+    another server speaking the provider's API, such as a local stand-in.
+    Pass ``max_retries=0`` when a ProviderRateLimiter handles retries.
+    """
+    api_key = get_api_key(provider)
+    if provider == "openrouter":
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(
+            api_key=api_key, base_url=base_url or "https://openrouter.ai/api/v1", max_retries=max_retries
+        ), "openai"
+    if provider == "openai":
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=max_retries), "openai"
+    import anthropic
+    return anthropic.AsyncAnthropic(api_key=api_key, base_url=base_url, max_retries=max_retries), "anthropic"
+
+
+def open_llm_cache(args: argparse.Namespace) -> LLMCache | None:
+    """Open the persistent LLM cache unless --no-llm-cache was given."""
+    if args.no_llm_cache:
+        return None
+    llm_cache = LLMCache(
+        Path(__file__).parent / args.llm_cache, PROMPT_VERSION, args.llm_cache_max_mb * 1024 * 1024
+    )
+    if llm_cache.stale_purged:
+        print(f"Dropped {llm_cache.stale_purged} cached extractions from an older prompt")
+    return llm_cache
+
+
+async def crawl_and_extract(
+    args: argparse.Namespace,
+    model: str,
+    clinics: list[dict],
+    journal: ResultJournal,
+    previous: dict[str, dict[str, Any]] | None = None,
+    worker_id: int | None = None,
+) -> None:
+    """Set up the LLM client, HTTP client and browser, then run the pipeline.
+
+    ``previous`` holds the earlier results of the clinics in --refresh.
+    A --workers process passes its ``worker_id`` so its host stats go to
+    a file of its own.
+    """
+    # Retries are left to the rate limiter, which honours retry-after and
+    # backs the whole pool off together
+    llm_client, api = create_llm_client(args.provider, args.llm_base_url, max_retries=0)
+    # Explicit limits are shared out between --workers processes
+    workers = max(1, args.workers)
+    rate = ProviderRateLimiter(
+        args.llm_rpm / workers if args.llm_rpm else None,
+        args.llm_tpm / workers if args.llm_tpm else None,
+    )
+
+    browser_config = BrowserConfig(
+        headless=True,
+        verbose=False,
+        text_mode=True,
+        light_mode=True,
+    )
+    crawl_config = CrawlerRunConfig(
+        word_count_threshold=50,
+        page_timeout=10000,
+        wait_until="domcontentloaded",
+    )
+
+    # Pooled keep-alive client for the HTTP tier and sitemaps; httpx
+    # negotiates gzip/deflate, and brotli when the brotli package is present.
+    # Replays never touch the network.
+    http = None
+    if not args.replay:
+        http = httpx.AsyncClient(
+            timeout=10,
+            follow_redirects=True,
+            headers=HTTP_HEADERS,
+            limits=httpx.Limits(
+                max_connections=args.max_concurrent * args.max_per_host * 2,
+                max_keepalive_connections=args.max_concurrent * 2,
+            ),
+        )
+    archive = None
+    if args.replay or not args.no_archive:
+        archive = CrawlArchive(Path(__file__).parent / args.archive_dir)
+        if args.replay:
+            print(f"Replaying {len(archive)} archived fetches from {archive.root}")
+    crawl_limiter = AdaptiveLimiter(
+        "Crawl", initial=min(5, args.max_concurrent), maximum=args.max_concurrent, watch_memory=True,
+    )
+    llm_limiter = AdaptiveLimiter(
+        "LLM", initial=min(4, args.max_concurrent_llm), maximum=args.max_concurrent_llm,
+    )
+    llm_cache = open_llm_cache(args)
+    extractions = ExtractionCache(llm_cache, model)
+    packer = None
+    if args.pack_clinics > 1:
+        packer = PromptPacker(
+            llm_client, model, api, llm_limiter, args.pack_clinics,
+            rate=rate, structured=args.structured_output,
+        )
+
+    browser = BrowserPool(
+        browser_config, crawl_config,
+        size=args.max_concurrent * args.max_per_host,
+        memory_limit_mb=args.browser_memory_mb,
+    )
+    # The pool only launches Chromium on first use, so a replay never does
+    async with AsyncExitStack() as stack:
+        if http is not None:
+            await stack.enter_async_context(http)
+        await stack.enter_async_context(browser)
+        documents = None
+        if not args.replay and not args.no_documents:
+            documents = DocumentExtractor(args.document_workers)
+            stack.callback(documents.close)
+        pages = PageFetcher(
+            browser, clinics, args.max_per_host, http,
+            http_first=not args.browser_only,
+            archive=archive,
+            replay=args.replay,
+            refresh=args.refresh,
+            documents=documents,
+        )
+        rules = None if args.no_rules else RuleExtractor()
+        reducer = ContentReducer()
+        refresh = RefreshState(previous or {}) if args.refresh else None
+        stats = None
+        if not args.replay:
+            # Replayed crawls say nothing about how the hosts behave
+            stats_path = Path(__file__).parent / args.host_stats_file
+            stats = HostStats(
+                stats_path, worker_stats_path(stats_path, worker_id) if worker_id is not None else None,
+            )
+            stack.callback(stats.save)
+        metrics = None
+        if args.metrics_run is not None:
+            metrics = MetricsRecorder(Path(__file__).parent / args.metrics_file, args.metrics_run)
+            stack.callback(metrics.close)
+        if args.llm_batch:
+            pending = await crawl_for_batch(
+                pages, clinics, journal, crawl_limiter, extractions, rules, reducer, metrics, refresh,
+                stats, args.batch_size,
+            )
+            if pending:
+                await submit_llm_batch(
+                    llm_client, api, model, pending, llm_batch_dir(args), args.structured_output, args.refresh,
+                )
+        else:
+            await run_pipeline(
+                pages, llm_client, clinics, model, api,
+                journal, crawl_limiter, llm_limiter, extractions,
+                rules, reducer, packer, rate, args.structured_output, metrics, refresh,
+                stats, args.crawl_budget or None, args.tail_budget or None, args.batch_size,
+            )
+        print(f"Browser restarts for memory: {browser.recycles}")
+
+    if archive is not None:
+        archive.close()
+
+    if llm_cache is not None:
+        print(f"LLM cache: {llm_cache.hits} hits, {llm_cache.misses} misses, {len(llm_cache)} entries")
+        llm_cache.close()
+
+
+def shard_by_host(clinics: list[dict], workers: int) -> list[list[dict]]:
+    """Split clinics across workers, keeping each host in a single shard.
+
+    Same-host clinics must share a worker for the PageFetcher domain cache
+    and per-host politeness cap to keep working.
+    """
+    shards: list[list[dict]] = [[] for _ in range(workers)]
+    for clinic in clinics:
+        shards[zlib.crc32(get_host(clinic["website"]).encode()) % workers].append(clinic)
+    return shards
+
+
+def worker_journal_paths(journal_path: Path) -> list[Path]:
+    """Per-worker journals left next to the main journal."""
+    return sorted(journal_path.parent.glob(f"{journal_path.stem}.worker-*.jsonl"))
+
+
+def merge_worker_journals(journal: ResultJournal, replace: bool = False) -> int:
+    """Fold per-worker journals into the main journal, then delete them.
+
+    A clinic already in the main journal is skipped, so merging twice (for
+    instance after a crash during a merge) never duplicates records. With
+    ``replace`` (--refresh) worker records supersede the main journal's.
+    """
+    merged = 0
+    for path in worker_journal_paths(journal.path):
+        worker_journal = ResultJournal(path).open()
+        for record in worker_journal.records():
+            if replace or record["clinicId"] not in journal:
+                journal.append(record)
+                merged += 1
+        worker_journal.close()
+        path.unlink()
+        worker_journal.index_path.unlink(missing_ok=True)
+    return merged
+
+
+def run_worker(
+    worker_id: int,
+    args: argparse.Namespace,
+    model: str,
+    clinics: list[dict],
+    journal_path: Path,
+    previous: dict[str, dict[str, Any]] | None = None,
+) -> None:
+    """Entry point of one --workers process: its own browser and event loop."""
+    print(f"[worker {worker_id}] {len(clinics)} clinics")
+    journal = ResultJournal(journal_path).open()
+    try:
+        asyncio.run(crawl_and_extract(args, model, clinics, journal, previous, worker_id))
+    finally:
+        journal.close()
+
+
+def run_workers(
+    args: argparse.Namespace,
+    model: str,
+    clinics: list[dict],
+    journal: ResultJournal,
+    previous: dict[str, dict[str, Any]] | None = None,
+) -> None:
+    """Shard clinics across worker processes and merge their results."""
+    get_api_key(args.provider)  # fail fast before spawning
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for worker_id, shard in enumerate(shard_by_host(clinics, args.workers)):
+        if not shard:
+            continue
+        journal_path = journal.path.with_name(f"{journal.path.stem}.worker-{worker_id}.jsonl")
+        shard_previous = None
+        if previous is not None:
+            shard_previous = {c["id"]: previous[c["id"]] for c in shard if c["id"] in previous}
+        process = context.Process(
+            target=run_worker,
+            args=(worker_id, args, model, shard, journal_path, shard_previous),
+            name=f"crawl-worker-{worker_id}",
+        )
+        process.start()
+        processes.append(process)
+
+    for process in processes:
+        process.join()
+        if process.exitcode != 0:
+            print(f"Warning: {process.name} exited with code {process.exitcode}")
+
+    merged = merge_worker_journals(journal, replace=args.refresh)
+    merge_worker_stats(Path(__file__).parent / args.host_stats_file)
+    print(f"\nMerged {merged} results from {len(processes)} workers")
+    print(f"Total processed: {len(journal)}")
+    print_stats(journal)
 
 
 async def main():
     parser = argparse.ArgumentParser(description="Crawl clinic websites for insurance data")
-    parser.add_argument("--batch-size", type=int, default=500, help="Process in batches of N")
+    parser.add_argument("--batch-size", type=int, default=500, help="Print progress every N clinics")
     parser.add_argument("--provider", choices=["anthropic", "openai", "openrouter"], default="openrouter", help="LLM provider")
     parser.add_argument("--model", type=str, default=None, help="Model name (default: gpt-4o-mini for openai, haiku for anthropic)")
-    parser.add_argument("--max-concurrent", type=int, default=5, help="Max concurrent crawls")
+    parser.add_argument("--max-concurrent", type=int, default=20, help="Upper bound on adaptive crawl concurrency (per worker)")
+    parser.add_argument("--max-per-host", type=int, default=3, help="Max concurrent page loads per host")
+    parser.add_argument("--browser-only", action="store_true", help="Skip the plain-HTTP tier and render every page with crawl4ai")
+    parser.add_argument("--browser-memory-mb", type=int, default=2048, help="Restart the browser when its RSS passes this many MB")
+    parser.add_argument("--max-concurrent-llm", type=int, default=16, help="Upper bound on adaptive LLM concurrency (per worker)")
+    parser.add_argument("--workers", type=int, default=1, help="Shard clinics across N processes, each with its own browser")
     parser.add_argument("--offset", type=int, default=0, help="Start from clinic N (0-indexed)")
     parser.add_argument("--limit", type=int, default=0, help="Process only N clinics (0 = all)")
     parser.add_argument("--input", type=str, default="clinic-urls.json", help="Input JSON file name")
+    parser.add_argument("--output", type=str, default=None, help="Results file name; its journal is kept next to it as .jsonl (default: extraction-results.json)")
+    parser.add_argument("--llm-cache", type=str, default="llm-cache.sqlite", help="Persistent LLM extraction cache file")
+    parser.add_argument("--llm-cache-max-mb", type=int, default=256, help="Evict least recently used cache entries past this size")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Always call the LLM, without reading or writing the cache")
+    parser.add_argument("--structured-output", action="store_true", help="Constrain LLM replies to the extraction schema (OpenAI json_schema, Anthropic tool use)")
+    parser.add_argument("--pack-clinics", type=int, default=0, help="Extract up to N short clinics per LLM request (0 = one clinic per request)")
+    parser.add_argument("--llm-rpm", type=float, default=None, help="Requests per minute allowed by the LLM provider (default: learned from response headers)")
+    parser.add_argument("--llm-tpm", type=float, default=None, help="Tokens per minute allowed by the LLM provider (default: learned from response headers)")
+    parser.add_argument("--llm-batch", action="store_true", help="Crawl everything, then extract through the provider's batch API (submit, poll, collect)")
+    parser.add_argument("--llm-batch-dir", type=str, default="llm-batch", help="Directory --llm-batch keeps its request file and pending batch state in")
+    parser.add_argument("--batch-poll-seconds", type=float, default=60, help="How often --llm-batch checks on the submitted batch")
+    parser.add_argument("--llm-base-url", type=str, default=None, help="Send LLM requests to this API base URL instead (e.g. a local stand-in server)")
+    parser.add_argument("--no-rules", action="store_true", help="Send every clinic to the LLM, skipping the rule-based extractor")
+    parser.add_argument("--clear-llm-cache", action="store_true", help="Empty the LLM cache and exit")
+    parser.add_argument("--compact", action="store_true", help="Compact the result journal into extraction-results.json and exit")
+    parser.add_argument("--no-documents", action="store_true", help="Don't download and read insurance PDFs linked from clinic sites")
+    parser.add_argument("--document-workers", type=int, default=DOCUMENT_WORKERS, help="Processes extracting PDF text (per worker)")
+    parser.add_argument("--archive-dir", type=str, default="crawl-archive", help="Directory every fetched page is archived in")
+    parser.add_argument("--no-archive", action="store_true", help="Don't archive fetched pages")
+    parser.add_argument("--no-host-probe", action="store_true", help="Skip the DNS/TCP reachability pre-pass and crawl every host")
+    parser.add_argument("--host-probe-timeout", type=float, default=5, help="Seconds each DNS lookup and connect of the pre-pass may take")
+    parser.add_argument("--host-probe-concurrency", type=int, default=100, help="Hosts probed at once by the pre-pass")
+    parser.add_argument("--dead-hosts-file", type=str, default="dead-hosts.json", help="Negative cache of hosts the pre-pass found dead")
+    parser.add_argument("--dead-host-ttl-hours", type=float, default=DEAD_HOST_TTL_HOURS, help="Re-probe a dead host after this many hours")
+    parser.add_argument("--metrics-file", type=str, default="crawl-metrics.jsonl", help="Append per-clinic timing, token and cost metrics here (NDJSON)")
+    parser.add_argument("--no-metrics", action="store_true", help="Don't record per-clinic metrics")
+    parser.add_argument("--prometheus-textfile", type=str, default=None, help="Also write the run's metrics summary to this Prometheus textfile")
+    parser.add_argument("--crawl-budget", type=float, default=CRAWL_BUDGET, help="Seconds one clinic's crawl may take before it is moved to the tail (0 = no limit)")
+    parser.add_argument("--tail-budget", type=float, default=TAIL_BUDGET, help="Seconds each clinic gets when the tail of over-budget crawls is retried (0 = no limit)")
+    parser.add_argument("--host-stats-file", type=str, default="host-stats.json", help="Per-host crawl time, timeout and yield history used to order clinics")
+    parser.add_argument("--no-schedule", action="store_true", help="Process clinics in input order instead of fastest, highest-yield hosts first")
+    parser.add_argument("--refresh", action="store_true", help="Re-crawl processed clinics with conditional requests; re-extract only those whose content changed")
+    parser.add_argument("--replay", action="store_true", help="Re-run extraction over archived pages only, with no network or browser")
     args = parser.parse_args()
+    # Tags this run's lines in the metrics file, across --workers processes
+    args.metrics_run = None if args.no_metrics else time.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
 
     # Resolve model name
     if args.model is None:
@@ -341,8 +2902,39 @@ async def main():
         model = args.model
 
     script_dir = Path(__file__).parent
+    if args.clear_llm_cache:
+        llm_cache = LLMCache(script_dir / args.llm_cache, PROMPT_VERSION, args.llm_cache_max_mb * 1024 * 1024)
+        print(f"Removed {llm_cache.clear()} cached extractions")
+        llm_cache.close()
+        return
+
     urls_path = script_dir / args.input
-    results_path = script_dir / "extraction-results.json"
+    # A replay writes its own results so every clinic is re-extracted and
+    # the live results are left alone
+    results_name = "extraction-results-replay.json" if args.replay else "extraction-results.json"
+    results_path = script_dir / (args.output or results_name)
+    journal_path = results_path.with_suffix(".jsonl")
+    if args.replay and not (script_dir / args.archive_dir / "index.jsonl").exists():
+        print(f"Error: no crawl archive in {script_dir / args.archive_dir} to replay.")
+        sys.exit(1)
+
+    is_new_journal = not journal_path.exists()
+    journal = ResultJournal(journal_path).open()
+    if is_new_journal and results_path.exists():
+        imported = journal.import_snapshot(results_path)
+        print(f"Seeded result journal with {imported} records from {results_path.name}")
+
+    # Results from workers of an interrupted --workers run; they predate
+    # this run, so they never supersede the main journal, even with --refresh
+    recovered = merge_worker_journals(journal)
+    if recovered:
+        print(f"Recovered {recovered} results from worker journals")
+
+    if args.compact:
+        count = journal.compact(results_path)
+        journal.close()
+        print(f"Compacted {count} records into {results_path}")
+        return
 
     if not urls_path.exists():
         print(f"Error: {urls_path} not found. Run export-urls.ts first.")
@@ -357,113 +2949,71 @@ async def main():
     if args.limit > 0:
         clinics_to_process = clinics_to_process[:args.limit]
 
-    # Load existing results for resume
-    existing_results = load_existing_results(results_path)
-    remaining = [c for c in clinics_to_process if c["id"] not in existing_results]
+    # Resume: skip clinics already in the journal, unless refreshing them
+    previous = None
+    if args.refresh:
+        if args.replay or args.no_archive:
+            print("Error: --refresh needs the crawl archive's validators; drop --replay / --no-archive")
+            sys.exit(1)
+        remaining = clinics_to_process
+        ids = {c["id"] for c in remaining}
+        previous = {r["clinicId"]: r for r in journal.records() if r["clinicId"] in ids}
+    else:
+        remaining = [c for c in clinics_to_process if c["id"] not in journal]
 
     print(f"Total clinics: {len(all_clinics)}")
-    print(f"Already processed: {len(existing_results)}")
+    print(f"Already processed: {len(journal)}")
     print(f"Remaining to process: {len(remaining)}")
     print(f"Provider: {args.provider}")
     print(f"Model: {model}")
-    print(f"Max concurrent: {args.max_concurrent}")
-    print(f"Batch size: {args.batch_size}")
+    print(f"Max concurrent (adaptive): {args.max_concurrent} crawls, {args.max_concurrent_llm} LLM requests")
+    if args.workers > 1:
+        print(f"Workers: {args.workers} (limits above apply per worker)")
+    print(f"Progress every: {args.batch_size} clinics")
     print()
 
     if not remaining:
         print("All clinics already processed!")
+        journal.close()
         return
 
-    # Initialize LLM client
-    if args.provider == "openrouter":
-        api_key = os.environ.get("OPENROUTER_API_KEY")
-        if not api_key:
-            print("Error: OPENROUTER_API_KEY environment variable required")
-            print("Add OPENROUTER_API_KEY=sk-or-... to your .env.local file")
-            sys.exit(1)
-        from openai import OpenAI
-        llm_client = OpenAI(
-            api_key=api_key,
-            base_url="https://openrouter.ai/api/v1",
+    # Host stats left by the workers of an interrupted --workers run
+    merge_worker_stats(script_dir / args.host_stats_file)
+    if not args.no_schedule:
+        # Historically fast, high-yield hosts first
+        remaining = HostStats(script_dir / args.host_stats_file).order(
+            remaining, lambda clinic: get_host(clinic["website"])
         )
-        # OpenRouter uses the same OpenAI-compatible API
-        args.provider = "openai"
-    elif args.provider == "openai":
-        api_key = os.environ.get("OPENAI_API_KEY")
-        if not api_key:
-            print("Error: OPENAI_API_KEY environment variable required")
-            print("Add OPENAI_API_KEY=sk-... to your .env.local file")
-            sys.exit(1)
-        from openai import OpenAI
-        llm_client = OpenAI(api_key=api_key)
-    else:
-        api_key = os.environ.get("ANTHROPIC_API_KEY")
-        if not api_key:
-            print("Error: ANTHROPIC_API_KEY environment variable required")
-            sys.exit(1)
-        import anthropic
-        llm_client = anthropic.Anthropic(api_key=api_key)
 
-    semaphore = asyncio.Semaphore(args.max_concurrent)
+    if not args.replay and not args.no_host_probe:
+        remaining = await probe_clinic_hosts(args, remaining, journal)
+        if not remaining:
+            journal.close()
+            return
 
-    browser_config = BrowserConfig(
-        headless=True,
-        verbose=False,
-    )
-    crawl_config = CrawlerRunConfig(
-        word_count_threshold=50,
-        page_timeout=10000,
-        wait_until="domcontentloaded",
-    )
-
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        # Process in batches
-        for batch_start in range(0, len(remaining), args.batch_size):
-            batch = remaining[batch_start : batch_start + args.batch_size]
-            batch_num = batch_start // args.batch_size + 1
-            total_batches = (len(remaining) + args.batch_size - 1) // args.batch_size
-
-            print(f"\n{'='*60}")
-            print(f"Batch {batch_num}/{total_batches} ({len(batch)} clinics)")
-            print(f"{'='*60}\n")
-
-            start_time = time.time()
-
-            tasks = [
-                process_clinic(crawler, llm_client, clinic, model, args.provider, crawl_config, semaphore)
-                for clinic in batch
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            for result in results:
-                if isinstance(result, Exception):
-                    print(f"  Task exception: {result}")
-                    continue
-                if result is not None:
-                    existing_results[result["clinicId"]] = result
-
-            # Save after each batch
-            save_results(results_path, existing_results)
-
-            elapsed = time.time() - start_time
-            print(f"\nBatch {batch_num} done in {elapsed:.1f}s")
-            print(f"Total processed: {len(existing_results)}")
-
-            # Stats
-            with_insurance = sum(
-                1
-                for r in existing_results.values()
-                if r.get("extraction") and r["extraction"].get("insuranceProviders")
-            )
-            with_payment = sum(
-                1
-                for r in existing_results.values()
-                if r.get("extraction") and r["extraction"].get("paymentMethods")
-            )
-            print(f"With insurance data: {with_insurance}")
-            print(f"With payment data: {with_payment}")
-
-    print(f"\nDone! Results saved to {results_path}")
+    if args.llm_batch:
+        if args.provider == "openrouter":
+            print("Error: --llm-batch needs --provider openai or anthropic; OpenRouter has no batch API")
+            sys.exit(1)
+        if args.workers > 1:
+            print("Note: --workers is ignored with --llm-batch")
+        await run_llm_batch(args, model, remaining, journal, previous)
+    elif args.workers > 1:
+        run_workers(args, model, remaining, journal, previous)
+    else:
+        await crawl_and_extract(args, model, remaining, journal, previous)
+
+    count = journal.compact(results_path)
+    journal.close()
+    print(f"\nDone! {count} results saved to {results_path}")
+
+    metrics_path = script_dir / args.metrics_file
+    if args.metrics_run is not None and metrics_path.exists():
+        summary = crawl_metrics.summarize(metrics_path, args.metrics_run)
+        crawl_metrics.print_summary(summary)
+        if args.prometheus_textfile:
+            crawl_metrics.write_prometheus(Path(args.prometheus_textfile), summary)
+            print(f"Metrics exported to {args.prometheus_textfile}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+"""
+On-disk archive of every page crawl.py fetches, for offline replay.
+
+Layout under the archive directory:
+
+  index.jsonl              one line per fetch: url, status, tier, fetchedAt, blob,
+                           and the response's etag / lastModified validators
+  blobs/ab/abcdef….json.gz gzipped {"html", "markdown", "links"} for a page
+
+Blobs are content-addressed (SHA-256 of their JSON), so identical pages served
+under several URLs — common on multi-location hospital sites — are stored once.
+Fetches that produced no page (404, blocked, timed out) are indexed with a null
+blob, which lets replay tell "this page didn't exist" from "never fetched".
+The newest index line for a URL wins.
+
+The validators let crawl.py --refresh send conditional requests: a 304 means
+the archived blob is still the page.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+
+def archive_key(url: str) -> str:
+    """Normalize a URL the same way PageFetcher keys its cache."""
+    return url.rstrip("/").lower()
+
+
+class CrawlArchive:
+    """Append-only page archive with an in-memory URL index."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.blob_dir = root / "blobs"
+        self.index_path = root / "index.jsonl"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self._index: dict[str, dict[str, Any]] = {}
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn write at the tail
+                    self._index[archive_key(entry["url"])] = entry
+        self._index_file = open(self.index_path, "a")
+
+    def close(self) -> None:
+        self._index_file.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, url: str) -> bool:
+        return archive_key(url) in self._index
+
+    def record(
+        self,
+        url: str,
+        status: int | None,
+        tier: str,
+        html: str = "",
+        markdown: str = "",
+        links: list[dict[str, str]] | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """Store one fetch. Pass empty content for fetches that found nothing."""
+        blob = None
+        if html or markdown:
+            blob = self._write_blob({"html": html, "markdown": markdown, "links": links or []})
+        entry = {
+            "url": url,
+            "status": status,
+            "tier": tier,
+            "fetchedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "blob": blob,
+        }
+        if etag:
+            entry["etag"] = etag
+        if last_modified:
+            entry["lastModified"] = last_modified
+        self._index[archive_key(url)] = entry
+        # One short line per write keeps appends from --workers processes whole
+        self._index_file.write(json.dumps(entry) + "\n")
+        self._index_file.flush()
+
+    def entry(self, url: str) -> dict[str, Any] | None:
+        """Index entry for a URL, or None if it was never fetched."""
+        return self._index.get(archive_key(url))
+
+    def load(self, url: str) -> dict[str, Any] | None:
+        """Archived {"html", "markdown", "links"} for a URL, or None."""
+        entry = self.entry(url)
+        if entry is None or entry["blob"] is None:
+            return None
+        with gzip.open(self._blob_path(entry["blob"]), "rt") as f:
+            return json.load(f)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / f"{digest}.json.gz"
+
+    def _write_blob(self, record: dict[str, Any]) -> str:
+        payload = json.dumps(record, sort_keys=True).encode()
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        return digest
@@ -0,0 +1,330 @@
+"""
+Per-clinic timing, token and cost metrics for crawl.py.
+
+Every clinic gets a ClinicMetrics record while it is processed. The record
+is found through the ``current`` context variable, so the code that does
+the work (PageFetcher, ask_openai/ask_anthropic) records into it without
+the record being passed down: record_fetch, record_content and record_llm
+are no-ops when no clinic is being measured. Fetch tasks shared between
+clinics on one host inherit the context of the clinic that started them,
+so a shared page is counted once, for that clinic.
+
+Finished records are appended as NDJSON lines to crawl-metrics.jsonl, one
+"clinic" line per clinic and one "host" line per host checked by the
+reachability pre-pass, each tagged with the run it belongs to. At the end
+of a run, summarize() reads back that run's lines (from every --workers
+process) and reports p50/p95/p99 per stage; write_prometheus() exports the
+same summary in the Prometheus textfile format.
+
+Costs are estimated from LLM_PRICES; models missing from it have no cost.
+"""
+
+import json
+import os
+import statistics
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+# USD per million (input, output) tokens, matched by model name prefix
+LLM_PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "openai/gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "openai/gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "claude-haiku-4-5": (1.00, 5.00),
+    "anthropic/claude-haiku-4.5": (1.00, 5.00),
+    "claude-3-5-haiku": (0.80, 4.00),
+    "claude-sonnet-4-5": (3.00, 15.00),
+    "anthropic/claude-sonnet-4.5": (3.00, 15.00),
+}
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Distributions reported by summarize(): name -> (record type, field, help)
+DISTRIBUTIONS: dict[str, tuple[str, str, str]] = {
+    "dns_seconds": ("host", "dns_seconds", "DNS lookup time per host (pre-pass)"),
+    "connect_seconds": ("host", "connect_seconds", "TCP/TLS connect time per host (pre-pass)"),
+    "clinic_seconds": ("clinic", "seconds", "Wall time per clinic from crawl start to result"),
+    "crawl_seconds": ("clinic", "crawl_seconds", "Crawl stage wall time per clinic"),
+    "http_fetch_seconds": ("fetch:http", "seconds", "Plain-HTTP fetch time per URL"),
+    "browser_fetch_seconds": ("fetch:browser", "seconds", "Browser render time per URL"),
+    "pdf_fetch_seconds": ("fetch:pdf", "seconds", "PDF download and text extraction time per document"),
+    "page_bytes": ("fetch", "bytes", "Downloaded size per fetched URL"),
+    "markdown_chars": ("fetch", "markdown_chars", "Markdown size per fetched URL"),
+    "content_tokens": ("clinic", "content_tokens", "LLM input content tokens per clinic"),
+    "llm_seconds": ("clinic", "llm_seconds", "LLM wall time per clinic (its share of a packed request), retries included"),
+    "input_tokens": ("clinic", "input_tokens", "LLM input tokens per clinic"),
+    "output_tokens": ("clinic", "output_tokens", "LLM output tokens per clinic"),
+    "llm_retries": ("clinic", "llm_retries", "LLM retries per clinic"),
+}
+
+
+def llm_cost(model: str, input_tokens: int, output_tokens: int) -> float | None:
+    """Estimated USD cost of a request, or None for an unpriced model."""
+    for prefix in sorted(LLM_PRICES, key=len, reverse=True):
+        if model.startswith(prefix):
+            input_price, output_price = LLM_PRICES[prefix]
+            return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+    return None
+
+
+@dataclass
+class ClinicMetrics:
+    """What one clinic cost, stage by stage."""
+
+    clinic_id: str
+    host: str
+    # Wall time from the start of the crawl to the result, queues included
+    seconds: float = 0.0
+    crawl_seconds: float = 0.0
+    # {"url", "tier", "seconds", "bytes", "markdown_chars", "status"} per fetch
+    # this clinic started; a page shared with an earlier clinic isn't here
+    fetches: list[dict[str, Any]] = field(default_factory=list)
+    content_tokens: int = 0
+    source: str | None = None
+    # A packed request's wall time and tokens are split evenly between its
+    # clinics; the request and its retries count once, on its first clinic
+    llm_seconds: float = 0.0
+    llm_requests: int = 0
+    llm_retries: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float | None = None
+
+    def add_llm(
+        self,
+        seconds: float,
+        attempts: int,
+        input_tokens: int,
+        output_tokens: int,
+        model: str,
+        requests: int = 1,
+    ) -> None:
+        self.llm_seconds = round(self.llm_seconds + seconds, 3)
+        self.llm_requests += requests
+        self.llm_retries += max(0, attempts - 1)
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        cost = llm_cost(model, input_tokens, output_tokens)
+        if cost is not None:
+            self.cost_usd = (self.cost_usd or 0.0) + cost
+
+
+class SharedMetrics:
+    """A packed LLM request, its time, tokens and cost split between its clinics.
+
+    The request itself, and its retries, are counted once, on the first
+    clinic, which also takes the tokens left over by the split.
+    """
+
+    def __init__(self, shares: list[ClinicMetrics]):
+        self.shares = shares
+
+    def add_llm(self, seconds: float, attempts: int, input_tokens: int, output_tokens: int, model: str) -> None:
+        n = len(self.shares)
+        for i, share in enumerate(self.shares):
+            first = i == 0
+            share.add_llm(
+                seconds / n,
+                attempts if first else 1,
+                input_tokens // n + (input_tokens % n if first else 0),
+                output_tokens // n + (output_tokens % n if first else 0),
+                model,
+                1 if first else 0,
+            )
+
+
+current: ContextVar[ClinicMetrics | SharedMetrics | None] = ContextVar("clinic_metrics", default=None)
+
+
+def record_fetch(
+    url: str,
+    tier: str,
+    seconds: float,
+    size: int = 0,
+    markdown_chars: int = 0,
+    status: int | None = None,
+) -> None:
+    metrics = current.get()
+    if isinstance(metrics, ClinicMetrics):
+        metrics.fetches.append({
+            "url": url,
+            "tier": tier,
+            "seconds": round(seconds, 3),
+            "bytes": size,
+            "markdown_chars": markdown_chars,
+            "status": status,
+        })
+
+
+def record_crawl(seconds: float) -> None:
+    metrics = current.get()
+    if isinstance(metrics, ClinicMetrics):
+        metrics.crawl_seconds = round(metrics.crawl_seconds + seconds, 3)
+
+
+def record_content(tokens: int) -> None:
+    metrics = current.get()
+    if isinstance(metrics, ClinicMetrics):
+        metrics.content_tokens = tokens
+
+
+def record_source(source: str) -> None:
+    """How the clinic's extraction was produced (rules, cache, packed, llm)."""
+    metrics = current.get()
+    if isinstance(metrics, ClinicMetrics):
+        metrics.source = source
+
+
+def record_llm(seconds: float, attempts: int, input_tokens: int, output_tokens: int, model: str) -> None:
+    metrics = current.get()
+    if metrics is not None:
+        metrics.add_llm(seconds, attempts, input_tokens, output_tokens, model)
+
+
+class MetricsRecorder:
+    """Appends ClinicMetrics and pre-pass host timings to an NDJSON file."""
+
+    def __init__(self, path: Path, run_id: str):
+        self.path = path
+        self.run_id = run_id
+        self._open: dict[str, ClinicMetrics] = {}
+        self._started: dict[str, float] = {}
+        self._file = open(path, "a")
+
+    def begin(self, clinic: dict, host: str) -> ClinicMetrics:
+        """Start measuring ``clinic`` in the current context.
+
+        A clinic crawled again (the straggler tail) adds to its record.
+        """
+        metrics = self._open.get(clinic["id"])
+        if metrics is None:
+            metrics = self._open[clinic["id"]] = ClinicMetrics(clinic["id"], host)
+            self._started[clinic["id"]] = time.monotonic()
+        current.set(metrics)
+        return metrics
+
+    def resume(self, clinic: dict) -> None:
+        """Measure ``clinic`` again, in another stage's context."""
+        current.set(self._open.get(clinic["id"]))
+
+    def finish(self, clinic_id: str, error: str | None) -> None:
+        metrics = self._open.pop(clinic_id, None)
+        if metrics is not None:
+            metrics.seconds = round(time.monotonic() - self._started.pop(clinic_id), 3)
+            self._write({"type": "clinic", "error": error, **asdict(metrics)})
+
+    def record_host(self, host: str, dns_seconds: float | None, connect_seconds: float | None, outcome: str) -> None:
+        self._write({
+            "type": "host",
+            "host": host,
+            "dns_seconds": dns_seconds,
+            "connect_seconds": connect_seconds,
+            "outcome": outcome,
+        })
+
+    def _write(self, record: dict[str, Any]) -> None:
+        # One write per line keeps lines from --workers processes whole
+        self._file.write(json.dumps({"run": self.run_id, "time": round(time.time(), 3), **record}) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _quantiles(values: list[float]) -> list[float]:
+    if len(values) == 1:
+        return [values[0]] * len(QUANTILES)
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return [cuts[round(q * 100) - 1] for q in QUANTILES]
+
+
+def summarize(path: Path, run_id: str) -> dict[str, Any]:
+    """Distributions and totals of one run's metrics lines."""
+    values: dict[str, list[float]] = {name: [] for name in DISTRIBUTIONS}
+    outcomes: dict[str, int] = {}
+    totals = {"input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "llm_retries": 0}
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("run") != run_id:
+                continue
+            kind = record["type"]
+            if kind == "clinic":
+                outcome = record["error"] or record["source"] or "ok"
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                for key in totals:
+                    totals[key] += record[key] or 0
+            for name, (source, key, _) in DISTRIBUTIONS.items():
+                if source == kind and record.get(key) is not None:
+                    values[name].append(record[key])
+                elif source.startswith("fetch") and kind == "clinic":
+                    tier = source.partition(":")[2]
+                    values[name].extend(
+                        fetch[key] for fetch in record["fetches"]
+                        if fetch.get(key) is not None and (not tier or fetch["tier"] == tier)
+                    )
+    return {
+        "distributions": {
+            name: {"quantiles": _quantiles(v), "sum": sum(v), "count": len(v)}
+            for name, v in values.items() if v
+        },
+        "outcomes": outcomes,
+        "totals": totals,
+    }
+
+
+def print_summary(summary: dict[str, Any]) -> None:
+    header = "  ".join(f"p{round(q * 100)}".rjust(10) for q in QUANTILES)
+    print(f"\n{'metric':<24}{header}  {'count':>8}")
+    for name, dist in summary["distributions"].items():
+        digits = 3 if name.endswith("seconds") else 0
+        row = "  ".join(f"{value:>10.{digits}f}" for value in dist["quantiles"])
+        print(f"{name:<24}{row}  {dist['count']:>8}")
+    totals = summary["totals"]
+    print(
+        f"LLM: {totals['input_tokens']} input + {totals['output_tokens']} output tokens, "
+        f"{totals['llm_retries']} retries, "
+        f"~${totals['cost_usd']:.4f}"
+    )
+    print("Clinics by outcome: " + ", ".join(f"{k} {v}" for k, v in sorted(summary["outcomes"].items())))
+
+
+def write_prometheus(path: Path, summary: dict[str, Any], prefix: str = "crawl_insurance") -> None:
+    """Write ``summary`` in the Prometheus textfile format, atomically."""
+    lines = []
+    for name, dist in summary["distributions"].items():
+        metric = f"{prefix}_{name}"
+        lines.append(f"# HELP {metric} {DISTRIBUTIONS[name][2]}")
+        lines.append(f"# TYPE {metric} summary")
+        for q, value in zip(QUANTILES, dist["quantiles"]):
+            lines.append(f'{metric}{{quantile="{q}"}} {value}')
+        lines.append(f"{metric}_sum {dist['sum']}")
+        lines.append(f"{metric}_count {dist['count']}")
+
+    lines.append(f"# HELP {prefix}_clinics_total Clinics processed, by outcome")
+    lines.append(f"# TYPE {prefix}_clinics_total counter")
+    for outcome, count in sorted(summary["outcomes"].items()):
+        lines.append(f'{prefix}_clinics_total{{outcome="{outcome}"}} {count}')
+    totals = summary["totals"]
+    lines.append(f"# HELP {prefix}_llm_tokens_total LLM tokens used")
+    lines.append(f"# TYPE {prefix}_llm_tokens_total counter")
+    lines.append(f'{prefix}_llm_tokens_total{{direction="input"}} {totals["input_tokens"]}')
+    lines.append(f'{prefix}_llm_tokens_total{{direction="output"}} {totals["output_tokens"]}')
+    for key, help_text in (
+        ("llm_retries", "LLM requests retried"),
+        ("cost_usd", "Estimated LLM cost in USD"),
+    ):
+        lines.append(f"# HELP {prefix}_{key}_total {help_text}")
+        lines.append(f"# TYPE {prefix}_{key}_total counter")
+        lines.append(f"{prefix}_{key}_total {totals[key]}")
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
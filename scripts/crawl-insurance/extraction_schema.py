@@ -0,0 +1,180 @@
+"""
+The extraction schema shared by every path that produces an extraction.
+
+EXTRACTION_SCHEMA is the JSON Schema of one clinic's extraction. crawl.py
+sends it to the providers in --structured-output mode (OpenAI's json_schema
+response format, an Anthropic tool's input_schema), and every reply, from
+either mode, the packed prompts or the batch API, is checked against it by
+validate_extraction before it is stored.
+
+repair_json recovers what it can from a reply that isn't valid JSON, most
+often one cut off by max_tokens: open arrays and objects are closed, and
+if that doesn't parse, or the cut fell inside a string, the reply is cut
+back to the last complete element and closed there. An object it had to
+complete comes back as a RepairedJSON, and only for those does
+validate_extraction fill in missing fields, at low confidence; a complete
+reply lacking a required field is rejected.
+"""
+
+import json
+from typing import Any
+
+EXTRACTION_CONFIDENCE = ["high", "medium", "low", "none"]
+
+EXTRACTION_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "insuranceProviders": {"type": "array", "items": {"type": "string"}},
+        "otherInsurance": {"type": "array", "items": {"type": "string"}},
+        "paymentMethods": {"type": "array", "items": {"type": "string"}},
+        "acceptsNewPatients": {"type": ["boolean", "null"]},
+        "confidence": {"type": "string", "enum": EXTRACTION_CONFIDENCE},
+    },
+    "required": [
+        "insuranceProviders", "otherInsurance", "paymentMethods", "acceptsNewPatients", "confidence",
+    ],
+    "additionalProperties": False,
+}
+
+# Filled in for fields missing from a truncated reply; an extraction that
+# needed any of them is marked low confidence
+MISSING_FIELD_DEFAULTS: dict[str, Any] = {
+    "insuranceProviders": [],
+    "otherInsurance": [],
+    "paymentMethods": [],
+    "acceptsNewPatients": None,
+    "confidence": "low",
+}
+
+JSON_TYPES: dict[str, tuple[type, ...]] = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+
+
+class RepairedJSON(dict):
+    """A JSON object repair_json had to complete; fields may be missing."""
+
+
+def packed_schema(keys: list[str]) -> dict[str, Any]:
+    """Schema of a packed reply: one extraction per clinic key."""
+    return {
+        "type": "object",
+        "properties": {key: EXTRACTION_SCHEMA for key in keys},
+        "required": list(keys),
+        "additionalProperties": False,
+    }
+
+
+def matches_schema(value: Any, schema: dict[str, Any]) -> bool:
+    """Check ``value`` against the subset of JSON Schema used here."""
+    types = schema.get("type")
+    if types is not None:
+        if isinstance(types, str):
+            types = [types]
+        if not any(isinstance(value, JSON_TYPES[t]) for t in types):
+            return False
+    if "enum" in schema and value not in schema["enum"]:
+        return False
+    if isinstance(value, list) and "items" in schema:
+        return all(matches_schema(item, schema["items"]) for item in value)
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        if any(key not in value for key in schema.get("required", [])):
+            return False
+        for key, item in value.items():
+            if key in properties:
+                if not matches_schema(item, properties[key]):
+                    return False
+            elif schema.get("additionalProperties") is False:
+                return False
+    return True
+
+
+def validate_extraction(value: Any, repaired: bool = False) -> dict[str, Any] | None:
+    """Return ``value`` as a valid extraction, or None if it can't be one.
+
+    Unknown fields are dropped and a field of the wrong type makes the
+    whole extraction invalid. A missing field does too, unless the reply
+    was cut off (``repaired``, or ``value`` is a RepairedJSON): then it is
+    filled from MISSING_FIELD_DEFAULTS and the extraction marked low
+    confidence, as long as at least one field made it through.
+    """
+    if not isinstance(value, dict):
+        return None
+    repaired = repaired or isinstance(value, RepairedJSON)
+    missing = [key for key in EXTRACTION_SCHEMA["required"] if key not in value]
+    if missing and (not repaired or len(missing) == len(EXTRACTION_SCHEMA["required"])):
+        return None
+    extraction = {
+        key: value.get(key, default) for key, default in MISSING_FIELD_DEFAULTS.items()
+    }
+    if missing:
+        extraction["confidence"] = "low"
+    if not matches_schema(extraction, EXTRACTION_SCHEMA):
+        return None
+    return extraction
+
+
+def repair_json(text: str) -> Any:
+    """Parse JSON text, completing it if it was cut off.
+
+    Raises json.JSONDecodeError when nothing can be recovered.
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        error = e
+    start = min((i for i in (text.find("{"), text.find("[")) if i != -1), default=-1)
+    if start == -1:
+        raise error
+    text = text[start:]
+
+    # Scan once, noting where each element ends and what is open there
+    stack: list[str] = []
+    cut_points: list[tuple[int, list[str]]] = []
+    in_string = escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                # A complete value followed by trailing prose
+                return json.loads(text[:i + 1])
+            cut_points.append((i + 1, list(stack)))
+        elif char == ",":
+            cut_points.append((i, list(stack)))
+
+    # A string cut off mid-word is dropped rather than kept half-written
+    candidates = [] if in_string else [_close(text, stack)]
+    candidates += [_close(text[:index], open_) for index, open_ in reversed(cut_points)]
+    for candidate in candidates:
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        return RepairedJSON(value) if isinstance(value, dict) else value
+    raise error
+
+
+def _close(text: str, stack: list[str]) -> str:
+    text = text.rstrip().rstrip(",")
+    if text.endswith(":"):
+        # A key whose value never arrived
+        text = text[:text.rstrip(":").rstrip().rfind('"', 0, -1)].rstrip().rstrip(",")
+    return text + "".join(reversed(stack))
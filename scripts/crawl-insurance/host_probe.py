@@ -0,0 +1,202 @@
+"""
+Reachability pre-pass for crawl.py: finds dead clinic hosts before crawling.
+
+A dead or parked domain otherwise costs a browser page, several page
+timeouts and the site-root fallback before it comes back as no_content.
+Every unique host is instead checked up front, concurrently:
+
+1. DNS: the name is resolved. NXDOMAIN or no address means the domain is
+   gone.
+2. TCP/TLS: a connection is opened to the URL's port (443 with a TLS
+   handshake, or 80), then to the other one. Certificates aren't verified;
+   the question is only whether anything answers.
+
+The outcome is one of
+
+  dns          the name doesn't resolve                     -> skipped
+  unreachable  nothing accepts connections on 80 or 443     -> skipped
+  timeout      DNS or connects timed out (maybe transient)  -> crawled last
+
+Failures are remembered in a JSON negative cache (dead-hosts.json) for a
+TTL, so later runs skip known-dead hosts without probing them again; a
+host that answers is dropped from it.
+
+DNS goes through getaddrinfo on a thread pool sized to the probe
+concurrency, which keeps the stdlib resolver's blocking calls off the
+event loop without adding a resolver dependency.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+DEAD = "dead"
+SLOW = "slow"
+# Probe outcome -> what the crawl does with the host's clinics
+OUTCOMES = {"dns": DEAD, "unreachable": DEAD, "timeout": SLOW}
+
+# getaddrinfo errors that mean the name doesn't exist, not a resolver hiccup
+DNS_NOT_FOUND = {
+    getattr(socket, name) for name in ("EAI_NONAME", "EAI_NODATA", "EAI_FAIL") if hasattr(socket, name)
+}
+
+
+def url_host(url: str) -> tuple[str, int]:
+    """(host, port) a clinic URL is fetched from."""
+    if not url.startswith("http"):
+        url = f"https://{url}"
+    parsed = urlparse(url)
+    default_port = 80 if parsed.scheme == "http" else 443
+    return (parsed.hostname or "").lower(), parsed.port or default_port
+
+
+class DeadHostCache:
+    """Persistent host -> probe failure map whose entries expire after a TTL."""
+
+    def __init__(self, path: Path, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._hosts: dict[str, dict] = {}
+        if path.exists():
+            with open(path) as f:
+                self._hosts = json.load(f)
+
+    def get(self, host: str) -> str | None:
+        """The cached failure of ``host``, or None if unknown or expired."""
+        entry = self._hosts.get(host)
+        if entry is None or time.time() - entry["checked"] > self.ttl:
+            return None
+        return entry["reason"]
+
+    def mark_dead(self, host: str, reason: str) -> None:
+        previous = self._hosts.get(host, {})
+        self._hosts[host] = {
+            "reason": reason,
+            "checked": time.time(),
+            "failures": previous.get("failures", 0) + 1,
+        }
+
+    def mark_alive(self, host: str) -> None:
+        self._hosts.pop(host, None)
+
+    def save(self) -> None:
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._hosts, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class HostProber:
+    """Concurrent DNS + TCP/TLS reachability checks."""
+
+    def __init__(self, concurrency: int = 100, timeout: float = 5.0):
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._resolver = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="dns")
+        self._tls = ssl.create_default_context()
+        self._tls.check_hostname = False
+        self._tls.verify_mode = ssl.CERT_NONE
+        # host -> (DNS seconds, connect seconds) of hosts that got that far
+        self.timings: dict[str, tuple[float | None, float | None]] = {}
+
+    def close(self) -> None:
+        self._resolver.shutdown(wait=False, cancel_futures=True)
+
+    async def probe(self, host: str, port: int = 443) -> str | None:
+        """The failure reason for ``host`` (see OUTCOMES), or None if it answers."""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            started = time.monotonic()
+            try:
+                infos = await asyncio.wait_for(
+                    loop.run_in_executor(
+                        self._resolver, socket.getaddrinfo, host, port, 0, socket.SOCK_STREAM
+                    ),
+                    self.timeout,
+                )
+            except asyncio.TimeoutError:
+                return "timeout"
+            except socket.gaierror as e:
+                return "dns" if e.errno in DNS_NOT_FOUND else "timeout"
+            if not infos:
+                return "dns"
+            address = infos[0][4][0]
+            resolved = time.monotonic()
+            self.timings[host] = (resolved - started, None)
+
+            timed_out = False
+            for candidate in (port, 80 if port == 443 else 443):
+                try:
+                    await self._connect(host, address, candidate)
+                    self.timings[host] = (resolved - started, time.monotonic() - resolved)
+                    return None
+                except asyncio.TimeoutError:
+                    timed_out = True
+                except (OSError, ssl.SSLError):
+                    continue
+            return "timeout" if timed_out else "unreachable"
+
+    async def _connect(self, host: str, address: str, port: int) -> None:
+        tls = self._tls if port == 443 else None
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(address, port, ssl=tls, server_hostname=host if tls else None),
+            self.timeout,
+        )
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+
+
+async def probe_hosts(
+    urls: list[str],
+    cache: DeadHostCache,
+    concurrency: int = 100,
+    timeout: float = 5.0,
+    timings: dict[str, tuple[float | None, float | None]] | None = None,
+) -> dict[str, str]:
+    """Failure reason per host of ``urls``; hosts that answer are left out.
+
+    Hosts the cache already knows to be dead aren't probed again. The cache
+    is updated with this run's outcomes and saved. ``timings``, when given,
+    receives the DNS and connect time of every probed host (None for a
+    step it didn't get through).
+    """
+    targets: dict[str, int] = {}
+    for url in urls:
+        host, port = url_host(url)
+        if host:
+            targets.setdefault(host, port)
+
+    failures: dict[str, str] = {}
+    to_probe = []
+    for host, port in targets.items():
+        reason = cache.get(host)
+        if reason is None:
+            to_probe.append((host, port))
+        else:
+            failures[host] = reason
+
+    prober = HostProber(concurrency, timeout)
+    try:
+        reasons = await asyncio.gather(*(prober.probe(host, port) for host, port in to_probe))
+    finally:
+        prober.close()
+    if timings is not None:
+        for host, _ in to_probe:
+            timings[host] = prober.timings.get(host, (None, None))
+    for (host, _), reason in zip(to_probe, reasons):
+        if reason is None:
+            cache.mark_alive(host)
+        else:
+            cache.mark_dead(host, reason)
+            failures[host] = reason
+    cache.save()
+    return failures
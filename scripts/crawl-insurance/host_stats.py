@@ -0,0 +1,135 @@
+"""
+Per-host crawl history for crawl.py's straggler-aware scheduling.
+
+Every run records, per host, how long its clinics took to crawl, how often
+the crawl timed out, and how often the result carried insurance or payment
+data. The next run orders clinics by expected cost per useful result:
+
+  cost = average crawl seconds / yield
+
+so fast hosts that usually yield data go first and most results arrive
+early. Hosts that time out on most crawls go last, and hosts never seen
+before are placed at the median cost, between the two.
+
+The history is kept in a JSON file (host-stats.json). Under --workers
+each process reads that file but saves the hosts it crawled to a file of
+its own (host-stats.worker-N.json), and the parent folds those into the
+main file with merge_worker_stats once the workers are done, the same way
+worker journals are merged. The main file thus only ever has one writer.
+"""
+
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+
+# Weight of the newest crawl in a host's average crawl time
+EWMA_WEIGHT = 0.3
+# Floor on a host's yield, so a host with no data yet isn't infinitely costly
+MIN_YIELD = 0.1
+# Hosts timing out on at least this share of crawls go to the end
+TIMEOUT_RATE_LAST = 0.5
+
+
+class HostStats:
+    """Persistent per-host crawl time, timeout and yield history."""
+
+    def __init__(self, path: Path, save_path: Path | None = None):
+        self.path = path
+        self.save_path = save_path or path
+        self._hosts: dict[str, dict[str, Any]] = _load(path)
+        self._touched: set[str] = set()
+
+    def _entry(self, host: str) -> dict[str, Any]:
+        self._touched.add(host)
+        return self._hosts.setdefault(
+            host, {"crawls": 0, "seconds": None, "timeouts": 0, "results": 0, "withData": 0}
+        )
+
+    def record_crawl(self, host: str, seconds: float, timed_out: bool) -> None:
+        entry = self._entry(host)
+        entry["crawls"] += 1
+        entry["timeouts"] += timed_out
+        previous = entry["seconds"]
+        entry["seconds"] = round(
+            seconds if previous is None else previous + EWMA_WEIGHT * (seconds - previous), 3
+        )
+        entry["updated"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+    def record_result(self, host: str, has_data: bool) -> None:
+        entry = self._entry(host)
+        entry["results"] += 1
+        entry["withData"] += has_data
+
+    def cost(self, host: str) -> float | None:
+        """Expected crawl seconds per useful result, or None for a new host."""
+        entry = self._hosts.get(host)
+        if entry is None or entry["seconds"] is None:
+            return None
+        if entry["timeouts"] / entry["crawls"] >= TIMEOUT_RATE_LAST:
+            return float("inf")
+        # Smoothed so one result doesn't decide a host's yield
+        yield_ = (entry["withData"] + 1) / (entry["results"] + 2)
+        return entry["seconds"] / max(yield_, MIN_YIELD)
+
+    def order(self, clinics: list[dict], host_of: Callable[[dict], str]) -> list[dict]:
+        """``clinics`` sorted cheapest host first; ties keep their order."""
+        costs = {host_of(clinic): None for clinic in clinics}
+        for host in costs:
+            costs[host] = self.cost(host)
+        known = [cost for cost in costs.values() if cost is not None and cost != float("inf")]
+        default = statistics.median(known) if known else 0.0
+        return sorted(clinics, key=lambda clinic: _or(costs[host_of(clinic)], default))
+
+    def save(self) -> None:
+        """Write the hosts recorded by this run into ``save_path``."""
+        merged = _load(self.save_path)
+        for host in self._touched:
+            merged[host] = self._hosts[host]
+        _write(self.save_path, merged)
+
+
+def worker_stats_path(path: Path, worker_id: int) -> Path:
+    return path.with_name(f"{path.stem}.worker-{worker_id}.json")
+
+
+def merge_worker_stats(path: Path) -> int:
+    """Fold per-worker stats files into ``path``, then delete them.
+
+    Workers crawl disjoint hosts, so their entries simply replace the main
+    file's. Returns the number of hosts merged.
+    """
+    worker_paths = sorted(path.parent.glob(f"{path.stem}.worker-*.json"))
+    if not worker_paths:
+        return 0
+    merged = _load(path)
+    count = 0
+    for worker_path in worker_paths:
+        hosts = _load(worker_path)
+        merged.update(hosts)
+        count += len(hosts)
+    _write(path, merged)
+    for worker_path in worker_paths:
+        worker_path.unlink()
+    return count
+
+
+def _load(path: Path) -> dict[str, dict[str, Any]]:
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write(path: Path, hosts: dict[str, dict[str, Any]]) -> None:
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(hosts, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _or(value: float | None, default: float) -> float:
+    return default if value is None else value
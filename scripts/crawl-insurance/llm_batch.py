@@ -0,0 +1,138 @@
+"""
+Provider batch APIs for crawl.py's --llm-batch mode.
+
+Instead of one request per clinic, every prepared prompt is written to a
+batch file in the provider's own format, submitted once, polled until the
+provider has processed it, and the replies are collected by ``custom_id``.
+Batch requests are billed at a discount and don't count against the
+interactive rate limits, at the cost of latency (up to 24 hours).
+
+Both providers are supported:
+
+  openai     requests.jsonl is uploaded with purpose "batch" and run against
+             /v1/chat/completions; replies come back as an output file
+  anthropic  the same lines are sent to the Message Batches API; replies
+             are streamed back from the batch's results URL
+
+The batch id and the clinics behind each request are saved in state.json
+next to the batch file, so an interrupted run resumes polling the same
+batch instead of submitting a new one.
+"""
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+OPENAI_ENDPOINT = "/v1/chat/completions"
+OPENAI_FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def state_path(batch_dir: Path) -> Path:
+    return batch_dir / "state.json"
+
+
+def load_state(batch_dir: Path) -> dict[str, Any] | None:
+    """The saved state of a submitted batch, or None if none is pending."""
+    path = state_path(batch_dir)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(batch_dir: Path, state: dict[str, Any]) -> None:
+    path = state_path(batch_dir)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def clear_state(batch_dir: Path) -> None:
+    state_path(batch_dir).unlink(missing_ok=True)
+
+
+def write_requests(path: Path, api: str, params: dict[str, dict[str, Any]]) -> None:
+    """Write one batch line per request; ``params`` maps custom_id to request body."""
+    with open(path, "w") as f:
+        for custom_id, body in params.items():
+            if api == "openai":
+                line = {"custom_id": custom_id, "method": "POST", "url": OPENAI_ENDPOINT, "body": body}
+            else:
+                line = {"custom_id": custom_id, "params": body}
+            f.write(json.dumps(line) + "\n")
+
+
+async def submit(client: Any, api: str, path: Path) -> str:
+    """Submit a batch file written by write_requests; returns the batch id."""
+    if api == "openai":
+        with open(path, "rb") as f:
+            uploaded = await client.files.create(file=f, purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=OPENAI_ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    with open(path) as f:
+        requests = [json.loads(line) for line in f]
+    batch = await client.messages.batches.create(requests=requests)
+    return batch.id
+
+
+async def wait(client: Any, api: str, batch_id: str, interval: float) -> None:
+    """Poll until the provider stops processing the batch."""
+    while True:
+        if api == "openai":
+            batch = await client.batches.retrieve(batch_id)
+            status = batch.status
+            counts = batch.request_counts
+            progress = f"{counts.completed + counts.failed}/{counts.total}" if counts else "?"
+            if status in OPENAI_FINAL_STATUSES:
+                if status != "completed":
+                    print(f"  Batch {batch_id} {status}; collecting whatever finished")
+                return
+        else:
+            batch = await client.messages.batches.retrieve(batch_id)
+            status = batch.processing_status
+            counts = batch.request_counts
+            done = counts.succeeded + counts.errored + counts.canceled + counts.expired
+            progress = f"{done}/{done + counts.processing}"
+            if status == "ended":
+                return
+        print(f"  Batch {batch_id}: {status}, {progress} requests done")
+        await asyncio.sleep(interval)
+
+
+async def results(client: Any, api: str, batch_id: str) -> dict[str, str]:
+    """Reply text by custom_id, for the requests that succeeded."""
+    replies: dict[str, str] = {}
+    if api == "openai":
+        batch = await client.batches.retrieve(batch_id)
+        if batch.output_file_id is None:
+            return replies
+        output = await client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            if response.get("status_code") == 200:
+                replies[entry["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return replies
+
+    async for entry in await client.messages.batches.results(batch_id):
+        if entry.result.type == "succeeded":
+            replies[entry.custom_id] = _message_text(entry.result.message)
+    return replies
+
+
+def _message_text(message: Any) -> str:
+    """Reply text of a message; tool input (structured output) as JSON."""
+    for block in message.content:
+        if block.type == "tool_use":
+            return json.dumps(block.input)
+    return "".join(block.text for block in message.content if block.type == "text")
@@ -0,0 +1,125 @@
+"""
+Persistent cache of LLM extractions for crawl.py, stored in SQLite.
+
+Entries are keyed by a hash of the prompt version, the model name and the
+page content sent to the model, and hold the parsed extraction JSON. Reruns
+over a different --input slice, or after a crash, reuse every extraction
+whose inputs are unchanged instead of paying for the API call again.
+
+Entries written under an older prompt version can never be hit again and are
+purged when the cache is opened. Once the stored extractions pass
+``max_bytes`` the least recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    key TEXT PRIMARY KEY,
+    prompt_version TEXT NOT NULL,
+    model TEXT NOT NULL,
+    extraction TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used);
+"""
+
+# After eviction the cache is trimmed to this fraction of max_bytes, so
+# eviction doesn't run again on the very next insert
+EVICT_TO_FRACTION = 0.9
+
+
+def cache_key(prompt_version: str, model: str, content: str) -> str:
+    """Content address of one extraction request."""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, content):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed extraction cache with LRU eviction by total size."""
+
+    def __init__(self, path: Path, prompt_version: str, max_bytes: int):
+        self.path = path
+        self.prompt_version = prompt_version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # WAL + busy timeout so --workers processes can share one file
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self.stale_purged = self._db.execute(
+            "DELETE FROM extractions WHERE prompt_version != ?", (prompt_version,)
+        ).rowcount
+        self._db.commit()
+        self._size = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM extractions"
+        ).fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+
+    def get(self, model: str, content: str) -> dict[str, Any] | None:
+        key = cache_key(self.prompt_version, model, content)
+        row = self._db.execute(
+            "SELECT extraction FROM extractions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self._db.execute(
+            "UPDATE extractions SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        self._db.commit()
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, model: str, content: str, extraction: dict[str, Any]) -> None:
+        key = cache_key(self.prompt_version, model, content)
+        payload = json.dumps(extraction)
+        now = time.time()
+        old = self._db.execute("SELECT size FROM extractions WHERE key = ?", (key,)).fetchone()
+        self._db.execute(
+            "INSERT OR REPLACE INTO extractions "
+            "(key, prompt_version, model, extraction, size, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, self.prompt_version, model, payload, len(payload), now, now),
+        )
+        self._db.commit()
+        self._size += len(payload) - (old[0] if old else 0)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def clear(self) -> int:
+        """Drop every entry; returns how many were removed."""
+        removed = self._db.execute("DELETE FROM extractions").rowcount
+        self._db.commit()
+        self._size = 0
+        return removed
+
+    def _evict(self) -> None:
+        target = self.max_bytes * EVICT_TO_FRACTION
+        rows = self._db.execute(
+            "SELECT key, size FROM extractions ORDER BY last_used"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._size <= target:
+                break
+            evicted.append((key,))
+            self._size -= size
+        self._db.executemany("DELETE FROM extractions WHERE key = ?", evicted)
+        self._db.commit()
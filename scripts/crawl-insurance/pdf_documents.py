@@ -0,0 +1,69 @@
+"""
+Text extraction for insurance documents (PDFs) linked from clinic sites.
+
+Many clinics publish their accepted plans as a linked PDF ("Insurance
+Plans We Accept.pdf") rather than a page. Rendering those through Chromium
+gives little or nothing, so crawl.py downloads them over plain HTTP,
+within DOCUMENT_MAX_BYTES, and hands the bytes to pdf_to_text here.
+
+Parsing is CPU-bound, so it runs in a small process pool (spawned, like
+--workers, since the crawl process runs threads) instead of on the event
+loop. Only the first DOCUMENT_MAX_PAGES pages are read: plan lists sit at
+the front, and long PDFs are usually intake packets or brochures.
+
+Scanned PDFs have no text layer and come back empty; OCR is left out to
+keep the tier light.
+"""
+
+import asyncio
+import io
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from pypdf import PdfReader
+
+# Download cap; a truncated PDF can't be parsed, so larger ones are skipped
+DOCUMENT_MAX_BYTES = 5_000_000
+DOCUMENT_MAX_PAGES = 10
+DOCUMENT_MAX_CHARS = 60_000
+# Worker pool size, per crawl process
+DOCUMENT_WORKERS = 2
+
+PDF_PATH_RE = re.compile(r"\.pdf$", re.IGNORECASE)
+SPACE_RUN_RE = re.compile(r"[ \t\u00a0]+")
+BLANK_RUN_RE = re.compile(r"\n\s*\n(?:\s*\n)+")
+
+
+def is_pdf_url(path: str) -> bool:
+    """True for a URL path naming a PDF document."""
+    return PDF_PATH_RE.search(path) is not None
+
+
+def pdf_to_text(data: bytes, max_pages: int = DOCUMENT_MAX_PAGES) -> str:
+    """Plain text of a PDF's first pages, or "" if it can't be read."""
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        if reader.is_encrypted:
+            reader.decrypt("")
+        parts = [page.extract_text() or "" for page in reader.pages[:max_pages]]
+    except Exception:
+        # Malformed PDFs make pypdf raise almost anything
+        return ""
+    text = "\n\n".join(SPACE_RUN_RE.sub(" ", part).strip() for part in parts)
+    return BLANK_RUN_RE.sub("\n\n", text).strip()[:DOCUMENT_MAX_CHARS]
+
+
+class DocumentExtractor:
+    """Extracts document text in a process pool, off the event loop."""
+
+    def __init__(self, workers: int = DOCUMENT_WORKERS):
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.documents = 0
+
+    async def text(self, data: bytes) -> str:
+        self.documents += 1
+        return await asyncio.get_running_loop().run_in_executor(self._pool, pdf_to_text, data)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
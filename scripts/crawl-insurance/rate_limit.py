@@ -0,0 +1,239 @@
+"""
+Client-side rate limiting and retries for crawl.py's LLM requests.
+
+ProviderRateLimiter keeps two token buckets, requests per minute and tokens
+per minute, and every LLM request waits for room in both before it is sent.
+The limits can be given up front (--llm-rpm / --llm-tpm); either way they
+are corrected from the rate-limit headers both providers send on every
+response:
+
+  OpenAI     x-ratelimit-{limit,remaining,reset}-{requests,tokens}
+             (resets as durations such as "6m0s" or "20ms")
+  Anthropic  anthropic-ratelimit-{requests,tokens}-{limit,remaining,reset}
+             (resets as RFC 3339 timestamps)
+
+When a request is rate limited or hits a transient error, call_with_retries
+sleeps for the provider's retry-after (retry-after-ms / retry-after), or a
+full-jitter exponential backoff when there is none, and tries again. A 429
+pauses every request, not just the one that got it, so the whole pool backs
+off together instead of hammering the limit in a failure storm.
+"""
+
+import asyncio
+import random
+import re
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Mapping
+
+DURATION_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+RATE_LIMIT_HEADERS = {
+    # (limit, remaining, reset) header names per bucket
+    "requests": [
+        ("x-ratelimit-limit-requests", "x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+        ("anthropic-ratelimit-requests-limit", "anthropic-ratelimit-requests-remaining",
+         "anthropic-ratelimit-requests-reset"),
+    ],
+    "tokens": [
+        ("x-ratelimit-limit-tokens", "x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+        ("anthropic-ratelimit-tokens-limit", "anthropic-ratelimit-tokens-remaining",
+         "anthropic-ratelimit-tokens-reset"),
+    ],
+}
+
+
+def parse_reset(value: str, now: float) -> float | None:
+    """Seconds until a rate-limit reset given as a duration or a timestamp."""
+    value = value.strip()
+    parts = DURATION_PART_RE.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * DURATION_UNITS[u] for n, u in parts)
+    try:
+        return max(0.0, datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() - now)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def retry_after(headers: Mapping[str, str] | None) -> float | None:
+    """The provider's requested wait in seconds, if the response gave one."""
+    if not headers:
+        return None
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+class Bucket:
+    """A per-minute token bucket; unlimited until a limit is known."""
+
+    def __init__(self, per_minute: float | None = None):
+        self.capacity = per_minute
+        self.level = per_minute or 0.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.capacity is not None:
+            rate = self.capacity / 60
+            self.level = min(self.capacity, self.level + (now - self.updated) * rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken (0 if it can be now)."""
+        if self.capacity is None:
+            return 0.0
+        self._refill(now)
+        # A request larger than the whole bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / (self.capacity / 60)
+
+    def take(self, amount: float) -> None:
+        if self.capacity is not None:
+            self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, limit: float | None, remaining: float | None, reset_in: float | None) -> None:
+        """Adopt the provider's view of this bucket."""
+        self._refill(time.monotonic())
+        first_sync = self.capacity is None
+        if limit:
+            self.capacity = limit
+        if self.capacity is None:
+            return
+        if remaining is None:
+            if first_sync:
+                self.level = self.capacity
+            return
+        self.level = remaining if first_sync else min(self.level, remaining)
+        if remaining <= 0 and reset_in:
+            # Empty until the reset: model it as a negative level refilling
+            self.level = -reset_in * self.capacity / 60
+
+
+class ProviderRateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for one provider."""
+
+    def __init__(
+        self,
+        rpm: float | None = None,
+        tpm: float | None = None,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.requests = Bucket(rpm)
+        self.tokens = Bucket(tpm)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._paused_until = 0.0
+        self.retries = 0
+        self.waited = 0.0
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until a request of about ``tokens`` tokens fits both limits."""
+        while True:
+            now = time.monotonic()
+            wait = max(
+                self._paused_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(tokens, now),
+            )
+            if wait <= 0:
+                self.requests.take(1)
+                self.tokens.take(tokens)
+                return
+            self.waited += wait
+            await asyncio.sleep(wait)
+
+    def settle(self, estimated: int, used: int | None) -> None:
+        """Return the part of a token estimate the request didn't use."""
+        if used is not None and used < estimated:
+            self.tokens.give_back(estimated - used)
+
+    def observe(self, headers: Mapping[str, str] | None) -> None:
+        """Sync both buckets from a response's rate-limit headers."""
+        if not headers:
+            return
+        now = time.time()
+        for name, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            for limit_header, remaining_header, reset_header in RATE_LIMIT_HEADERS[name]:
+                if limit_header not in headers and remaining_header not in headers:
+                    continue
+                bucket.sync(
+                    _number(headers.get(limit_header)),
+                    _number(headers.get(remaining_header)),
+                    parse_reset(headers[reset_header], now) if reset_header in headers else None,
+                )
+
+    def retry_delay(self, attempt: int, headers: Mapping[str, str] | None, throttled: bool) -> float:
+        """How long to wait before retry number ``attempt`` (0-based).
+
+        A throttled (429) response pauses all requests for the delay.
+        """
+        self.observe(headers)
+        delay = retry_after(headers)
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        else:
+            # Spread the pool's retries so they don't all land at once
+            delay += random.uniform(0, self.base_delay)
+        if throttled:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self.retries += 1
+        return delay
+
+
+def _number(value: str | None) -> float | None:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def call_with_retries(
+    send: Callable[[], Awaitable[tuple[Mapping[str, str], Any]]],
+    tokens: int,
+    limiter: ProviderRateLimiter | None,
+    retryable: Callable[[Exception], bool],
+) -> Any:
+    """Run ``send`` under ``limiter``, retrying retryable errors.
+
+    ``send`` returns (response headers, parsed response). Without a limiter
+    the call is made once. The last error is re-raised once the limiter's
+    attempts are used up.
+    """
+    attempt = 0
+    while True:
+        if limiter is not None:
+            await limiter.acquire(tokens)
+        try:
+            headers, response = await send()
+        except Exception as e:
+            if limiter is None or not retryable(e) or attempt + 1 >= limiter.max_attempts:
+                raise
+            status = getattr(e, "status_code", None)
+            error_headers = getattr(getattr(e, "response", None), "headers", None)
+            delay = limiter.retry_delay(attempt, error_headers, throttled=status == 429)
+            print(f"    LLM {status or 'connection error'}, retrying in {delay:.1f}s")
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        if limiter is not None:
+            limiter.observe(headers)
+        return response
@@ -0,0 +1,270 @@
+"""
+Rule-based insurance extraction for crawl.py, used before calling the LLM.
+
+A large share of clinic insurance pages are a plain bulleted list of carrier
+names. For those, a dictionary lookup gives the same answer as the model at
+no cost, so this module matches the crawled markdown against a gazetteer of
+carriers and payment methods with an Aho-Corasick automaton (one pass over
+the text for every alias at once) and returns an extraction in the schema
+the LLM produces.
+
+The extractor only answers when the page is clear-cut:
+
+- the content includes a dedicated insurance page section (``=== PAGE:``),
+- that page lists at least MIN_CARRIERS known carriers,
+- nearly every list item in the carrier list is a known carrier, so there is
+  no unknown plan the LLM would have put in ``otherInsurance``, and
+- nothing on the page negates acceptance ("do not accept", "out of network").
+
+Everything else returns None and goes to the LLM.
+"""
+
+import re
+from collections import deque
+from typing import Any
+
+# Canonical name -> lower-case aliases matched on word boundaries
+CARRIERS: dict[str, list[str]] = {
+    "Medicare": ["medicare", "medicare part b", "original medicare", "railroad medicare"],
+    "Medicare Advantage": ["medicare advantage", "medicare replacement plans"],
+    "Medicaid": ["medicaid", "medi-cal", "ahcccs", "masshealth", "tenncare"],
+    "Tricare": ["tricare", "tri-care", "tricare prime", "tricare select"],
+    "VA Community Care": ["va community care", "veterans affairs", "va ccn", "triwest", "champva"],
+    "Aetna": ["aetna", "aetna better health", "aetna medicare"],
+    "Blue Cross Blue Shield": [
+        "blue cross blue shield", "blue cross and blue shield", "blue cross & blue shield",
+        "blue cross", "blue shield", "bcbs", "bluecross blueshield", "bluecross",
+    ],
+    "Anthem": ["anthem", "anthem blue cross", "anthem bcbs"],
+    "Florida Blue": ["florida blue"],
+    "Highmark": ["highmark"],
+    "Horizon": ["horizon bcbsnj", "horizon blue cross"],
+    "CareFirst": ["carefirst"],
+    "Premera": ["premera"],
+    "Regence": ["regence"],
+    "Wellmark": ["wellmark"],
+    "Independence Blue Cross": ["independence blue cross", "ibx"],
+    "Excellus": ["excellus"],
+    "Cigna": ["cigna", "cigna healthspring", "cigna-healthspring"],
+    "UnitedHealthcare": [
+        "unitedhealthcare", "united healthcare", "united health care", "uhc",
+        "united health", "aarp medicare complete",
+    ],
+    "Optum": ["optum", "optumhealth"],
+    "UMR": ["umr"],
+    "Oxford": ["oxford health", "oxford health plans"],
+    "Humana": ["humana", "humana military"],
+    "Kaiser Permanente": ["kaiser permanente", "kaiser"],
+    "Molina Healthcare": ["molina", "molina healthcare"],
+    "Ambetter": ["ambetter"],
+    "Centene": ["centene"],
+    "WellCare": ["wellcare", "well care"],
+    "Amerigroup": ["amerigroup"],
+    "CareSource": ["caresource"],
+    "Health Net": ["health net", "healthnet"],
+    "Oscar": ["oscar health"],
+    "EmblemHealth": ["emblemhealth", "emblem health"],
+    "Harvard Pilgrim": ["harvard pilgrim"],
+    "Tufts Health Plan": ["tufts health plan", "tufts"],
+    "HealthPartners": ["healthpartners"],
+    "Medica": ["medica"],
+    "Priority Health": ["priority health"],
+    "Geisinger": ["geisinger health plan", "geisinger"],
+    "SelectHealth": ["selecthealth", "select health"],
+    "Coventry": ["coventry", "coventry health care"],
+    "Magellan": ["magellan"],
+    "GEHA": ["geha"],
+    "MultiPlan": ["multiplan", "multi plan", "phcs"],
+    "First Health": ["first health"],
+    "Beech Street": ["beech street"],
+    "Meritain Health": ["meritain", "meritain health"],
+    "Devoted Health": ["devoted health"],
+    "Clover Health": ["clover health"],
+    "Bright Health": ["bright health"],
+    "Scott & White Health Plan": ["scott & white health plan", "scott and white health plan"],
+    "Workers' Compensation": [
+        "workers' compensation", "workers compensation", "worker's compensation",
+        "workers comp", "workers' comp", "workman's comp", "workmans comp",
+    ],
+    "Personal Injury Protection": ["personal injury protection", "pip", "auto insurance"],
+}
+
+PAYMENT_METHODS: dict[str, list[str]] = {
+    "Credit Cards": [
+        "credit card", "credit cards", "visa", "mastercard", "master card",
+        "american express", "amex",
+    ],
+    "Debit Cards": ["debit card", "debit cards"],
+    "Cash": ["cash"],
+    "Checks": ["checks", "personal check", "personal checks", "cashier's check", "money order"],
+    "Payment Plans": ["payment plan", "payment plans", "payment arrangements"],
+    "Financing": ["financing", "carecredit", "care credit", "cherry financing", "patient financing"],
+    "HSA/FSA": [
+        "hsa", "fsa", "health savings account", "flexible spending account",
+        "hsa/fsa", "fsa/hsa",
+    ],
+    "Sliding Scale": ["sliding scale", "sliding fee"],
+    "Self-Pay": ["self-pay", "self pay", "cash pay", "private pay"],
+}
+
+# Phrases that mean the page says something a word list can't capture
+NEGATION_RE = re.compile(
+    r"\b(?:do(?:es)? not|don't|doesn't|no longer|not|cannot|can't|unable to)\s+"
+    r"(?:currently\s+)?(?:accept|take|participate|bill|contract)"
+    r"|\bout[- ]of[- ]network\b|\bnon[- ]participating\b|\bexcept\b|\bexcluding\b",
+    re.IGNORECASE,
+)
+NEW_PATIENTS_RE = re.compile(r"\b(?:accepting|welcom(?:e|ing)|now taking) new patients\b", re.IGNORECASE)
+LIST_ITEM_RE = re.compile(r"^\s*(?:[*+\-•]|\d+[.)])\s+(.*\S)")
+SECTION_RE = re.compile(r"^=== PAGE: .* ===$", re.MULTILINE)
+
+# Below this many distinct carriers a page isn't clearly a carrier list
+MIN_CARRIERS = 3
+# Share of list items in the carrier list that must be known carriers
+MIN_LIST_COVERAGE = 0.8
+# List items longer than this are prose, not carrier names
+MAX_ITEM_CHARS = 80
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher: finds every pattern in one text pass."""
+
+    def __init__(self, patterns: dict[str, str]):
+        # patterns: lower-case pattern -> value reported on a match
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, str]]] = [[]]
+        for pattern, value in patterns.items():
+            self._add(pattern, value)
+        self._build()
+
+    def _add(self, pattern: str, value: str) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((len(pattern), value))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> list[tuple[int, int, str]]:
+        """Non-overlapping whole-word matches as (start, end, value).
+
+        Overlaps resolve leftmost-longest, so "blue cross blue shield" wins
+        over the "blue cross" inside it.
+        """
+        matches = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, value in self._out[state]:
+                start = i + 1 - length
+                if _is_word_boundary(text, start, i + 1):
+                    matches.append((start, i + 1, value))
+
+        matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+        kept = []
+        end = 0
+        for match in matches:
+            if match[0] >= end:
+                kept.append(match)
+                end = match[1]
+        return kept
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+def _build_matcher(gazetteer: dict[str, list[str]]) -> AhoCorasick:
+    return AhoCorasick({alias: name for name, aliases in gazetteer.items() for alias in aliases})
+
+
+def _unique(names: list[str]) -> list[str]:
+    return list(dict.fromkeys(names))
+
+
+def insurance_section(content: str) -> str | None:
+    """The dedicated insurance page section of crawl_clinic_website output."""
+    match = SECTION_RE.search(content)
+    if match is None:
+        return None
+    rest = content[match.end():]
+    next_section = rest.find("\n=== ")
+    return rest if next_section == -1 else rest[:next_section]
+
+
+class RuleExtractor:
+    """Gazetteer extractor that answers only for unambiguous carrier lists."""
+
+    def __init__(self):
+        self.carriers = _build_matcher(CARRIERS)
+        self.payments = _build_matcher(PAYMENT_METHODS)
+        self.hits = 0
+        self.misses = 0
+
+    def extract(self, content: str) -> dict[str, Any] | None:
+        """Return an extraction in the LLM schema, or None if unsure."""
+        extraction = self._extract(content)
+        if extraction is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return extraction
+
+    def _extract(self, content: str) -> dict[str, Any] | None:
+        section = insurance_section(content)
+        if section is None or NEGATION_RE.search(section):
+            return None
+
+        lower = section.lower()
+        carriers = _unique([name for _, _, name in self.carriers.find(lower)])
+        if len(carriers) < MIN_CARRIERS or not self._is_carrier_list(lower):
+            return None
+
+        return {
+            "insuranceProviders": carriers,
+            "otherInsurance": [],
+            "paymentMethods": _unique([name for _, _, name in self.payments.find(lower)]),
+            "acceptsNewPatients": True if NEW_PATIENTS_RE.search(content) else None,
+            "confidence": "high",
+        }
+
+    def _is_carrier_list(self, section: str) -> bool:
+        """Whether the page's carriers come as a list of known names only.
+
+        Looks at the run of list items from the first to the last one naming
+        a carrier, which skips navigation menus above and below it. An item
+        without a known carrier there is a plan the gazetteer doesn't know.
+        """
+        items = []
+        for line in section.splitlines():
+            match = LIST_ITEM_RE.match(line)
+            if match and len(match.group(1)) <= MAX_ITEM_CHARS:
+                items.append(bool(self.carriers.find(match.group(1))))
+        if True not in items:
+            return False
+        first = items.index(True)
+        last = len(items) - 1 - items[::-1].index(True)
+        block = items[first:last + 1]
+        return sum(block) >= MIN_CARRIERS and sum(block) / len(block) >= MIN_LIST_COVERAGE
@@ -0,0 +1,53 @@
+from content_windows import GAP, ContentReducer, count_tokens
+
+FILLER = "Our team treats back pain, neck pain and sports injuries with care. " * 6
+INSURANCE = "## Insurance\n\nWe accept the following plans:\n\n* Medicare\n* Aetna\n* Cigna"
+
+
+def test_count_tokens_counts_words_and_punctuation():
+    assert count_tokens("We accept Medicare, Aetna.") == 6
+
+
+def test_short_text_is_kept_whole():
+    text = f"{FILLER}\n\n{INSURANCE}"
+    assert ContentReducer().window(text, count_tokens(text)) == text
+
+
+def test_relevant_blocks_and_their_neighbours_win_the_budget():
+    text = "\n\n".join([FILLER, FILLER, INSURANCE, FILLER, "Contact us at the front desk."])
+    windowed = ContentReducer().window(text, 100)
+    assert count_tokens(windowed) <= 100
+    assert "* Medicare\n* Aetna\n* Cigna" in windowed
+    assert "## Insurance" in windowed
+    # The filler above the heading is what gets dropped
+    assert windowed.startswith("## Insurance")
+
+
+def test_dropped_blocks_between_kept_ones_leave_a_gap_marker():
+    payment = "Payment: cash and credit cards."
+    text = "\n\n".join([INSURANCE, FILLER, FILLER, FILLER, payment])
+    windowed = ContentReducer().window(text, 40)
+    assert windowed.startswith("## Insurance")
+    assert windowed.endswith(f"* Cigna\n\n{GAP}\n\n{payment}")
+
+
+def test_text_without_relevant_blocks_is_truncated():
+    text = "\n".join(f"Line {n} about our doctors." for n in range(50))
+    windowed = ContentReducer().window(text, 20)
+    assert windowed == "Line 0 about our doctors.\nLine 1 about our doctors.\nLine 2 about our doctors."
+
+
+def test_boilerplate_shared_between_pages_is_stripped():
+    menu = "Home | About | Contact"
+    main = f"{menu}\n\nWelcome to the clinic.\n\nWe use cookies to improve your visit."
+    insurance = f"{menu}\n\n{INSURANCE}"
+    reducer = ContentReducer()
+    combined = reducer.reduce(
+        [("=== MAIN PAGE ===", main, 1000), ("=== PAGE: /insurance ===", insurance, 1000)],
+        [main, insurance],
+    )
+    assert menu not in combined
+    assert "cookies" not in combined
+    assert "* Medicare" in combined
+    assert reducer.boilerplate_lines == 3
+    assert reducer.tokens_after < reducer.tokens_before
@@ -0,0 +1,12 @@
+from crawl_metrics import ClinicMetrics, SharedMetrics
+
+
+def test_packed_request_is_split_between_its_clinics():
+    shares = [ClinicMetrics(f"c{i}", "example.com") for i in range(3)]
+    SharedMetrics(shares).add_llm(3.0, 2, 100, 11, "unpriced-model")
+    assert sum(share.llm_requests for share in shares) == 1
+    assert sum(share.llm_retries for share in shares) == 1
+    assert sum(share.llm_seconds for share in shares) == 3.0
+    assert sum(share.input_tokens for share in shares) == 100
+    assert sum(share.output_tokens for share in shares) == 11
+    assert [share.input_tokens for share in shares] == [34, 33, 33]
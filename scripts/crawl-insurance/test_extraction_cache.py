@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from crawl import ExtractionCache
+
+EXTRACTION = {"insuranceProviders": ["Aetna"], "confidence": "high"}
+
+
+def test_cancelled_waiter_leaves_the_extraction_running():
+    async def run():
+        cache = ExtractionCache()
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = 0
+
+        async def extract():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await release.wait()
+            return EXTRACTION
+
+        first = asyncio.ensure_future(cache.get_or_extract("same content", extract))
+        await started.wait()
+        second = asyncio.ensure_future(cache.get_or_extract("same content", extract))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        release.set()
+        assert await second == EXTRACTION
+        assert await cache.get_or_extract("same content", extract) == EXTRACTION
+        return calls, cache.hits
+
+    assert asyncio.run(run()) == (1, 2)
+
+
+def test_failed_extraction_is_retried():
+    async def run():
+        cache = ExtractionCache()
+        replies = [None, EXTRACTION]
+
+        async def extract():
+            return replies.pop(0)
+
+        assert await cache.get_or_extract("content", extract) is None
+        assert await cache.get_or_extract("content", extract) == EXTRACTION
+
+    asyncio.run(run())
+
+
+class Store:
+    def __init__(self):
+        self.misses = 0
+
+    def get(self, model, content):
+        self.misses += 1
+        return None
+
+    def put(self, model, content, extraction):
+        pass
+
+
+def test_store_lookup_can_be_skipped():
+    async def run():
+        store = Store()
+        cache = ExtractionCache(store)
+
+        async def extract():
+            return EXTRACTION
+
+        assert cache.cached("content") is None
+        assert await cache.get_or_extract("content", extract, check_store=False) == EXTRACTION
+        return store.misses
+
+    assert asyncio.run(run()) == 1
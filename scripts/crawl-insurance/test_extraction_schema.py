@@ -0,0 +1,53 @@
+from extraction_schema import RepairedJSON, repair_json, validate_extraction
+
+COMPLETE = {
+    "insuranceProviders": ["Medicare", "Aetna"],
+    "otherInsurance": [],
+    "paymentMethods": ["Credit Cards"],
+    "acceptsNewPatients": True,
+    "confidence": "high",
+}
+
+
+def test_complete_reply_is_kept():
+    assert validate_extraction(COMPLETE) == COMPLETE
+
+
+def test_unknown_fields_are_dropped():
+    assert validate_extraction({**COMPLETE, "notes": "x"}) == COMPLETE
+
+
+def test_empty_object_is_rejected():
+    assert validate_extraction({}) is None
+
+
+def test_unrelated_object_is_rejected():
+    assert validate_extraction({"error": "no content"}) is None
+
+
+def test_complete_reply_missing_a_field_is_rejected():
+    reply = {key: value for key, value in COMPLETE.items() if key != "paymentMethods"}
+    assert validate_extraction(reply) is None
+
+
+def test_wrong_type_is_rejected():
+    assert validate_extraction({**COMPLETE, "insuranceProviders": "Medicare"}) is None
+
+
+def test_truncated_reply_is_filled_at_low_confidence():
+    reply = repair_json('{"insuranceProviders": ["Medicare", "Aetna"], "otherInsurance": [], "paymentMe')
+    assert isinstance(reply, RepairedJSON)
+    extraction = validate_extraction(reply)
+    assert extraction["insuranceProviders"] == ["Medicare", "Aetna"]
+    assert extraction["paymentMethods"] == []
+    assert extraction["confidence"] == "low"
+
+
+def test_truncated_reply_without_any_field_is_rejected():
+    reply = repair_json('{"notes": "cut off here", "insuranceProv')
+    assert isinstance(reply, RepairedJSON)
+    assert validate_extraction(reply) is None
+
+
+def test_complete_json_is_not_marked_repaired():
+    assert not isinstance(repair_json('{"a": 1} trailing prose'), RepairedJSON)
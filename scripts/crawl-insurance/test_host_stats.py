@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from host_stats import HostStats, merge_worker_stats, worker_stats_path
+
+
+def clinic(host):
+    return {"website": f"https://{host}/"}
+
+
+def host_of(clinic):
+    return clinic["website"].split("/")[2]
+
+
+def test_cost_is_crawl_time_per_useful_result(tmp_path):
+    stats = HostStats(tmp_path / "host-stats.json")
+    assert stats.cost("new.example") is None
+    stats.record_crawl("a.example", 2.0, False)
+    stats.record_result("a.example", True)
+    # Yield smoothed as (1 + 1) / (1 + 2)
+    assert stats.cost("a.example") == pytest.approx(3.0)
+    stats.record_crawl("a.example", 4.0, False)
+    assert stats.cost("a.example") == pytest.approx((2.0 + 0.3 * 2.0) * 1.5)
+
+
+def test_hosts_that_mostly_time_out_go_last(tmp_path):
+    stats = HostStats(tmp_path / "host-stats.json")
+    stats.record_crawl("dead.example", 1.0, True)
+    stats.record_crawl("dead.example", 1.0, False)
+    assert stats.cost("dead.example") == float("inf")
+
+
+def test_order_puts_cheap_hosts_first_and_new_hosts_at_the_median(tmp_path):
+    stats = HostStats(tmp_path / "host-stats.json")
+    for host, seconds in (("fast.example", 1.0), ("mid.example", 5.0), ("slow.example", 20.0)):
+        stats.record_crawl(host, seconds, False)
+        stats.record_result(host, True)
+    stats.record_crawl("dead.example", 1.0, True)
+    clinics = [clinic(h) for h in ("dead.example", "slow.example", "new.example", "fast.example", "mid.example")]
+    ordered = [host_of(c) for c in stats.order(clinics, host_of)]
+    # new.example ties with mid.example at the median and keeps its place
+    assert ordered == ["fast.example", "new.example", "mid.example", "slow.example", "dead.example"]
+
+
+def test_stats_persist_between_runs(tmp_path):
+    path = tmp_path / "host-stats.json"
+    stats = HostStats(path)
+    stats.record_crawl("a.example", 2.0, False)
+    stats.save()
+    assert HostStats(path).cost("a.example") == pytest.approx(4.0)
+
+
+def test_worker_stats_are_merged_into_the_main_file(tmp_path):
+    path = tmp_path / "host-stats.json"
+    main = HostStats(path)
+    main.record_crawl("old.example", 1.0, False)
+    main.save()
+    for worker_id, host in enumerate(("a.example", "b.example")):
+        stats = HostStats(path, worker_stats_path(path, worker_id))
+        stats.record_crawl(host, 3.0, False)
+        stats.save()
+    # Workers never write the main file themselves
+    assert set(json.loads(path.read_text())) == {"old.example"}
+
+    assert merge_worker_stats(path) == 2
+    assert set(json.loads(path.read_text())) == {"old.example", "a.example", "b.example"}
+    assert not list(tmp_path.glob("host-stats.worker-*.json"))
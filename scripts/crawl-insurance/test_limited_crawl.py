@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+from crawl import AdaptiveLimiter, PageFetcher, limited_crawl
+from host_stats import HostStats
+
+PAGE = "We accept insurance: Medicare, Aetna and Cigna. Payment by credit card. " * 5
+
+
+class Browser:
+    """Renders fast.example; every page on dead.example times out."""
+
+    async def arun(self, url):
+        if "dead.example" in url:
+            await asyncio.sleep(0.01)
+            raise RuntimeError("Page.goto: Timeout 30000ms exceeded")
+        # Still crawling when the dead host's fetches time out
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(
+            success=True,
+            error_message=None,
+            markdown=SimpleNamespace(raw_markdown=PAGE),
+            links={},
+            html=f"<p>{PAGE}</p>",
+            status_code=200,
+            response_headers={},
+        )
+
+
+class Limiter(AdaptiveLimiter):
+    def __init__(self):
+        super().__init__("crawl", 4, 4)
+        self.overloads = 0
+
+    def _record(self, seconds, slot):
+        self.overloads += slot.overload
+        super()._record(seconds, slot)
+
+
+def clinic(host):
+    return {"id": host, "title": host, "website": f"https://{host}/"}
+
+
+def test_timeouts_count_only_for_their_own_host(tmp_path):
+    clinics = [clinic("dead.example"), clinic("fast.example")]
+    pages = PageFetcher(Browser(), clinics)
+    limiter = Limiter()
+    stats = HostStats(tmp_path / "host-stats.json")
+
+    async def run():
+        return await asyncio.gather(*(limited_crawl(pages, c, limiter, stats=stats) for c in clinics))
+
+    dead, fast = asyncio.run(run())
+    assert dead is None
+    assert "Medicare" in fast
+    assert stats.cost("dead.example") == float("inf")
+    assert stats.cost("fast.example") < float("inf")
+    assert limiter.overloads == 1
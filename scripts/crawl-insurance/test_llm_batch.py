@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import json
+
+import anthropic
+import openai
+import pytest
+
+import llm_batch
+from bench import FakeLLM, serve
+
+TOOL = {"name": "record_insurance", "description": "Record", "input_schema": {"type": "object"}}
+
+
+def body(api: str, prompt: str, structured: bool = False) -> dict:
+    request = {"model": "bench", "max_tokens": 100, "messages": [{"role": "user", "content": prompt}]}
+    if structured:
+        request["tools"] = [TOOL]
+        request["tool_choice"] = {"type": "tool", "name": TOOL["name"]}
+    return request
+
+
+async def run_batch(tmp_path, api: str, structured: bool = False) -> dict[str, str]:
+    llm = FakeLLM(argparse.Namespace(seed=1, llm_latency_ms=0, llm_429_rate=0, llm_rpm=0))
+    runner, port = await serve(llm.app(), ["127.0.0.1"])
+    try:
+        if api == "openai":
+            client = openai.AsyncOpenAI(api_key="test", base_url=f"http://127.0.0.1:{port}/v1")
+        else:
+            client = anthropic.AsyncAnthropic(api_key="test", base_url=f"http://127.0.0.1:{port}")
+        path = tmp_path / "requests.jsonl"
+        llm_batch.write_requests(path, api, {
+            "0": body(api, "We accept Medicare and Aetna", structured),
+            "1": body(api, "Cash only", structured),
+        })
+        batch_id = await llm_batch.submit(client, api, path)
+        await llm_batch.wait(client, api, batch_id, 0.05)
+        replies = await llm_batch.results(client, api, batch_id)
+        await client.close()
+    finally:
+        await runner.cleanup()
+    assert llm.batches == 1
+    return replies
+
+
+@pytest.mark.parametrize("api", ["openai", "anthropic"])
+def test_batch_round_trip(tmp_path, api):
+    replies = asyncio.run(run_batch(tmp_path, api))
+    assert json.loads(replies["0"])["insuranceProviders"] == ["Medicare", "Aetna"]
+    assert json.loads(replies["1"])["paymentMethods"] == ["Cash"]
+
+
+def test_anthropic_tool_use_reply_is_returned_as_json(tmp_path):
+    replies = asyncio.run(run_batch(tmp_path, "anthropic", structured=True))
+    assert json.loads(replies["0"])["insuranceProviders"] == ["Medicare", "Aetna"]
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from rate_limit import Bucket, ProviderRateLimiter, call_with_retries, parse_reset, retry_after
+
+
+def test_parse_reset_reads_durations_timestamps_and_seconds():
+    assert parse_reset("6m0s", 0) == 360
+    assert parse_reset("20ms", 0) == pytest.approx(0.02)
+    assert parse_reset("1h2m3.5s", 0) == pytest.approx(3723.5)
+    assert parse_reset("2026-01-01T00:00:30Z", 1767225600) == 30
+    assert parse_reset("1.5", 0) == 1.5
+    assert parse_reset("soon", 0) is None
+
+
+def test_retry_after_prefers_milliseconds():
+    assert retry_after({"retry-after-ms": "250", "retry-after": "3"}) == 0.25
+    assert retry_after({"retry-after": "3"}) == 3
+    assert retry_after({}) is None
+
+
+def test_bucket_refills_at_its_per_minute_rate():
+    bucket = Bucket(60)
+    bucket.updated = 0.0
+    bucket.take(60)
+    assert bucket.wait_time(1, 0.0) == 1.0
+    assert bucket.wait_time(1, 0.5) == 0.5
+    assert bucket.wait_time(1, 1.0) == 0.0
+    # Never past capacity, however long it sat idle
+    assert bucket.wait_time(60, 1000.0) == 0.0
+    bucket.take(60)
+    assert bucket.wait_time(1, 1000.0) == 1.0
+
+
+def test_bucket_is_unlimited_until_a_limit_is_known():
+    bucket = Bucket()
+    bucket.take(10**6)
+    assert bucket.wait_time(10**6, 0.0) == 0.0
+
+
+def test_limits_are_learned_from_openai_headers():
+    limiter = ProviderRateLimiter()
+    limiter.observe({
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-remaining-requests": "499",
+        "x-ratelimit-reset-requests": "120ms",
+        "x-ratelimit-limit-tokens": "30000",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "6s",
+    })
+    assert limiter.requests.capacity == 500
+    assert limiter.requests.level == pytest.approx(499, abs=0.1)
+    assert limiter.tokens.capacity == 30000
+    # Exhausted: about six seconds until the tokens bucket has room again
+    assert limiter.tokens.wait_time(1, limiter.tokens.updated) == pytest.approx(6, abs=0.01)
+
+
+def test_limits_are_learned_from_anthropic_headers():
+    limiter = ProviderRateLimiter(rpm=1000)
+    limiter.observe({
+        "anthropic-ratelimit-requests-limit": "50",
+        "anthropic-ratelimit-requests-remaining": "10",
+        "anthropic-ratelimit-requests-reset": "2026-01-01T00:00:00Z",
+    })
+    assert limiter.requests.capacity == 50
+    assert limiter.requests.level == pytest.approx(10, abs=0.1)
+    assert limiter.tokens.capacity is None
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {"headers": {"retry-after-ms": "10"}})()
+
+
+def test_call_with_retries_retries_a_429_then_returns():
+    limiter = ProviderRateLimiter(max_attempts=3, base_delay=0.01)
+    calls = 0
+
+    async def send():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RateLimited()
+        return {}, "reply"
+
+    result = asyncio.run(call_with_retries(send, 10, limiter, lambda e: isinstance(e, RateLimited)))
+    assert (result, calls, limiter.retries) == ("reply", 2, 1)
+
+
+def test_call_with_retries_gives_up_after_max_attempts():
+    limiter = ProviderRateLimiter(max_attempts=2, base_delay=0.01)
+
+    async def send():
+        raise RateLimited()
+
+    with pytest.raises(RateLimited):
+        asyncio.run(call_with_retries(send, 10, limiter, lambda e: True))
+    assert limiter.retries == 1
@@ -0,0 +1,72 @@
+import json
+
+from crawl import ResultJournal
+
+
+def record(clinic_id, providers=(), payments=()):
+    return {
+        "clinicId": clinic_id,
+        "extraction": {"insuranceProviders": list(providers), "paymentMethods": list(payments)},
+    }
+
+
+def test_latest_record_wins_after_reopening(tmp_path):
+    journal = ResultJournal(tmp_path / "results.jsonl").open()
+    journal.append(record("a"))
+    journal.append(record("b", payments=["Cash"]))
+    journal.append(record("a", providers=["Aetna"]))
+    journal.close()
+
+    journal = ResultJournal(tmp_path / "results.jsonl").open()
+    assert len(journal) == 2
+    assert journal.get("a") == record("a", providers=["Aetna"])
+    assert [r["clinicId"] for r in journal.records()] == ["b", "a"]
+    assert journal.stats() == (1, 1)
+    journal.close()
+
+
+def test_unindexed_records_are_recovered_and_a_torn_tail_dropped(tmp_path):
+    path = tmp_path / "results.jsonl"
+    journal = ResultJournal(path).open()
+    journal.append(record("a"))
+    journal.close()
+    # Crash after a journal write but before its index line, then mid-write
+    with open(path, "a") as f:
+        f.write(json.dumps(record("b", providers=["Cigna"])) + "\n")
+        f.write('{"clinicId": "c", "extrac')
+
+    journal = ResultJournal(path).open()
+    assert "b" in journal and "c" not in journal
+    assert journal.get("b") == record("b", providers=["Cigna"])
+    journal.append(record("c"))
+    journal.close()
+    assert [json.loads(line)["clinicId"] for line in path.read_text().splitlines()] == ["a", "b", "c"]
+
+
+def test_compact_keeps_one_record_per_clinic(tmp_path):
+    path = tmp_path / "results.jsonl"
+    snapshot = tmp_path / "extraction-results.json"
+    journal = ResultJournal(path).open()
+    for providers in ([], ["Aetna"], ["Aetna", "Cigna"]):
+        journal.append(record("a", providers=providers))
+    journal.append(record("b"))
+
+    assert journal.compact(snapshot) == 2
+    assert len(path.read_text().splitlines()) == 2
+    assert json.loads(snapshot.read_text()) == [record("a", providers=["Aetna", "Cigna"]), record("b")]
+    # Still usable, with a rewritten index
+    journal.append(record("c"))
+    journal.close()
+    journal = ResultJournal(path).open()
+    assert journal.get("a") == record("a", providers=["Aetna", "Cigna"])
+    assert len(journal) == 3
+    journal.close()
+
+
+def test_import_snapshot_seeds_the_journal(tmp_path):
+    snapshot = tmp_path / "extraction-results.json"
+    snapshot.write_text(json.dumps([record("a"), record("b", providers=["Medicare"])]))
+    journal = ResultJournal(tmp_path / "results.jsonl").open()
+    assert journal.import_snapshot(snapshot) == 2
+    assert journal.get("b") == record("b", providers=["Medicare"])
+    journal.close()
@@ -0,0 +1,58 @@
+from rule_extractor import AhoCorasick, RuleExtractor
+
+MAIN = "=== MAIN PAGE ===\nWelcome to our pain clinic. We are accepting new patients.\n"
+
+
+def page(body: str) -> str:
+    return f"{MAIN}\n=== PAGE: https://clinic.example/insurance ===\n{body}"
+
+
+CARRIER_LIST = page(
+    "## Insurance\n"
+    "* Medicare\n"
+    "* Blue Cross Blue Shield\n"
+    "* Aetna\n"
+    "* UnitedHealthcare\n"
+    "\nWe also take cash and credit cards.\n"
+)
+
+
+def test_clear_carrier_list_is_answered():
+    extraction = RuleExtractor().extract(CARRIER_LIST)
+    assert extraction == {
+        "insuranceProviders": ["Medicare", "Blue Cross Blue Shield", "Aetna", "UnitedHealthcare"],
+        "otherInsurance": [],
+        "paymentMethods": ["Cash", "Credit Cards"],
+        "acceptsNewPatients": True,
+        "confidence": "high",
+    }
+
+
+def test_longest_alias_wins():
+    matcher = AhoCorasick({"blue cross": "short", "blue cross blue shield": "long", "cross": "word"})
+    assert matcher.find("we take blue cross blue shield") == [(8, 30, "long")]
+
+
+def test_aliases_match_whole_words_only():
+    matcher = AhoCorasick({"uhc": "UnitedHealthcare"})
+    assert matcher.find("uhcare and uhc") == [(11, 14, "UnitedHealthcare")]
+
+
+def test_unknown_plan_in_the_list_goes_to_the_llm():
+    content = page("* Medicare\n* Acme Regional Health\n* Aetna\n* Zenith Care\n* Cigna\n")
+    assert RuleExtractor().extract(content) is None
+
+
+def test_negation_goes_to_the_llm():
+    content = page("* Medicare\n* Aetna\n* Cigna\n\nWe do not accept Humana.\n")
+    assert RuleExtractor().extract(content) is None
+
+
+def test_too_few_carriers_go_to_the_llm():
+    assert RuleExtractor().extract(page("* Medicare\n* Aetna\n")) is None
+
+
+def test_content_without_an_insurance_page_goes_to_the_llm():
+    extractor = RuleExtractor()
+    assert extractor.extract(MAIN + "* Medicare\n* Aetna\n* Cigna\n") is None
+    assert (extractor.hits, extractor.misses) == (0, 1)